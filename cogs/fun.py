@@ -73,7 +73,7 @@ class Fun(commands.Cog, GlobalCog):
                 return await ctx.reply(msg)
 
             # give points to <recipient> now
-            self.acc.ub_addpoints(
+            self.acc.award_points(
                 None,
                 None,
                 "Used the 'star' command (cooldown 12hrs).",
@@ -161,9 +161,10 @@ class Fun(commands.Cog, GlobalCog):
         if not stream_started(prev, curr):
             return
             
-        # see if the @streamnotif role exists;
-        # discord.utils.get(...) evaluates to None if results set is empty
-        notif_role = discord.utils.get(member.guild.roles, name="streamnotif")
+        # see if the @streamnotif role exists (None if it doesn't)
+        notif_role = self.acc.fetch_role(
+            "streamnotif", str(member.guild.id), member.guild
+        )
         if notif_role is None:
             raise RuntimeError(
                 "[on_voice_state_update][error] "
@@ -172,7 +173,7 @@ class Fun(commands.Cog, GlobalCog):
         
         # check if the "stream_text" channel/designation zone is set (REQUIRED)
         uda = self.bot.get_cog("UserDataAccessor")
-        if not uda.designation_is_set(
+        if not await uda.aio.designation_is_set(
             str(member.guild.id),
             "stream_text"
         ):
@@ -187,13 +188,13 @@ class Fun(commands.Cog, GlobalCog):
         # check_went_live_interval() will update a user's "last_went_live"
         # attribute upon checking
         #
-        if not uda.check_went_live_interval(
+        if not await uda.aio.check_went_live_interval(
             member, min_interval_sec=300
         ):
             return
         
         # get designated 'stream_text' channel
-        channel_id = uda.get_designation_channel_id(
+        channel_id = await uda.aio.get_designation_channel_id(
             str(member.guild.id), "stream_text"
         )
         
@@ -14,9 +14,6 @@ class GlobalCog:
     accessor_mirror = None
     schedule_mirror = None
 
-    # flag indicates if zones are currently being loaded into memory
-    zones_being_loaded = False
-
     # flag for indicating a long task is occurring
     long_process_active = False
 
@@ -64,8 +61,9 @@ class GlobalCog:
             async def wrapper(*args, **kwargs):
                 try:
                     # compare user CL with command-specified clearance level
-                    user_CL = args[0].get_attr(
-                        "clearance", str(args[1].guild.id), str(args[1].author.id)
+                    # (cached, see UserDataAccessor.get_clearance())
+                    user_CL = args[0].get_clearance(
+                        str(args[1].guild.id), str(args[1].author.id)
                     )
 
                     if not user_CL or (user_CL < level_N):
@@ -113,11 +111,21 @@ class GlobalCog:
         else:
             print(f"[[GlobalCog.set_flag]: flag ({flag}) doesn't exist.")
 
-    def get_attr(self, attr: str, gid: str, uid: str):
+    async def get_attr(self, attr: str, gid: str, uid: str):
         """
         Mirror function to use userdata_accessor's 'get_attr' method
+        (awaitable: the read runs off the event loop)
+        """
+        try:
+            return await GlobalCog.accessor_mirror.aio.get_attr(attr, gid, uid)
+        except:
+            traceback.print_exc()
+
+    def get_clearance(self, gid: str, uid: str):
+        """
+        Mirror function to use userdata_accessor's 'get_clearance' method
         """
         try:
-            return GlobalCog.accessor_mirror.get_attr(attr, gid, uid)
+            return GlobalCog.accessor_mirror.get_clearance(gid, uid)
         except:
             traceback.print_exc()
@@ -151,7 +151,8 @@ class Messaging(commands.Cog, GlobalCog):
 
         # only allow execution in "share_zone" channels
         uda = self.bot.get_cog("UserDataAccessor")
-        if not uda.is_channel("share_zone", str(ctx.guild.id), str(ctx.channel.id)):
+        gid, channel_id = str(ctx.guild.id), str(ctx.channel.id)
+        if not await uda.aio.is_channel("share_zone", gid, channel_id):
             raise commands.CommandError("Command only allowed in a share zone.")
 
         # deprecated for now: "quote(str)" to sanitize string
@@ -214,7 +215,7 @@ class Messaging(commands.Cog, GlobalCog):
 
         # (temporary solution for awarding points)
         # award extra points w/direct call here
-        uda.ub_addpoints(
+        uda.award_points(
             None,
             None,
             "Points for sharing resource.",
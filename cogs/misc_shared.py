@@ -10,14 +10,13 @@ except:
 
 import asyncio
 import emojis
-import json
 import os
 import random
 import signal
 import traceback
 import typing
 
-from utils.sync_utils import create_prefixes_file, get_prefix_str
+from utils.sync_utils import get_prefix_str, prefix_cache
 from utils.async_utils import react_success
 
 
@@ -234,19 +233,9 @@ class MiscShared(commands.Cog, GlobalCog):
 
         # case: set new prefix
         if len(new_prefix) < 4:
-            create_prefixes_file()
-            with open("prefixes.json", "r") as f:
-                prefixes = json.load(f)
-
-            # add new prefix entry and save
-            prefixes[self.bot.user.name.lower()] = new_prefix
-
-            with open("prefixes.json", "w") as f:
-                json.dump(prefixes, f, indent=4)
-
-            # update bot activity now
-            new_status = discord.Game(name=f"{new_prefix}help")
-            await self.bot.change_presence(activity=new_status)
+            # add new prefix entry for this guild and save
+            # (the presence is bot-wide, so it doesn't show per-guild prefixes)
+            prefix_cache.set(self.bot.user.name.lower(), ctx.guild.id, new_prefix)
             embed = discord.Embed(
                 description=f"New prefix set to {new_prefix}.",
                 colour=discord.Colour.green(),
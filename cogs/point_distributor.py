@@ -1,20 +1,42 @@
 import discord
 from discord.ext import commands
-import emojis
+import os
 import re
+from utils.emoji_matcher import emoji_matcher
+from utils.message_features import embed_kind, extract_features
+from utils.point_rules import PointRules
 from utils.sync_utils import get_links
 
 
+# distributor flag name -> point rule (see utils/point_rules.py)
+FLAG_RULES = {
+    "text": "text",
+    "text_med": "text_med",
+    "text_long": "text_long",
+    "reaction": "reaction",
+    "emote": "emote",
+    "image": "image",
+    "video": "video_upload",
+    "url": "url",
+}
+
+
 class Distributor(commands.Cog):
     """
     Class for handling point-awarding mechanisms and distribution.
+
+    Point values come from a compiled <PointRules> table (reloaded when the
+    rule file changes, with optional per-guild overrides).
     """
 
+    # per-guild point overrides, next to the rule file
+    OVERRIDES_FNAME = "point_overrides.json"
+
     def __init__(self, bot, fname=None):
         self.bot = bot
 
         # set distribution of points
-        self.pdistribution = {}
+        self.rules = None
         if fname:
             self.set_points_distribution(fname)
         else:
@@ -37,75 +59,41 @@ class Distributor(commands.Cog):
     def set_points_distribution(self, fname="action_point_distribution.txt"):
         """
         Assign point distribution to use when giving points for user actions
+        (raises ValueError if the rule file is invalid)
         """
 
-        tmpdict = {}
-        lines = []
-
-        # read all file lines
-        try:
-            with open(fname, "r") as f:
-                lines = f.readlines()
-        except:
-            with open("cogs/" + fname, "r") as f:
-                lines = f.readlines()
-        finally:
-            # populate dict with each line
-            for line in lines:
-                tmp = line.split(",")
-                tmpdict.update({tmp[0]: float(tmp[1])})
-
-            # assign initialized dict to pdistribution
-            self.pdistribution = tmpdict
-
-    def flag_switch(self, flag, is_true: bool):
+        # rule file is looked up in the working dir, then in "cogs/"
+        path = fname if os.path.exists(fname) else os.path.join("cogs", fname)
+        overrides = os.path.join(os.path.dirname(path), self.OVERRIDES_FNAME)
+        self.rules = PointRules(path, overrides_path=overrides)
+
+    @property
+    def pdistribution(self) -> dict:
         """
-        Switch-case implementation for determining what points are
-        allowed to be given based on input flags
+        Current default point values ({rule: points}).
         """
+        return self.rules.table()._asdict()
 
-        if self.pdistribution:
-            # find and execute method attributed to flag
-            method_name = f"{flag}_flag"
-            method = getattr(
-                self, method_name, lambda x: "[Distributor]: Invalid flag."
-            )
-            return method(is_true)
-
-        print("[Distributor.flag_switch]: BAD FLAG")
-        return -1
-
-    # CURRENT LIST OF ALL THE FLAGS USED IN THE POINT DISTRIBUTOR
-    def text_flag(self, is_true: bool):
-        return self.pdistribution["text"] if is_true else 0
-
-    def text_med_flag(self, is_true: bool):
-        return self.pdistribution["text_med"] if is_true else 0
-
-    def text_long_flag(self, is_true: bool):
-        return self.pdistribution["text_long"] if is_true else 0
-
-    def reaction_flag(self, is_true: bool):
-        return self.pdistribution["reaction"] if is_true else 0
-
-    def emote_flag(self, is_true: bool):
-        return self.pdistribution["emote"] if is_true else 0
-
-    def image_flag(self, is_true: bool):
-        return self.pdistribution["image"] if is_true else 0
-
-    def video_flag(self, is_true: bool):
-        return self.pdistribution["video_upload"] if is_true else 0
+    def flag_switch(self, flag, is_true: bool, gid=None):
+        """
+        Return the points for distributor flag <flag> (e.g. "video") in
+        guild <gid> if <is_true>, else 0
+        """
 
-    def url_flag(self, is_true: bool):
-        return self.pdistribution["url"] if is_true else 0
+        rule = FLAG_RULES.get(flag)
+        if rule is None:
+            print("[Distributor.flag_switch]: BAD FLAG")
+            return -1
+        return self.rules.value(rule, gid) if is_true else 0
 
-    def get_points(self, message, flags):
+    def get_points(self, message, flags, features=None):
         """
         CLIENT-SIDE function to determine most point criteria for a message;
         May return a tuple of awarded points, and awarded xp;
 
         'message': discord.Message object
+        'features': the message's MessageFeatures (utils/message_features.py),
+                    if already computed; extracted here otherwise
 
         Note about 'flags':
             - it is a dict of point award enablers/disablers
@@ -124,77 +112,88 @@ class Distributor(commands.Cog):
                 > XP_REDUCTION (??)
         """
 
-        if message.content is None or flags["NO_POINTS"]:
+        if message.content is None or flags["NO_POINTS"] or self.NO_POINTS:
             return (0, 0)
 
-        awarded_points, awarded_xp = 0.0, 0.0
-
-        # checking text length criteria
-        awarded_points += self.get_text_points(message.content, flags)
-
-        # checking emoji criteria
-        awarded_points += self.get_emoji_points(message.clean_content, flags)
-
-        # checking image/embed criteria (incl. video)
-        awarded_points += self.get_embed_points(message.embeds, flags)
+        if features is None:
+            features = extract_features(
+                message, med_len=self.TEXT_LEN_MED, long_len=self.TEXT_LEN_LONG
+            )
 
-        # (TODO) checking url criteria
-        awarded_points += self.get_url_points(message.content, flags)
+        # text length, emoji, image/embed (incl. video) and url criteria,
+        # scored with the guild's compiled point table
+        gid = message.guild.id if message.guild is not None else None
+        awarded_points = self.rules.score(features, flags, gid)
 
         # calculate awarded xp (check xp reduction flag)
         if self.XP_REDUCTION:
-            awarded_xp += (self.XP_REDUCE_RATIO) * awarded_points
+            awarded_xp = (self.XP_REDUCE_RATIO) * awarded_points
         else:
-            awarded_xp += awarded_points
+            awarded_xp = awarded_points
 
         return (awarded_points, awarded_xp)
 
-    def get_text_points(self, txt_msg: str, flags):
+    def get_text_points(self, txt_msg: str, flags, gid=None):
         """
         Return message's award points based on text length
         """
 
+        if len(txt_msg) >= self.TEXT_LEN_LONG:
+            return self.get_length_points("long", flags, gid)
+        elif len(txt_msg) >= self.TEXT_LEN_MED:
+            return self.get_length_points("medium", flags, gid)
+        return self.get_length_points("short", flags, gid)
+
+    def get_length_points(self, length_bucket: str, flags, gid=None):
+        """
+        Return message's award points based on its length bucket
+        ("short", "medium" or "long", see MessageFeatures)
+        """
+
         # check if flag "NO_POINTS" is enabled
         if self.NO_POINTS:
             return 0.0
 
-        awarded_points = 0.0
-
         # points amount conditionally based on text length
-        if len(txt_msg) >= self.TEXT_LEN_LONG:
-            awarded_points += self.flag_switch("text_long", flags["TEXT_LONG"])
-        elif len(txt_msg) >= self.TEXT_LEN_MED:
-            awarded_points += self.flag_switch("text_med", flags["TEXT_MED"])
-        else:
-            awarded_points += self.flag_switch("text", flags["TEXT"])
-
-        return awarded_points
+        if length_bucket == "long":
+            return self.flag_switch("text_long", flags["TEXT_LONG"], gid)
+        elif length_bucket == "medium":
+            return self.flag_switch("text_med", flags["TEXT_MED"], gid)
+        return self.flag_switch("text", flags["TEXT"], gid)
 
-    def get_emoji_points(self, msg: str, flags, hi=10, hi_coeff=2.1):
+    def get_emoji_points(self, msg: str, flags, gid=None):
         """
         Determine points to award msg based on # of emojis present
         """
 
+        # num_emojis = self.find_num_emojis(txt_msg, custom=True) + \
+        #             self.find_num_emojis(txt_msg, custom=False)
+        return self.get_emoji_count_points(emoji_matcher.count(msg), flags, gid)
+
+    def get_emoji_count_points(self, num_emojis: int, flags, gid=None):
+        """
+        Determine points to award msg with <num_emojis> emojis
+        """
+
         # check if flag "NO_POINTS" is enabled
         if self.NO_POINTS:
             return 0.0
 
-        # num_emojis = self.find_num_emojis(txt_msg, custom=True) + \
-        #             self.find_num_emojis(txt_msg, custom=False)
-        num_emojis = emojis.count(msg)
-
-        # if user put more than <hi> amount of emojis, give more points
-        if num_emojis > hi:
-            return (hi_coeff) * self.flag_switch("emote", flags["EMOTE"])
+        # if user put more than <emote_many_threshold> emojis, give more points
+        table = self.rules.table(gid)
+        if num_emojis > table.emote_many_threshold:
+            return table.emote_many_factor * self.flag_switch(
+                "emote", flags["EMOTE"], gid
+            )
 
         # otherwise, standard point rewarding
         if num_emojis >= 1:
-            return self.flag_switch("emote", flags["EMOTE"])
+            return self.flag_switch("emote", flags["EMOTE"], gid)
 
         return 0.0
 
     
-    def get_attachment_points(self, attachments, flags):
+    def get_attachment_points(self, attachments, flags, gid=None):
         """
         Return points based on # of attachments found in msg.
         
@@ -204,45 +203,62 @@ class Distributor(commands.Cog):
         
         # check if attachments are present
         if (attachments is not None) and (len(attachments) > 0):
-            return self.flag_switch("image", flags["IMAGE"])
+            return self.flag_switch("image", flags["IMAGE"], gid)
         return 0.0
     
 
-    def get_embed_points(self, embeds, flags):
+    def get_embed_points(self, embeds, flags, gid=None):
         """
         Return points based on # of embeds found in msg
         """
 
+        return self.get_embed_kind_points(
+            [embed_kind(embed) for embed in embeds], flags, gid
+        )
+
+    def get_embed_kind_points(self, embed_kinds, flags, gid=None):
+        """
+        Return points based on the kinds of embeds found in msg
+        ("video", "image" or "other", see MessageFeatures)
+        """
+
         # check if flag "NO_POINTS" is enabled
         if self.NO_POINTS:
             return 0.0
 
         awarded_points = 0.0
 
-        for embed in embeds:
-            if embed.video:  # if video upload
-                awarded_points += self.flag_switch("video", flags["VIDEO"])
-            elif embed.image:  # if image upload
-                awarded_points += self.flag_switch("image", flags["IMAGE"])
+        for kind in embed_kinds:
+            if kind == "video":  # if video upload
+                awarded_points += self.flag_switch("video", flags["VIDEO"], gid)
+            elif kind == "image":  # if image upload
+                awarded_points += self.flag_switch("image", flags["IMAGE"], gid)
 
         return awarded_points
 
-    def get_reaction_points(self):
+    def get_reaction_points(self, gid=None):
         """
         Return points for a single reaction;
         Usually called by async "on_message_reaction()" method?
         """
 
-        return self.pdistribution["reaction"]
+        return self.rules.value("reaction", gid)
 
-    def get_url_points(self, msg: str, flags):
+    def get_url_points(self, msg: str, flags, gid=None):
         """
         Return points calculated based on the presence of URLs present in a message.
         """
 
+        return self.get_link_points(get_links(msg), flags, gid)
+
+    def get_link_points(self, links, flags, gid=None):
+        """
+        Return points for the URLs <links> found in a message.
+        """
+
         # check if flag "NO_POINTS" is enabled
-        if (not self.NO_POINTS) and (len(get_links(msg)) > 0):
-            return self.flag_switch("url", flags["URL"])
+        if (not self.NO_POINTS) and (len(links) > 0):
+            return self.flag_switch("url", flags["URL"], gid)
         return 0
 
 
@@ -2,12 +2,12 @@ import discord
 from discord.ext import commands
 
 import datetime
-import asyncio
 import re
 import traceback
 import typing
 from cogs.globalcog import GlobalCog
 from constants import roles
+from utils.rate_limiter import PRIORITY_HIGH
 from utils.sync_utils import stream_started, stream_stopped
 
 
@@ -66,15 +66,15 @@ class PointSystem(commands.Cog, GlobalCog):
             total_mins = round(total_secs / 60, 1)
             
             # add stream time to the users' stats
-            uda.update(
+            await uda.aio.update(
                 "add", total_mins, "total_time_streamed", None, member=member
             )
-            uda.update(
+            await uda.aio.update(
                 "add", 1, "num_times_streamed", None, member=member
             )
 
         # award points for streaming
-        uda.award_stream_points(total_secs, member)
+        await uda.award_stream_points(total_secs, member)
         
 
     # EVENT LISTENER: on_message
@@ -91,13 +91,19 @@ class PointSystem(commands.Cog, GlobalCog):
         # ACTION: AWARD MESSAGE POINTS
         try:
 
+            # analyze the message once for all the checks below
+            features = None
+            uda = self.bot.get_cog("UserDataAccessor")
+            if uda is not None:
+                features = await uda.aio.message_features(message)
+
             # if unable to award art-posting or reply-to-art points,
             # award normal points
             if not (
-                self.award_art_message_points(message)
-                or self.award_art_reply_points(message)
+                await self.award_art_message_points(message, features)
+                or await self.award_art_reply_points(message, features)
             ):
-                self.award_message_points(message)
+                await self.award_message_points(message, features)
         except:
             traceback.print_exc()
 
@@ -127,14 +133,16 @@ class PointSystem(commands.Cog, GlobalCog):
         
         # ACTION: AWARD REACTION POINTS
         try:
+            # queue the normal reaction points for the "reacter" (paid out
+            # later, this listener doesn't wait); skip repeated reactions by
+            # the same user on the same message
+            if not self.schedule_reacter_points(payload):
+                return
+
             # if unable to award art-specific reaction points to author,
             # award normal reaction points to author
-            if not await self.award_art_reaction_points(payload):
-                await self.award_reaction_points(payload, award_author=True)
-            await asyncio.sleep(4.0)
-
-            # award normal reaction points to "reacter"
-            await self.award_reaction_points(payload)
+            art_awarded = await self.award_art_reaction_points(payload)
+            await self.award_reaction_points(payload, award_author=not art_awarded)
         except:
             traceback.print_exc()
 
@@ -187,12 +195,13 @@ class PointSystem(commands.Cog, GlobalCog):
             return False
 
         # attempt to award user points
-        resp = uda.ub_addpoints(
+        resp = await uda.ub_addpoints(
             None,
             None,
             "Points for boosting the server.",
             bank_amount=points,
             member=message.author,
+            priority=PRIORITY_HIGH,
         )
 
         # ERROR: if bad or nonexistent response, raise exception
@@ -210,10 +219,12 @@ class PointSystem(commands.Cog, GlobalCog):
     # ART-SHARING LOGIC -- insert into "on_message"
     #   - check: is art_gallery zone?
     #   - check: has an embed (image and/or video)?
-    def award_art_message_points(self, message: discord.Message):
+    async def award_art_message_points(self, message: discord.Message, features=None):
         """
         Award points to the author for posting artwork.
 
+        <features>: the message's MessageFeatures (looked up if not given)
+
         Returns True if success, else False.
         """
 
@@ -227,32 +238,26 @@ class PointSystem(commands.Cog, GlobalCog):
             )
             return False
 
-        gid = str(message.guild.id)
-        chid = str(message.channel.id)
+        if features is None:
+            features = await uda.aio.message_features(message)
         
         # only award art points if channel is "art_zone"
-        truth_table = {
-            uda.is_channel("art_zone", gid, chid),
-            len(message.attachments) > 0 and
-            any([typ in message.attachments[0].content_type for typ in {"image", "video"}])
-        }
-        
-        if (all(truth_table)):
+        if "art_zone" in features.zones and features.has_art:
             
             # posting art gives you a (FACTOR) point multiplier of 2x
             FACTOR = 2.0
             
-            awarded_pts = FACTOR * uda.distributor.get_embed_points(
-                message.embeds, uda.pt_flags
+            awarded_pts = FACTOR * uda.distributor.get_embed_kind_points(
+                features.embed_kinds, uda.pt_flags, message.guild.id
             )
             
             # getting points for attachments (non-embed)
             awarded_pts += uda.distributor.get_attachment_points(
-                message.attachments, uda.pt_flags
+                features.attachment_kinds, uda.pt_flags, message.guild.id
             )
 
             # award the points
-            uda.ub_addpoints(
+            uda.award_points(
                 None,
                 None,
                 "Points for sharing artwork.",
@@ -282,36 +287,24 @@ class PointSystem(commands.Cog, GlobalCog):
         gid = str(payload.guild_id)
         chid = str(payload.channel_id)
 
+        # only award art points if channel is "art_zone"
+        if not await uda.aio.is_channel("art_zone", gid, chid):
+            return False
+
         guild = self.bot.get_guild(payload.guild_id)
         channel = guild.get_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
+        message = await uda.fetch_message(channel, payload.message_id)
 
-        # only award art points if channel is "art_zone"
-        res_1 = uda.is_channel("art_zone", gid, chid)
-        res_2 = len(message.attachments) > 0
-        res_3 = (
-            (
-                "image" in message.attachments[0].content_type
-                or "video" in message.attachments[0].content_type
-            )
-            if res_2
-            else False
-        )
+        # usually cached from when the art was posted
+        features = await uda.aio.message_features(message)
 
-        if (
-            uda.is_channel("art_zone", gid, chid)
-            and (len(message.attachments) > 0)
-            and (
-                "image" in message.attachments[0].content_type
-                or "video" in message.attachments[0].content_type
-            )
-        ):
+        if features.has_art:
 
             # get num. points allowed per user reaction
             FACTOR = 2.0
-            reaction_points = FACTOR * uda.distributor.get_reaction_points()
+            reaction_points = FACTOR * uda.distributor.get_reaction_points(gid)
 
-            uda.ub_addpoints(
+            uda.award_points(
                 None,
                 None,
                 "Author points for reaction added on their art.",
@@ -327,10 +320,12 @@ class PointSystem(commands.Cog, GlobalCog):
 
     # (EXTRA) ART-SHARING LOGIC
     #   - award extra points for every reply to the author's artwork
-    def award_art_reply_points(self, message: discord.Message):
+    async def award_art_reply_points(self, message: discord.Message, features=None):
         """
         Give points to art piece author if someone replies to the art post.
 
+        <features>: the message's MessageFeatures (looked up if not given)
+
         Returns True if success, else False.
         """
 
@@ -355,47 +350,47 @@ class PointSystem(commands.Cog, GlobalCog):
             )
             return False
 
-        gid = str(message.guild.id)
-        chid = str(message.channel.id)
+        if features is None:
+            features = await uda.aio.message_features(message)
 
-        # detect if channel is "art_zone"
-        if not uda.is_channel("art_zone", gid, chid):
+        # detect if channel is "art_zone", and if message is a reply
+        if "art_zone" not in features.zones or features.reply_to is None:
             return False
 
-        # detect if message is reply
-        replied_to_reference = message.reference
-        replied_to = replied_to_reference.resolved if replied_to_reference else None
-        if replied_to is None:
+        replied_to = message.reference.resolved
+        if not isinstance(replied_to, discord.Message):
             return False
 
         # exit if reply source (msg being replied to) does not have img/video
-        if len(replied_to.attachments == 0) or not (
-            "image" in message.attachments[0].content_type
-            or "video" in message.attachments[0].content_type
-        ):
+        replied_features = await uda.aio.message_features(replied_to)
+        if not replied_features.has_art:
             return False
 
         # DEBUG
         # print("proceeding to award art reply points")
 
         # calculate award points (multiply by factor because special case)
+        # (get_points() returns a (points, xp) tuple)
         FACTOR = 2.0
-        awarded_points = FACTOR * uda.distributor.get_points(replied_to, uda.pt_flags)
+        points, _ = uda.distributor.get_points(
+            replied_to, uda.pt_flags, replied_features
+        )
+        awarded_points = FACTOR * points
 
         # proceed to award points to author for receiving a reply
-        uda.ub_addpoints(
+        uda.award_points(
             None,
             None,
             "Artist points--received art reply.",
             bank_amount=awarded_points,
-            member=message.author,
+            member=replied_to.author,
         )
 
         # print("award_art_reply success")
         return True
 
     # (method) ON_MESSAGE POINT AWARDING
-    def award_message_points(self, message: discord.Message):
+    async def award_message_points(self, message: discord.Message, features=None):
         """
         Give (potential) points for a user's text message.
 
@@ -406,7 +401,7 @@ class PointSystem(commands.Cog, GlobalCog):
 
             uda = self.bot.get_cog("UserDataAccessor")
             if uda:
-                uda.givepoints(message)
+                await uda.givepoints(message, features)
             else:
                 print(
                     "[point_system] ERROR: UDA is None. "
@@ -414,11 +409,45 @@ class PointSystem(commands.Cog, GlobalCog):
                 )
 
     # (method) ON_RAW_REACTION_ADD POINT AWARDING
+    def schedule_reacter_points(self, payload) -> bool:
+        """
+        Queue the "reacter"'s points for a reaction add; they are paid out
+        after UserDataAccessor.REACTION_AWARD_DELAY seconds.
+
+        Returns False if nothing was queued (not a guild member, a bot, or
+        the user already reacted to this message recently).
+        """
+
+        # "payload.member" only present w/REACTION_ADD event
+        if (not payload.guild_id or not payload.member) or payload.member.bot:
+            return False
+
+        uda = self.bot.get_cog("UserDataAccessor")
+        if not uda:
+            print(
+                "[point_system] ERROR: UDA is None. "
+                "Could not give REACTION points."
+            )
+            return False
+
+        return uda.delayed.schedule(
+            ("reaction", payload.message_id, payload.user_id),
+            uda.REACTION_AWARD_DELAY,
+            uda.award_points,
+            payload.guild_id,
+            payload.user_id,
+            "Points for reaction add.",
+            bank_amount=uda.distributor.get_reaction_points(payload.guild_id),
+        )
+
     async def award_reaction_points(
         self, payload, xp_on: bool = True, award_author: bool = False
     ):
         """
-        Give (potential) points for a user's reaction add.
+        Give (potential) XP for a user's reaction add, and points to the
+        message author if <award_author>.
+
+        (the reacter's points are queued by <schedule_reacter_points()>)
         """
 
         # "payload.member" only present w/REACTION_ADD event
@@ -439,7 +468,7 @@ class PointSystem(commands.Cog, GlobalCog):
             return
 
         # get num. points allowed per user reaction
-        reaction_points = uda.distributor.get_reaction_points()
+        reaction_points = uda.distributor.get_reaction_points(payload.guild_id)
 
         # (optional) IF <award_author>, get message author (discord.Member)
         msg_author = None
@@ -447,11 +476,11 @@ class PointSystem(commands.Cog, GlobalCog):
             try:
                 guild = self.bot.get_guild(payload.guild_id)
                 channel = guild.get_channel(payload.channel_id)
-                msg = await channel.fetch_message(payload.message_id)
+                msg = await uda.fetch_message(channel, payload.message_id)
                 msg_author = msg.author
 
                 # give points to message author
-                uda.ub_addpoints(
+                uda.award_points(
                     None,
                     None,
                     "Points for reaction add.",
@@ -464,19 +493,13 @@ class PointSystem(commands.Cog, GlobalCog):
 
         # update use points (and XP if applicable)
         if xp_on:
-            uda.update("add", reaction_points, "xp", None, member=payload.member)
+            await uda.aio.update(
+                "add", reaction_points, "xp", None, member=payload.member
+            )
             if msg_author:
-                uda.update("add", reaction_points, "xp", None, member=msg_author)
-
-        await asyncio.sleep(4.0)
-
-        uda.ub_addpoints(
-            None,
-            None,
-            "Points for reaction add.",
-            bank_amount=reaction_points,
-            member=payload.member,
-        )
+                await uda.aio.update(
+                    "add", reaction_points, "xp", None, member=msg_author
+                )
 
 
 def setup(bot):
@@ -7,10 +7,12 @@ import json
 import os
 import pickle
 import sys
+import tempfile
 import traceback
 from typing import Optional
 from cogs.globalcog import GlobalCog
 from utils.async_utils import react_success, react_fail
+from utils.emoji_matcher import emoji_matcher
 
 
 # (short?)hand for selection.py scopes
@@ -24,17 +26,34 @@ class RR_SCOPES(Enum):
         return value in cls.__members__
 
 
+def parse_link(entry):
+    """
+    Return (channel_id, message_id) ints for a stored "<channel>-<message>"
+    link, or None.
+    """
+    if not entry:
+        return None
+    channel_id, _, msg_id = str(entry).partition("-")
+    return int(channel_id), int(msg_id)
+
+
 class ReactionRoleLinks:
     """
     Self-caching helper class for the <Selection> class.
 
-    Stores message links.
+    Stores message links as (channel_id, message_id) int pairs:
+        - links[gid]:           insertion-ordered dict (oldest first), used
+                                as an ordered set
+        - default_link[gid]:    one pair, or None
+        - message_ids:          every monitored message ID (-> no. of links),
+                                so reactions on other messages are rejected
+                                with one set lookup
     """
 
     def __init__(self):
         self.default_link = {}
         self.links = {}
-        self.filename = "reaction_role_links.pickle"
+        self.message_ids = {}
 
     # dict overload for retrieving by key/index
     def __getitem__(self, key):
@@ -43,87 +62,111 @@ class ReactionRoleLinks:
     def __contains__(self, key):
         return key in self.links
 
+    def _ref(self, key, n: int):
+        if key is None:
+            return
+        count = self.message_ids.get(key[1], 0) + n
+        if count > 0:
+            self.message_ids[key[1]] = count
+        else:
+            self.message_ids.pop(key[1], None)
+
+    def _set_default(self, gid, key):
+        self._ref(self.default_link.get(gid), -1)
+        self.default_link[gid] = key
+        self._ref(key, 1)
+
     def add_link(self, gid, link: discord.Message, default: bool = False):
-        entry = "{}-{}".format(link.channel.id, link.id)
+        key = (link.channel.id, link.id)
         if default:
-            self.default_link[gid] = entry
+            self._set_default(gid, key)
 
         else:
-            if gid not in self.links:
-                self.links[gid] = []
-            if entry not in self.links[gid]:
-                self.links[gid].insert(0, entry)
+            links = self.links.setdefault(gid, {})
+            if key not in links:
+                links[key] = None
+                self._ref(key, 1)
 
     def pop_link(self, gid, default: bool = False):
+        """
+        Remove guild <gid>'s oldest link (or its default link).
+        """
         if default:
-            self.default_link[gid] = None
+            self._set_default(gid, None)
         else:
-            try:
-                self.links[gid].pop()
-            except (IndexError, KeyError):
-                pass
+            links = self.links.get(gid)
+            if links:
+                key = next(iter(links))
+                del links[key]
+                self._ref(key, -1)
 
     def get_default_link(self, gid: str):
-        if gid not in self.default_link:
-            self.default_link[gid] = None
-
-        return self.default_link[gid]
+        return self.default_link.get(gid)
 
     def clear_default_link(self, gid, all: bool = False):
         if all:
-            for k in self.default_link:
-                self.default_link[k] = None
+            for k in list(self.default_link):
+                self._set_default(k, None)
         else:
-            self.default_link[gid] = None
+            self._set_default(gid, None)
+
+    def is_monitored(self, msg_id) -> bool:
+        """
+        Return True if message <msg_id> is a link of any (loaded) guild.
+        """
+        return msg_id in self.message_ids
 
     def link_exists(self, gid, channel_id, msg_id):
         """
         Return True if msg link with ID=<msg_id> exists in cache or default slot.
         """
-        if gid in self.links or gid in self.default_link:
-            entry = f"{channel_id}-{msg_id}"
-            try:
-                return entry in self.links[gid] or entry in self.default_link[gid]
-            except KeyError:
-                pass
-            except:
-                pass
-
-        return False
-
-    def save(self, path: str = None):
-        if path:
-            path = os.path.join(path, self.filename)
-        else:
-            path = self.filename
+        if msg_id not in self.message_ids:
+            return False
+        key = (channel_id, msg_id)
+        return key in self.links.get(gid, ()) or self.default_link.get(gid) == key
 
-        s = {"default_link": self.default_link, "links": self.links}
-
-        with open(path, "wb") as f:
-            pickle.dump(s, f, protocol=pickle.HIGHEST_PROTOCOL)
-
-    def load(self, path: str = None):
-        if path:
-            path = os.path.join(path, self.filename)
-        else:
-            path = self.filename
-
-        if not os.path.isfile(path):
-            return
+    def guild_data(self, gid) -> dict:
+        """
+        Return guild <gid>'s links as a JSON-serializable dict
+        ("<channel>-<message>" strings, newest link first).
+        """
+        default = self.default_link.get(gid)
+        return {
+            "links": [f"{c}-{m}" for c, m in reversed(self.links.get(gid, {}))],
+            "default_link": f"{default[0]}-{default[1]}" if default else None,
+        }
 
-        with open(path, "rb") as f:
-            data = pickle.load(f)
+    def set_guild_data(self, gid, data: dict):
+        """
+        Replace guild <gid>'s links with <data> (see <guild_data()>).
+        """
+        for key in self.links.pop(gid, {}):
+            self._ref(key, -1)
 
-        self.default_link = data["default_link"]
-        self.links = data["links"]
-        return self
+        links = self.links[gid] = {}
+        for entry in reversed(data.get("links") or []):
+            key = parse_link(entry)
+            if key not in links:
+                links[key] = None
+                self._ref(key, 1)
+        self._set_default(gid, parse_link(data.get("default_link")))
 
 
 class Selection(commands.Cog, GlobalCog):
     """
     Module (primarily) for Role Select and other interactive components.
+
+    Each guild's mappings + links are stored in their own JSON file
+    (<folder>/<gid>.json), loaded the first time the guild is needed and
+    only rewritten (atomically) when they changed.
     """
 
+    folder = "selection_data"
+
+    # pre-per-guild storage, migrated once on startup
+    legacy_map_fname = "role_emoji_mappings.pickle"
+    legacy_links_fname = "reaction_role_links.pickle"
+
     def __init__(self, bot):
         self.bot = bot
 
@@ -134,53 +177,120 @@ class Selection(commands.Cog, GlobalCog):
         self.rr_map = dict()
 
         self.rr_links = ReactionRoleLinks()
-        self.filename = "role_emoji_mappings.pickle"
 
-        # data loading operations
-        self.load_rr_mappings()
-        self.load_rr_links()
+        # guilds loaded from / changed since last written to <self.folder>
+        self.loaded = set()
+        self.dirty = set()
 
-    # load reaction-role <emoji:role> mappings
-    def load_rr_mappings(self, path: Optional[str] = None):
-        if path:
-            path = os.path.join(path, self.filename)
-        else:
-            path = self.filename
+        # data loading operations (guilds themselves are loaded lazily)
+        os.makedirs(self.folder, exist_ok=True)
+        self.migrate_legacy_files()
+        self.save_links_and_mappings.start()
 
-        try:
-            if not os.path.isfile(path):
-                return
+    def cog_unload(self):
+        self.save_links_and_mappings.cancel()
+        self.save_dirty()
+
+    async def cog_before_invoke(self, ctx):
+        if ctx.guild is not None:
+            self.load_guild(ctx.guild.id)
 
-            # using a temp var., so None is not assigned to
-            # <self.rr_map> if exception occurs.
-            with open(path, "rb") as f:
-                _ = pickle.load(f)
-            self.rr_map = _
+    def guild_path(self, gid) -> str:
+        return os.path.join(self.folder, f"{gid}.json")
 
+    # load a guild's reaction-role mappings + message links
+    def load_guild(self, gid: int, force: bool = False):
+        """
+        Load guild <gid>'s data from its file, once (again if <force>).
+        """
+        if gid in self.loaded and not force:
+            return
+        self.loaded.add(gid)
+
+        path = self.guild_path(gid)
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.rr_map[gid] = dict(data.get("rr_map") or {})
+            self.rr_links.set_guild_data(gid, data)
+            self.dirty.discard(gid)
         except:
             traceback.print_exc()
 
-    # save reaction-role <emoji:role> mappings
-    def save_rr_mappings(self, path: Optional[str] = None):
-        if path:
-            path = os.path.join(path, self.filename)
-        else:
-            path = self.filename
+    def mark_dirty(self, gid: int):
+        self.dirty.add(gid)
 
-        with open(path, "wb") as f:
-            pickle.dump(self.rr_map, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # save a guild's reaction-role mappings + message links
+    def save_guild(self, gid: int):
+        """
+        Write guild <gid>'s data to its file (atomic replace).
+        """
+        data = {"rr_map": self.rr_map.get(gid, {})}
+        data.update(self.rr_links.guild_data(gid))
 
-    # load reaction-role message links (IDs at least)
-    def load_rr_links(self):
+        # write a temp file next to the real one, then rename
+        fd, tmp = tempfile.mkstemp(dir=self.folder, prefix=f".{gid}-", suffix=".tmp")
         try:
-            self.rr_links.load()
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.guild_path(gid))
         except:
-            traceback.print_exc()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.dirty.discard(gid)
 
-    # save reaction-role message links (IDs at least)
-    def save_rr_links(self):
+    def save_dirty(self) -> int:
+        """
+        Write every guild changed since it was last saved.
+
+        RETURN: number of guilds written
+        """
+        written = 0
+        for gid in list(self.dirty):
+            try:
+                self.save_guild(gid)
+                written += 1
+            except:
+                traceback.print_exc()
+        return written
+
+    def migrate_legacy_files(self):
+        """
+        Split the old whole-bot pickle files into per-guild files (once).
+        """
         try:
-            self.rr_links.save()
+            gids = set()
+            if os.path.isfile(self.legacy_map_fname):
+                with open(self.legacy_map_fname, "rb") as f:
+                    self.rr_map.update(pickle.load(f))
+                gids.update(self.rr_map)
+            if os.path.isfile(self.legacy_links_fname):
+                with open(self.legacy_links_fname, "rb") as f:
+                    data = pickle.load(f)
+                for gid in set(data["links"]) | set(data["default_link"]):
+                    self.rr_links.set_guild_data(
+                        gid,
+                        {
+                            "links": data["links"].get(gid),
+                            "default_link": data["default_link"].get(gid),
+                        },
+                    )
+                    gids.add(gid)
+            if not gids:
+                return
+
+            for gid in gids:
+                self.loaded.add(gid)
+                self.save_guild(gid)
+            for fname in (self.legacy_map_fname, self.legacy_links_fname):
+                if os.path.isfile(fname):
+                    os.replace(fname, fname + ".migrated")
+            print(f"[selection] migrated {len(gids)} guild(s) to {self.folder}/")
         except:
             traceback.print_exc()
 
@@ -199,6 +309,16 @@ class Selection(commands.Cog, GlobalCog):
         if action not in {"add", "remove"}:
             return
 
+        # if the reaction wasn't on a currently registered message link, ignore it
+        # (one set lookup for most reactions; the guild's file is read on its
+        # first reaction)
+        if payload.guild_id not in self.loaded:
+            self.load_guild(payload.guild_id)
+        if not self.rr_links.link_exists(
+            payload.guild_id, payload.channel_id, payload.message_id
+        ):
+            return
+
         # ensure "member" is accessible (normally payload.member is not
         # accessible if a "RawReactionActionRemove" event occurs)
         if action == "remove":
@@ -207,21 +327,17 @@ class Selection(commands.Cog, GlobalCog):
         else:
             member = payload.member
 
-        # if the reaction wasn't on a currently registered message link, ignore it
-        if not self.rr_links.link_exists(
-            payload.guild_id, payload.channel_id, payload.message_id
-        ):
+        # transform emoji real quick (custom emojis are never mapped)
+        emoji_str = emoji_matcher.first(str(payload.emoji))
+        if emoji_str is None:
             return
 
-        # transform emoji real quick
-        emoji_str = str(list(emojis.get(f"{payload.emoji}"))[0])
-
         # otherwise, check reaction and attempt to give associated role (if any)
-        if emoji_str in self.rr_map[payload.guild_id]:
+        if emoji_str in self.rr_map.get(payload.guild_id, ()):
             guild = self.bot.get_guild(payload.guild_id)
             role_name = self.rr_map[payload.guild_id][emoji_str]
 
-            role = discord.utils.get(guild.roles, name=role_name)
+            role = self.accessor_mirror.fetch_role(role_name, str(guild.id), guild)
 
             # ensure "adminstrator" permission is not present within role
             if role.permissions.administrator:
@@ -232,11 +348,11 @@ class Selection(commands.Cog, GlobalCog):
             elif action == "remove":
                 await member.remove_roles(role)
 
-    # looping task: save links and mappings every X minutes
+    # looping task: save changed links and mappings every X minutes
     @tasks.loop(minutes=5.0)
     async def save_links_and_mappings(self):
-        self.rr_links.save()
-        self.save_rr_mappings()
+        if self.dirty:
+            self.save_dirty()
 
     # core logic for reaction-role + other user-interactive functionality
     @commands.Cog.listener()
@@ -294,7 +410,7 @@ class Selection(commands.Cog, GlobalCog):
             raise commands.CommandError("Admin role not allowed.")
 
         # properly convert emoji
-        emoji = list(emojis.get(emoji))[0]
+        emoji = emoji_matcher.first(emoji)
         if emoji is None:
             raise commands.CommandError(
                 "Supplied emoji could not be properly converted."
@@ -303,8 +419,9 @@ class Selection(commands.Cog, GlobalCog):
         # add <emoji:role> entry (within guild entry)
         self.rr_map[ctx.guild.id].update({str(emoji): role.name})
 
-        # save mapping to json file
-        self.save_rr_mappings()
+        # save mapping to the guild's json file
+        self.mark_dirty(ctx.guild.id)
+        self.save_guild(ctx.guild.id)
 
         await react_success(ctx)
 
@@ -339,7 +456,7 @@ class Selection(commands.Cog, GlobalCog):
 
         # add a field for every mapped role found
         for emoji_str in self.rr_map[ctx.guild.id]:
-            emoji = list(emojis.get(emojis.encode(emoji_str)))[0]
+            emoji = emoji_matcher.first(emojis.encode(emoji_str))
             if emoji is None:
                 raise commands.CommandError(
                     "Error while iterating through emoji-role pairs."
@@ -366,14 +483,8 @@ class Selection(commands.Cog, GlobalCog):
         !rr linkcount
         !rr lc
         """
-        if ctx.guild.id not in self.rr_links or self.rr_links[ctx.guild.id] is None:
-            return await ctx.reply("Active reaction-role links monitored: 0")
-
-        count = len(self.rr_links[ctx.guild.id])
-        if (
-            ctx.guild.id in self.rr_links.default_link
-            and self.rr_links.default_link[ctx.guild.id] is not None
-        ):
+        count = len(self.rr_links.links.get(ctx.guild.id, ()))
+        if self.rr_links.get_default_link(ctx.guild.id) is not None:
             count += 1
 
         await ctx.reply(f"Active reaction-role links monitored: {count}")
@@ -408,11 +519,12 @@ class Selection(commands.Cog, GlobalCog):
         elif N == 1:
             self.rr_links.pop_link(gid)
         elif N > 1:
-            for _ in range(min(N, len(self.rr_links[gid]))):
+            for _ in range(min(N, len(self.rr_links.links.get(gid, ())))):
                 self.rr_links.pop_link(gid)
 
         # save updated links to file
-        self.save_rr_links()
+        self.mark_dirty(gid)
+        self.save_guild(gid)
 
     @role_react.command("addlink")
     @commands.guild_only()
@@ -439,7 +551,8 @@ class Selection(commands.Cog, GlobalCog):
         self.rr_links.add_link(ctx.guild.id, link, default_set)
 
         # save updated links to file
-        self.save_rr_links()
+        self.mark_dirty(gid)
+        self.save_guild(gid)
 
         await react_success(ctx)
 
@@ -465,22 +578,13 @@ class Selection(commands.Cog, GlobalCog):
         Allow manual saving of reaction-role mappings and/or message link data.
 
         <scope>: "maps", "links" or "all"
+        (mappings and links share one file per guild, so all are saved)
         """
 
         if not RR_SCOPES.has_value(scope):
             return
 
-        scope = RR_SCOPES[scope]
-
-        if scope == RR_SCOPES.all:
-            self.save_rr_links()
-            self.save_rr_mappings()
-
-        elif scope == RR_SCOPES.links:
-            self.save_rr_links()
-
-        elif scope == RR_SCOPES.maps:
-            self.save_rr_mappings()
+        self.save_guild(ctx.guild.id)
 
         await react_success(ctx)
 
@@ -492,22 +596,13 @@ class Selection(commands.Cog, GlobalCog):
         Manually load currently saved reaction-role mappings and/or message link data.
 
         <scope>: "maps", "links" or "all"
+        (mappings and links share one file per guild, so all are loaded)
         """
 
         if not RR_SCOPES.has_value(scope):
             return
 
-        scope = RR_SCOPES[scope]
-
-        if scope == RR_SCOPES.all:
-            self.load_rr_links()
-            self.load_rr_mappings()
-
-        elif scope == RR_SCOPES.links:
-            self.load_rr_links()
-
-        elif scope == RR_SCOPES.maps:
-            self.load_rr_mappings()
+        self.load_guild(ctx.guild.id, force=True)
 
         await react_success(ctx)
 
@@ -22,13 +22,15 @@ class Statistics(commands.Cog, GlobalCog):
         accessor = self.bot.get_cog("UserDataAccessor")
 
         # increment reaction count for giver
-        accessor.update("add", 1, "total_reactions_added", None, member=payload.member)
+        await accessor.aio.update(
+            "add", 1, "total_reactions_added", None, member=payload.member
+        )
 
         # increment reaction count for receiver
         guild = self.bot.get_guild(payload.guild_id)
         channel = guild.get_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
-        accessor.update("add", 1, "total_pos_reactions", message)
+        message = await accessor.fetch_message(channel, payload.message_id)
+        await accessor.aio.update("add", 1, "total_pos_reactions", message)
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -39,7 +41,7 @@ class Statistics(commands.Cog, GlobalCog):
             return
 
         accessor = self.bot.get_cog("UserDataAccessor")
-        accessor.update("add", 1, "total_messages", message)
+        await accessor.aio.update("add", 1, "total_messages", message)
 
 
 def setup(bot):
@@ -1,6 +1,6 @@
 """
 This is VERSION 2 (V2) of TaskScheduler.
-The primary scheduler module used is "schedule.py"
+The scheduler used is utils/async_scheduler.py (asyncio, min-heap)
 """
 
 import discord
@@ -14,6 +14,8 @@ except:
     from globalcog import GlobalCog
 
 from cogs.userdata_accessor import UserDataAccessor
+from utils.async_scheduler import AsyncScheduler, CancelJob
+from utils.job_journal import JobJournal
 
 import asyncio
 import datetime
@@ -26,7 +28,6 @@ import os
 import pdb  # use 'pdb.set_trace()' wherever you want to trace code exec.
 import praw
 import random
-import schedule
 import sys
 import threading
 import time
@@ -35,64 +36,14 @@ import uuid
 import weakref
 
 
-class SafeScheduler(schedule.Scheduler):
-    """
-    Wrapper class for schedule.Scheduler.
-    Implements (slight modification to):
-        - __init__(...)
-        - _run_job(...)
-        - run_continuously(...)
-        - do(...)
-    """
-
-    def __init__(self):
-        super().__init__()
-
-    ##    def do(self, job_func, *args, **kwargs):
-    ##        '''
-    ##        Overwrites what base Scheduler.do() does.
-    ##        '''
-    ##        self.job_func = functools.partialmethod(job_func, *args, **kwargs)
-    ##        try:
-    ##            functools.update_wrapper(self.job_func, job_func)
-    ##            pass
-    ##        except AttributeError:
-    ##            # job_funcs already wrapped by functools.partial won't have
-    ##            # __name__, __module__ or __doc__ and the update_wrapper()
-    ##            # call will fail.
-    ##            pass
-    ##        self._schedule_next_run()
-    ##        self.scheduler.jobs.append(self)
-    ##        return self
-
-    def _run_job(self, job):
-        try:
-            super()._run_job(job)
-        except:
-            traceback.print_exc()
-            job.last_run = datetime.datetime.now()
-            job._schedule_next_run()
-
-    def run_continuously(self, interval=1):
-        """
-        Method invokes superclass' (Schedule(r)) run_continuously() method
-        """
-        try:
-            super().run_continuously(interval)
-        except Exception:
-            traceback.print_exc()
-
-
 class TaskScheduler(commands.Cog, GlobalCog):
     """
     Module dedicated to scheduling things (like reminders).
 
-    Designed to be "thread-safe" in case of execution errors!
+    Jobs run on the bot's event loop (see utils/async_scheduler.py); a job
+    that raises is reported and rescheduled.
     """
 
-    # References:
-    #   - gist.github.com/mplewis/8483f1c24f2d6259aef6 (SafeScheduler)
-
     _self = None
 
     DAYS_OF_WEEK = (
@@ -109,33 +60,30 @@ class TaskScheduler(commands.Cog, GlobalCog):
     # MAXIMUM NUMBER OF REMINDERS ALLOWED PER USER
     REMINDER_LIMIT_PER_USER = 4
 
+    # job store (append-only journal); the old whole-dict JSON file is
+    # imported once if the journal doesn't exist yet
+    JOURNAL_FPATH = "jobs_journal.jsonl"
+    LEGACY_JOBS_FPATH = "json_jobs.json"
+
     def __init__(self, bot):
         self.bot = bot
-        self.ts = SafeScheduler()  # ts = "taskscheduler"
+        self.ts = AsyncScheduler(bot.loop)  # ts = "taskscheduler"
         self.__class__._self = self
 
-        # load any recurring tasks listed in given file
-        # tracks curr. jobs while bot is online
-        self.job_dict = json.loads("{}")
-        job_fpath = "json_jobs.json"
-        self.load_jobs(job_fpath)
-
-        # get extra event loop (~thread) specifically for scheduler
-        # self.loop = asyncio.get_event_loop()???
-
-        """
-        This is a threading.Event object (continuous_run_obj).
-        "run_continuously(interval)" puts Scheduler instance
-        in another thread of control (non-main thread), so it
-        does not conflict with <discord.py>'s async functionality.
+        # load any recurring tasks listed in the job journal
+        # tracks curr. jobs while bot is online (<job_dict> is <journal.jobs>)
+        self.journal = JobJournal(
+            self.JOURNAL_FPATH, legacy_path=self.LEGACY_JOBS_FPATH
+        )
+        self.job_dict = {}
+        self.load_jobs()
 
-        DIRECTIONS:
-            Use this object's 4 methods to modify flag or wait();
-            Ref: docs.python.org/3.7/library/threading.html#threading.Event
+        # runner task sleeps until the earliest job is due (no polling)
+        self.ts.start()
 
-            - is_set(), set(), clear(), wait(timeout=None)
-        """
-        self.ts.run_continuously(interval=0.5)
+    def cog_unload(self):
+        self.ts.stop()
+        self.journal.close()
 
     async def react_success(self, ctx):
         """
@@ -149,31 +97,26 @@ class TaskScheduler(commands.Cog, GlobalCog):
         """
         await ctx.message.add_reaction("\N{CROSS MARK}")
 
-    def load_jobs(self, fpath="json_jobs.json"):
+    def load_jobs(self):
         """
-        This will load all user and non-user jobs from a file.
+        This will load all user and non-user jobs from the job journal.
         ALL periodic/recurrent jobs are stored here, regardless of server.
         """
         try:
             # load in hard-coded (non-user) jobs first
             self.load_nonuser_jobs()
 
-            # > load <f> into JSON object;
-            # create jobfile with self.save_jobs()
-            if not os.path.exists(fpath):
-                if self.save_jobs() < 0 and not os.path.exists(fpath):
-                    raise RuntimeError()
-            with open(fpath, "r") as f:
-                try:
-                    self.job_dict = json.load(f)
-                except:
-                    traceback.print_exc()
-                    self.job_dict = {}
+            # replay the journal into <job_dict>
+            try:
+                self.job_dict = self.journal.load()
+            except:
+                traceback.print_exc()
+                self.job_dict = self.journal.jobs = {}
 
             # statistics -- report ratio of jobs succcessfully loaded
             print("now parsing jobs file.")
             hit, miss = 0, 0
-            for job_id in self.job_dict.keys():
+            for job_id in list(self.job_dict.keys()):
                 result = self.load_job(job_id)
                 if result:
                     hit += 1
@@ -197,7 +140,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
         Schedule and load one (1) job (via ID), into self.job_dict.
         ASSUME: the job whose id is <job_id> has not been scheduled yet.
 
-        RETURN: scheduler.Job object that was scheduled
+        RETURN: async_scheduler.Job object that was scheduled
         """
         try:
             # <job_dict> is JSON object, not a dict()
@@ -205,7 +148,10 @@ class TaskScheduler(commands.Cog, GlobalCog):
                 job_dict = self.job_dict
             info = job_dict[job_id]
             if info["runs_left"] <= 0:
-                job_dict.pop(job_id, None)
+                if job_dict is self.job_dict:
+                    self.journal.delete(job_id)
+                else:
+                    job_dict.pop(job_id, None)
                 return -2
 
             # assemble job components/variables
@@ -223,7 +169,15 @@ class TaskScheduler(commands.Cog, GlobalCog):
             j = self.parse_sched_components(components)
 
             # change next_run date + other relevant job attrs. if necessary
-            j = self.parse_next_run_logic(j, next_run, important)
+            # (None = job expired or unparseable; it's already scheduled, so
+            # cancel it and drop it from the journal)
+            if self.parse_next_run_logic(j, next_run, important) is None:
+                self.ts.cancel_job(j)
+                if job_dict is self.job_dict:
+                    self.journal.delete(job_id)
+                else:
+                    job_dict.pop(job_id, None)
+                return None
 
             # save jobs status to file and to job_dict
             self.store_job(j, job_id, info["runs_left"], important)
@@ -257,14 +211,14 @@ class TaskScheduler(commands.Cog, GlobalCog):
         Includes logic for chaning a job's <next_run> attribute in case
         the bot needs to recalculate when the next run should be,
         depending on the command and other contextual information.
-        ASSUME: job.tags[-1] is the job ID
+        ASSUME: one of job.tags is the job ID (a key of self.job_dict)
 
         RETURN: the job that was changed
 
         PARAMS
         ------
             job:
-                can be string or scheduler.Job; <job_fmt> should specify
+                can be string or async_scheduler.Job; <job_fmt> should specify
             next_run:
                 string object representing date of next time to run.
                 gets converted to datetime.datetime object
@@ -290,7 +244,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
                 if isinstance(next_run, str):
                     next_run = datetime.datetime.strptime(next_run, "%Y-%m-%d %H:%M:%S")
 
-            job_id = list(job.tags)[-1]
+            job_id = self.job_id_of(job)
 
             datefmt1 = "%Y-%m-%d %H:%M:%S"
             now = datetime.datetime.now()
@@ -299,8 +253,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
 
             # CASE 0: if NOT important <i> and 4+ hours passed, remove job
             if not i and hrs >= 4:
-                self.job_dict.pop(job_id, None)
-                self.save_jobs()
+                self.journal.delete(job_id)
                 return None
 
             # CASE 1: if delta at least 30 seconds early, reschedule
@@ -310,6 +263,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
                 return job
 
             # CASE 2: if delta < 8 hrs, task is late, but not too late...
+            a = 0
             if hrs < 8:
                 if self.ts.next_run is not None:
                     a = self.ts.idle_seconds
@@ -325,16 +279,18 @@ class TaskScheduler(commands.Cog, GlobalCog):
                 job.next_run = newtime
                 return job
 
-            # CASE 3: if delta > 8 hrs, task is WAY too late.
+            # CASE 3: if delta >= 8 hrs, task is WAY too late.
             # schedule for today, but same time
-            if hrs > 8:
+            if hrs >= 8:
                 if self.ts.next_run is not None:
                     a = divmod(self.ts.idle_seconds, 60)[0]
                 tremain = divmod(delta.total_seconds(), 60)[0]
 
                 # minimum 1 minute separation between tasks
                 x = max(tremain, a + 1)
-                job.next_run = next_run.replace(day=datetime.date.today().day)
+                job.next_run = datetime.datetime.combine(
+                    datetime.date.today(), next_run.time()
+                )
                 return job
 
         except:
@@ -370,23 +326,19 @@ class TaskScheduler(commands.Cog, GlobalCog):
             traceback.print_exc()
             return None
 
-    def save_jobs(self, fpath="json_jobs.json"):
+    def save_jobs(self):
         """
-        Save the current info held in <self.job_dict> to file.
-        ASSUME: <store_new_job()> was already called before this.
+        Compact the job journal (rewrite it with only the jobs currently in
+        <self.job_dict>). Single changes are journaled as they happen
+        (see store_job(), remove_job()), so this is never required.
 
         RETURN: 0 (success),  -1 (error)
         """
-        if self.job_dict is not None:
-            try:
-                # dump job_dict content into 'json_jobs.json'
-                with open(fpath, "w") as jobs_outfile:
-                    json.dump(self.job_dict, jobs_outfile, indent=4)
-                return 0
-            except FileNotFoundError:
-                print("error: job file not found.")
-            except:
-                traceback.print_exc()
+        try:
+            self.journal.compact()
+            return 0
+        except:
+            traceback.print_exc()
         return -1
 
     def store_job(self, job, job_id=None, runs_left=1, i=False):
@@ -399,7 +351,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
         PARAMS
         ------
             job:
-                scheduler.Job object
+                async_scheduler.Job object
             job_id:
                 if None, an ID will be randomly generated
             runs_left:
@@ -409,7 +361,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
             if self.job_dict is None:
                 raise RuntimeError()
             if job_id is None:
-                job_id = uuid.uuid4()
+                job_id = str(uuid.uuid4())
 
             # converting at_time to string
             at_time = None
@@ -421,8 +373,8 @@ class TaskScheduler(commands.Cog, GlobalCog):
             if job.next_run is not None:
                 next_run = job.next_run.strftime("%Y-%m-%d %H:%M:%S")
 
-            # storing data as new entry in self.job_dict
-            self.job_dict[job_id] = {
+            # storing data as new entry in self.job_dict (+ the journal)
+            info = {
                 "i": i,
                 "runs_left": runs_left,  # default is 1
                 "interval": job.interval,
@@ -433,12 +385,8 @@ class TaskScheduler(commands.Cog, GlobalCog):
                 "next_run": next_run,
                 "tags": list(job.tags),
             }
-
-            # now update JSON dict with new job data entry
-            success = self.save_jobs()
-            if success == 0:
-                return self.job_dict
-            return None
+            self.journal.put(job_id, info)
+            return self.job_dict
 
         except RuntimeError:
             raise RuntimeError("cannot store job because<job_dict> is NoneType.")
@@ -446,13 +394,12 @@ class TaskScheduler(commands.Cog, GlobalCog):
             traceback.print_exc()
             return None
 
-    def remove_job(self, job, save=True):
+    def remove_job(self, job):
         try:
-            job_id = list(job.tags)[0]
+            job_id = self.job_id_of(job)
             self.ts.cancel_job(job)
-            self.job_dict.pop(job_id, None)
-            if save:
-                self.save_jobs()
+            if job_id is not None:
+                self.journal.delete(job_id)
         except:
             traceback.print_exc()
 
@@ -583,7 +530,7 @@ class TaskScheduler(commands.Cog, GlobalCog):
         THIS IS USUALLY CALLED BY an async TaskScheduler method that
         works directly/indirectly with discord.py.
 
-        RETURN: scheduler.Job
+        RETURN: async_scheduler.Job
 
         params
         ------
@@ -601,44 +548,32 @@ class TaskScheduler(commands.Cog, GlobalCog):
             if not sched_date:
                 return -1
 
-            # CASE HANDLING: <sched_date> = a day of the week
-            d = ""
-            obj = self.ts.every()
+            # CASE HANDLING: <sched_date> = a day of the week (weekly)
             if sched_date in self.DAYS_OF_WEEK:
-                d = sched_date
-                if d == "monday":
-                    obj = obj.monday
-                elif d == "tuesday":
-                    obj = obj.tuesday
-                elif d == "wednesday":
-                    obj = obj.wednesday
-                elif d == "thursday":
-                    obj = obj.thursday
-                elif d == "friday":
-                    obj = obj.friday
-                elif d == "saturday":
-                    obj = obj.saturday
-                elif d == "sunday":
-                    obj = obj.sunday
-                else:
-                    return -1
-
-                # obj.do(self.do_func, is_async, func,
-                #       *args, **kwargs).tag(*taglist, 'run_once')
-                # return 0
-                return obj.do(self.do_func, is_async, func, *args, **kwargs).tag(
-                    *taglist
-                )
-
-            # CASE HANDLING: <sched_date> = specific time (HMS format)
+                obj = getattr(self.ts.every(), sched_date)
+                return obj.do(
+                    TaskScheduler.do_func,
+                    None,
+                    is_async,
+                    func,
+                    *args,
+                    skip_store=True,
+                    **kwargs
+                ).tag(*taglist)
+
+            # CASE HANDLING: <sched_date> = seconds from now (one-shot)
             elif sched_date > 0:
-                # self.ts.every(sched_date).seconds.do(
-                #    self.do_func, is_async, func,
-                #    *args, **kwargs).tag(*taglist, 'run_once')
-                # return 0
                 return (
-                    self.ts.every(sched_date)
-                    .seconds.do(self.do_func, is_async, func, *args, **kwargs)
+                    self.ts.once(sched_date)
+                    .do(
+                        TaskScheduler.do_func,
+                        None,
+                        is_async,
+                        func,
+                        *args,
+                        skip_store=True,
+                        **kwargs
+                    )
                     .tag(*taglist)
                 )
 
@@ -650,30 +585,31 @@ class TaskScheduler(commands.Cog, GlobalCog):
 
     def find_jobs(self, tags, ref=False):
         """
-        Return a list of task/job IDs associated with a <gid> and <uid>.
-        The tasks/jobs are found by look at all active jobs' tags.
+        Return a list of task/job IDs that have all of <tags> (e.g. the
+        <gid>+<uid> hash of a user's reminders).
+        The jobs are found via the scheduler's tag index, so this is
+        O(jobs with the rarest tag), not O(all jobs).
 
         If <ref> is True, return job references/objects instead.
         """
-        tags = set(tags)
-        results = []
-        append = results.append
-        is_subset = tags.issubset
+        jobs = self.ts.find(tags)
 
         # branch 1: returning job objects/references
         if ref:
-            for job in self.ts.jobs:
-                if is_subset(job.tags):
-                    append(job)
-            return results
+            return jobs
 
         # branch 2: returning job IDs instead
-        info = None
-        for taskID in self.job_dict.keys():
-            info = self.job_dict[taskID]
-            if is_subset(set(info["tags"])):
-                append(taskID)
-        return results
+        job_ids = (self.job_id_of(job) for job in jobs)
+        return [job_id for job_id in job_ids if job_id is not None]
+
+    def job_id_of(self, job):
+        """
+        Return the stored job ID of <job> (one of its tags), or None.
+        """
+        for tag in job.tags:
+            if tag in self.job_dict:
+                return tag
+        return None
 
     def timed2datetime(self, time_str: str, time_format=0):
         """
@@ -776,59 +712,54 @@ class TaskScheduler(commands.Cog, GlobalCog):
             traceback.print_exc()
             return None
 
-    def do_func(job_id, is_async, func, *args, skip_store=False, **kwargs):
+    async def do_func(job_id, is_async, func, *args, skip_store=False, **kwargs):
         """
         Mediator to execute a function depending on whether it's async or not
+        (runs on the bot's event loop, so <func> is awaited directly)
+
+        Errors propagate to the scheduler (counted in <AsyncScheduler.errors>).
         """
 
-        try:
-            self = getattr(TaskScheduler, "_self")
+        self = getattr(TaskScheduler, "_self")
 
-            # CASE 0: func does NOT want to be stored/backed up
-            if skip_store:
-                # branch 1: target func <func> is async
-                if is_async:
-                    fut = asyncio.run_coroutine_threadsafe(
-                        func(*args, **kwargs), self.bot.loop
-                    )
-                    return fut.result()
-                else:
-                    return func(*args, **kwargs)
+        # CASE 0: func does NOT want to be stored/backed up
+        if skip_store:
+            # branch 1: target func <func> is async
+            if is_async:
+                return await func(*args, **kwargs)
+            else:
+                return func(*args, **kwargs)
 
-            # CASE 1: (DEFAULT)
-            runs_left = self.job_dict[job_id]["runs_left"]
+        # CASE 1: (DEFAULT)
+        # job was removed from the journal (cleared, expired ...); stop it
+        if job_id not in self.job_dict:
+            return CancelJob
+        runs_left = self.job_dict[job_id]["runs_left"]
 
-            if runs_left <= 0:
-                job = self.find_jobs([job_id], ref=True)
-                print("do_func -> found jobs:\n", job)
-                self.remove_job(job[0])
-                return 0
+        if runs_left <= 0:
+            self.journal.delete(job_id)
+            return CancelJob
 
-            x = None
-            # branch 1: target func <func> is async
-            if is_async:
-                fut = asyncio.run_coroutine_threadsafe(
-                    func(*args, **kwargs), self.bot.loop
-                )
+        x = None
+        # branch 1: target func <func> is async
+        if is_async:
+            x = await func(*args, **kwargs)
 
-                # Future.result() executes registered function
-                x = fut.result()
+        # branch 2: target func is not async
+        else:
+            x = func(*args, **kwargs)
 
-            # branch 2: target func is not async
-            else:
-                x = func(*args, **kwargs)
-
-            # final step, save current state of current jobs
-            self.job_dict[job_id]["runs_left"] -= 1
-            if runs_left - 1 <= 0:
-                self.job_dict.pop(job_id, None)
-                self.save_jobs()
-                return schedule.CancelJob
-            self.save_jobs()
-            return x
+        # final step, journal the job's new state (unless it was removed
+        # while <func> ran)
+        if job_id not in self.job_dict:
+            return CancelJob
+        self.job_dict[job_id]["runs_left"] -= 1
+        if runs_left - 1 <= 0:
+            self.journal.delete(job_id)
+            return CancelJob
+        self.journal.put(job_id, self.job_dict[job_id])
+        return x
 
-        except:
-            traceback.print_exc()
 
     async def reminder_func(userid, message):
         """
@@ -899,13 +830,13 @@ class TaskScheduler(commands.Cog, GlobalCog):
             taglist = [TaskScheduler.hash_task_id(taglist)]
 
             # make sure user hasn't reached their reminder limit
-            reminders_found = self.find_jobs(taglist)
-            if len(reminders_found) > self.REMINDER_LIMIT_PER_USER:
+            reminders_found = self.ts.count(taglist[0])
+            if reminders_found >= self.REMINDER_LIMIT_PER_USER:
                 msg = "Sorry! I can only remember `{}` reminders per user..."
                 return await ctx.send(msg.format(self.REMINDER_LIMIT_PER_USER))
 
             # add another 'tag' to indicate this is the "Nth" reminder
-            n = str(1 + len(reminders_found))
+            n = str(1 + reminders_found)
             taglist.append(n)
 
             # sched. date and msg. length must be valid
@@ -1010,13 +941,12 @@ class TaskScheduler(commands.Cog, GlobalCog):
         matches = self.find_jobs([userhash], ref=True)
         if len(matches) == 0:
             await self.react_fail(ctx)
-            await ctx.message.delete(delay=3.0)
+            return await ctx.message.delete(delay=3.0)
 
-        # remove all jobs, but don't run 'save_jobs' until the end
+        # remove all jobs (one journal line each)
         remove_job = self.remove_job
         for m in matches:
-            remove_job(m, save=False)
-        self.save_jobs()
+            remove_job(m)
         await self.react_success(ctx)
         await ctx.message.delete(delay=3.0)
 
@@ -5,11 +5,11 @@ from django.core.exceptions import ValidationError
 import argparse
 import datetime
 from datetime import timezone
+import functools
 import os
 import re
 import requests
 import sqlite3
-import subprocess
 import sys
 import traceback
 import typing
@@ -17,7 +17,8 @@ from typing import Optional
 from constants.values import UB_ID
 from cogs.globalcog import GlobalCog
 from utils.async_utils import react_success, react_fail
-from utils.sync_utils import ub_get, ub_put, ub_patch
+from utils.log_reader import LogReader
+from utils.sqlite_pool import apply_pragmas
 import uuid
 
 
@@ -47,6 +48,17 @@ class Transactions(commands.Cog, GlobalCog):
         },
     }
 
+    # text transaction log (one tab-separated line per transaction, in
+    # <folder_path>), mirrors the DB's "Transactions" table
+    logfile_fmt = "{}_transactions.log"
+    log_fields = ("id", "date", "user", "resource_id", "amount")
+    logfile_header = "\t".join(log_fields)
+
+    # text log fields with postings (see <self.search_log()>), and the most
+    # a filter without postings may read of a log
+    log_keys = ("user", "resource_id")
+    log_max_scan_bytes = 64 * 1024 * 1024
+
     # [regex pattern] detect a successful purchase
     purchase_pattern = "(.*You have bought \d+ .+ for)"
 
@@ -69,6 +81,7 @@ class Transactions(commands.Cog, GlobalCog):
     def __init__(self, bot):
         self.bot = bot
         self.transactionfile_fmt = "{}_logs_assets.sqlite3"
+        self.logs = {}  # gid -> LogReader (text transaction logs)
 
         # pre-compile parsers for event listeners
         self.purchase_parser = re.compile(self.purchase_pattern)
@@ -81,70 +94,80 @@ class Transactions(commands.Cog, GlobalCog):
 
         self.create_logfolder()
 
-    def head(self, f, n):
+    def get_log(self, gid) -> LogReader:
         """
-        Helper method to RETURN the FIRST <n> lines from a text (log) file.
-
-        [resource(s)]:
-        stackoverflow.com/questions/1767513
+        Return the (cached) reader of guild <gid>'s text transaction log.
         """
-        with open(f) as logfile:
-            entries = []
-            append = entries.append
-            try:
-                for _ in range(n):
-                    entry = next(logfile)
-                    append(entry)
-            except StopIteration:
-                pass
-            return [self.logfile_header] + entries
+        gid = str(gid)
+        log = self.logs.get(gid)
+        if log is None:
+            path = os.path.join(self.folder_path, self.logfile_fmt.format(gid))
+            keys = {field: self.log_key(field) for field in self.log_keys}
+            log = self.logs[gid] = LogReader(
+                path, keys=keys, max_scan_bytes=self.log_max_scan_bytes
+            )
+        return log
 
-    def tail(self, f, n, offset=0):
+    def log_key(self, field: str):
         """
-        Helper method to RETURN the LAST <n> lines from a text (log) file.
-
-        [resource(s)]:
-        stackoverflow.com/questions/136168 (subprocess tail method)
-        stackoverflow.com/questions/2301789 (generator seek method)
+        Return the key function of text log field <field> for the log's
+        postings (a user is posted under its ID, not "<id> (<name>)").
         """
+        i = self.log_fields.index(field)
 
-        # TODO: REWRITE THIS TO WORK LIKE "HEAD" WORKS
-        # with open(f, "rb") as logfile:
+        def key(line):
+            parts = line.split("\t")
+            if len(parts) <= i:
+                return None
+            if field == "user":
+                return parts[i].split(" (", 1)[0]
+            return parts[i]
 
-        # buf_size = 8192
-        # entry = None
+        return key
 
-        # logfile.seek(0, os.SEEK_END)            # move file cursor to EOF
-        # fsize = remaining_size = logfile.tell() # init. remaining file bytes to parse
+    def cog_unload(self):
+        for log in self.logs.values():
+            log.close()
 
-        # # TODO: PROVIDE EXPLANATION OF FILE SEEK/BUFFER OPERATION LOGIC
-        # while remaining_size > 0:
+    def head(self, gid, n, offset=0):
+        """
+        Helper method to RETURN the FIRST <n> lines from a guild's transaction
+        log (after skipping <offset> lines), with <self.logfile_header> first.
+        """
+        return [self.logfile_header] + self.get_log(gid).head(n, offset)
 
-        # offset = min(fsize, offset + buf_size)
-        # logfile.seek(fsize - offset)
-        # buf = logfile.read(min(remaining_size, buf_size))
-        # remaining_size -= buf_size
-        # lines = buf.split("\n")
+    def tail(self, gid, n, offset=0):
+        """
+        Helper method to RETURN the LAST <n> lines from a guild's transaction
+        log (skipping the newest <offset> lines), with <self.logfile_header>
+        first.
 
-        # if entry is not None:
-        # if buf[-1] != "\n":
-        # lines[-1] += entry
-        # else:
-        # yield entry
-        # entry = lines[0]
-        # for i in range(len(lines) - 1, 0, -1):
-        # if lines[i]:
-        # yield lines[i]
+        Reads only the requested lines via the log's offset index (see
+        utils/log_reader.py) instead of forking "tail".
+        """
+        return [self.logfile_header] + self.get_log(gid).tail(n, offset)
 
-        # if entry is not None:
-        # yield entry
+    def search_log(self, gid, field: str, value: str, limit=10, offset=0):
+        """
+        Return up to <limit> transaction log lines (newest first) whose
+        <field> ("user" or "resource_id") matches <value>.
+
+        A user matches by ID or by the full "<id> (<name>)" value.
+
+        Served from the log's postings (see utils/log_reader.py), so a rare
+        or unknown value costs as little as a common one. Blocking: call it
+        from an executor on the event loop.
+        """
+        i = self.log_fields.index(field)
+        key = value.split(" (", 1)[0] if field == "user" else value
+
+        def match(line):
+            # full "<id> (<name>)" value: the name must match as well
+            return line.split("\t")[i] == value
 
-        proc = subprocess.Popen(
-            ["tail", "-n" + str(n + offset), f], stdout=subprocess.PIPE
+        return self.get_log(gid).find(
+            field, key, limit, offset, match if key != value else None
         )
-        lines = proc.stdout.readlines()
-        lines = [str(line, "utf-8") for line in lines]
-        return [self.logfile_header] + lines
 
     def create_logfolder(self):
         """
@@ -176,7 +199,7 @@ class Transactions(commands.Cog, GlobalCog):
         if not os.path.isfile(newpath):
             print("[create_log_db] DB file not found. proceeding with DB creation")
 
-            with sql3_connect(newpath) as conn:
+            with apply_pragmas(sql3_connect(newpath)) as conn:
 
                 cur = conn.cursor()
 
@@ -210,11 +233,12 @@ class Transactions(commands.Cog, GlobalCog):
                 print("[create_log_db] finished creating tables")
 
         print("[create_log_db] DB was found, returning connection now.")
-        return sql3_connect(newpath)
+        return apply_pragmas(sql3_connect(newpath))
 
     def connect(self, gid: str):
         """
-        Return sqlite3 connection to the associated guild's <gid> database.
+        Return sqlite3 connection to the associated guild's <gid> database
+        (WAL mode + tuned pragmas, see utils/sqlite_pool.py).
         """
         gid = str(gid)
 
@@ -226,7 +250,7 @@ class Transactions(commands.Cog, GlobalCog):
             print("[self.connect]: finished creating new DB")
 
         # print("[self.connect]: existing DB found, returning connection.")
-        return sql3_connect(db_path)
+        return apply_pragmas(sql3_connect(db_path))
 
     def add_log_entry(
         self,
@@ -234,6 +258,7 @@ class Transactions(commands.Cog, GlobalCog):
         user: discord.User,
         resource_id: str,
         amount: float,
+        id_: Optional[str] = None,
     ):
         """
         Primary method of adding a transaction log entry.
@@ -243,23 +268,28 @@ class Transactions(commands.Cog, GlobalCog):
         Attribs "date" and "id" are generated within this method if no arguments given.
 
         Order of information must match order of attribs for the associated table in <self.table_info>
+
+        NOTE: blocking (the text log's first append may index and post the whole
+        log); call it off the event loop
         """
 
         try:
             date = datetime.datetime.now(timezone.utc)
             date = date.strftime("%Y:%m:%d-%H:%M:%S-%Z")
-            id_ = uuid.uuid4()
+            id_ = str(id_ or uuid.uuid4())
+            row = (id_, date, f"{user.id} ({user.name})", resource_id, amount)
 
             with self.connect(gid) as conn:
 
                 # write log entry
                 cmd = "INSERT INTO Transactions VALUES (?,?,?,?,?)"
                 cur = conn.cursor()
-                cur.execute(
-                    cmd, (id_, date, f"{user.id} ({user.name})", resource_id, amount)
-                )
+                cur.execute(cmd, row)
                 conn.commit()
 
+            # ... and to the text log (see <self.tail()>, "shop log")
+            self.get_log(gid).append("\t".join(str(v).replace("\t", " ") for v in row))
+
         except:
             traceback.print_exc()
 
@@ -603,26 +633,43 @@ class Transactions(commands.Cog, GlobalCog):
         )
         sent = await customer.send(embed=purchase_embed)
 
-        # TODO: IMPLEMENT THE AUDIT SECTION TO ACCOUNT FOR "ROUTE 2"
-        #
-        # - may need to do a lookup in K/Y's DB? not sure
-        #
         # add audit log entry if resource successfully sent
-        # if sent:
-        #
-        #    # get/parse resource cost
-        #    amt_start = e_desc.find("for ") + 4
-        #    amt_start = e_desc.find(" ", amt_start) + 1
-        #    amt_end = e_desc.find("!")
-        #    amt_str = e_desc[amt_start:amt_end]
-        #
-        #    self.add_log_entry(
-        #        str(message.guild.id),
-        #        customer,
-        #        resource_id,
-        #        float(amt_str),
-        #        id_=trans_id
-        #    )
+        if sent:
+
+            # TODO: "ROUTE 2" replies carry no cost (may need a lookup in
+            # K/Y's DB?); those are logged with amount 0 for now
+            amount = self.parse_purchase_amount(e_desc)
+
+            # blocking DB + text log write: run it off the event loop
+            await self.bot.loop.run_in_executor(
+                None,
+                functools.partial(
+                    self.add_log_entry,
+                    str(message.guild.id),
+                    customer,
+                    resource_id,
+                    amount,
+                    id_=trans_id,
+                ),
+            )
+
+    def parse_purchase_amount(self, e_desc: str) -> float:
+        """
+        Return the cost in UB purchase reply <e_desc> ("... for <cost>!"),
+        or 0.0 if it has none.
+        """
+        amt_start = e_desc.find("for ")
+        if amt_start == -1:
+            return 0.0
+
+        # skip "for " and the currency symbol
+        amt_start = e_desc.find(" ", amt_start + 4) + 1
+        amt_end = e_desc.find("!", amt_start)
+        amt_str = e_desc[amt_start:amt_end].replace(",", "").strip()
+        try:
+            return float(amt_str)
+        except ValueError:
+            return 0.0
 
     @commands.group("shop")
     @commands.has_permissions(administrator=True)
@@ -852,6 +899,57 @@ class Transactions(commands.Cog, GlobalCog):
 
             await ctx.reply(embed=e)
 
+    @shop.command("log")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def shop_log(
+        self, ctx, n: int = 10, page: int = 0, filter_: Optional[str] = None
+    ):
+        """
+        [diagnostic tool]
+
+        View the newest transaction log entries, <n> per page (max 25).
+
+        Filter by user (ID) or resource (ID) with "user=<id>" or
+        "resource=<id>".
+
+        Usage:
+        !shop log
+        !shop log 20
+        !shop log 10 2
+        !shop log 10 0 user=123456789
+        !shop log 10 0 resource=DRW-039
+        """
+        n = max(1, min(n, 25))
+        page = max(0, page)
+
+        # log reads block (the first one may index a large log): run them
+        # off the event loop
+        if filter_ is None:
+            read = functools.partial(self.get_log(ctx.guild.id).page, page, n)
+        else:
+            field, _, value = filter_.partition("=")
+            field = {"user": "user", "resource": "resource_id"}.get(field)
+            if field is None or not value:
+                raise commands.CommandError(
+                    "Bad filter. Use `user=<id>` or `resource=<id>`."
+                )
+            read = functools.partial(
+                self.search_log, ctx.guild.id, field, value, limit=n, offset=page * n
+            )
+        entries = await self.bot.loop.run_in_executor(None, read)
+
+        if not entries:
+            return await ctx.reply("No transaction log entries found.")
+
+        table = "\n".join([self.logfile_header] + entries)
+        e = discord.Embed(
+            title=f"Transaction Log (page {page}):",
+            description=f"```{table[:4000]}```",
+            colour=discord.Colour.dark_grey(),
+        )
+        await ctx.reply(embed=e)
+
 
 def setup(bot):
     bot.add_cog(Transactions(bot))
@@ -28,14 +28,28 @@ import argparse
 import asyncio
 import datetime
 from datetime import timezone
+import itertools
 import json
 import math
 import numbers
 import os
-import shutil
 import cogs.point_distributor as points
 import sqlite3
-from utils.sync_utils import ub_get, ub_put, ub_patch
+from utils.activity_log import ActivityLog
+from utils.clearance_cache import MISS, ClearanceCache
+from utils.award_queue import AwardQueue
+from utils.counter_buffer import CounterBuffer
+from utils.db_executor import DBExecutor
+from utils.delayed_queue import DelayedQueue
+from utils.loop_monitor import LoopLagMonitor
+from utils.message_cache import MessageCache
+from utils.message_features import MessageAnalyzer
+from utils.sqlite_pool import DEFAULT_PRAGMAS, SQLitePool, apply_pragmas
+from utils.user_index import UserIndex
+from utils.zone_index import ZoneIndex
+from utils.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from utils.role_index import RoleIndex, RoleIndexes
+from utils.ub_client import UBClient
 import sys
 import time
 import traceback
@@ -52,6 +66,135 @@ os_dirname = os.path.dirname
 makedirs = os.makedirs
 
 
+class AsyncUserDataAccessor:
+    """
+    Awaitable facade over <UserDataAccessor> (available as <accessor.aio>).
+
+    Blocking DB work runs on a <DBExecutor>: writes on a single writer
+    thread (in submission order), reads on a per-guild reader pool, so
+    listeners and commands no longer stall the gateway event loop.
+
+    Use <write()>/<read()> to offload any other accessor call.
+    """
+
+    def __init__(self, accessor, readers_per_guild: int = 2):
+        self.acc = accessor
+        self.executor = DBExecutor(readers_per_guild)
+
+    async def write(self, fn, *args, **kwargs):
+        return await self.executor.write(fn, *args, **kwargs)
+
+    def submit_write(self, fn, *args, **kwargs):
+        return self.executor.submit_write(fn, *args, **kwargs)
+
+    async def read(self, gid: str, fn, *args, **kwargs):
+        return await self.executor.read(gid, fn, *args, **kwargs)
+
+    """ ---------------------------- writes ---------------------------- """
+
+    async def check_user(self, gid: str, uid: str):
+        # known users are answered from memory; skip the thread hop
+        index = self.acc.known_users.get(gid)
+        if index is not None and uid in index:
+            return
+        await self.write(self.acc.check_user, gid, uid)
+
+    async def ADD_USER(self, gid: str, uid: str):
+        await self.write(self.acc.ADD_USER, gid, uid)
+
+    async def bulk_add_users(self, gid: str, members, **kwargs) -> int:
+        return await self.write(self.acc.bulk_add_users, gid, members, **kwargs)
+
+    async def DELETE_USER(self, gid: str, uid: str):
+        return await self.write(self.acc.DELETE_USER, gid, uid)
+
+    async def update(self, *args, **kwargs):
+        await self.write(self.acc.update, *args, **kwargs)
+
+    async def add_user_to_unverified(self, gid: str, uid: str):
+        await self.write(self.acc.add_user_to_unverified, gid, uid)
+
+    async def remove_user_from_unverified(self, gid: str, uid: str, **kwargs):
+        await self.write(self.acc.remove_user_from_unverified, gid, uid, **kwargs)
+
+    async def check_went_live_interval(self, member, **kwargs):
+        return await self.write(self.acc.check_went_live_interval, member, **kwargs)
+
+    # zone changes run on the writer thread, in order with the zone reloads
+    async def set_designation(self, gid: str, zone_name: str, channel_id, **kwargs):
+        await self.write(self.acc.set_designation, gid, zone_name, channel_id, **kwargs)
+
+    async def remove_designation(self, gid: str, zone_name: str, channel_id, **kwargs):
+        await self.write(
+            self.acc.remove_designation, gid, zone_name, channel_id, **kwargs
+        )
+
+    async def add_designation_category(self, gid: str, zone_name: str, **kwargs):
+        await self.write(self.acc.add_designation_category, gid, zone_name, **kwargs)
+
+    async def load_zone_entries(self, gid: str, **kwargs):
+        await self.write(self.acc.load_zone_entries, gid, **kwargs)
+
+    """ ---------------------------- reads ----------------------------- """
+
+    async def get_attr(self, attr: str, gid: str, uid: str, table="udata"):
+        return await self.read(gid, self.acc.get_attr, attr, gid, uid, table=table)
+
+    async def zone_index(self, gid: str) -> ZoneIndex:
+        """
+        Return guild <gid>'s ZoneIndex; the first time, it is loaded on the
+        writer thread (loading may INSERT missing zones).
+
+        If the load fails, an empty index is returned but not cached.
+        """
+        zones = self.acc.zones.get(gid)
+        if zones is None:
+            entries = await self.write(self.acc.fetch_zone_entries, gid)
+            if entries is None:
+                return ZoneIndex()
+            zones = self.acc.zones.setdefault(gid, ZoneIndex(entries))
+        return zones
+
+    async def is_channel(self, zone_name: str, gid: str, channel_id: str):
+        # loaded zones are answered from memory; skip the thread hop
+        return (await self.zone_index(gid)).is_channel(zone_name, channel_id)
+
+    async def message_features(self, message):
+        # the channel's zones come from the zone index; load it off the
+        # event loop the first time a guild is seen
+        if message.guild is not None:
+            await self.zone_index(str(message.guild.id))
+        return self.acc.features.get(message)
+
+    async def gather_user_stats(self, gid: str, uid: str, *args, **kwargs):
+        return await self.read(
+            gid, self.acc.gather_user_stats, gid, uid, *args, **kwargs
+        )
+
+    async def get_user_stats(self, gid: str, uid: str, *args, **kwargs):
+        return await self.read(gid, self.acc.get_user_stats, gid, uid, *args, **kwargs)
+
+    async def get_clearance(self, gid: str, uid: str):
+        return await self.read(gid, self.acc.get_clearance, gid, uid)
+
+    async def check_clearance(self, gid: str, uid: str):
+        return await self.read(gid, self.acc.check_clearance, gid, uid)
+
+    async def print_table(self, gid: str, uid: str, table: str = "udata"):
+        return await self.read(gid, self.acc.print_table, gid, uid, table)
+
+    async def designation_is_set(self, gid: str, zone_name: str) -> bool:
+        return (await self.zone_index(gid)).is_set(zone_name)
+
+    async def get_designation_channel_id(self, gid: str, zone_name: str):
+        zones = await self.zone_index(gid)
+        return zones[zone_name] if zones.is_set(zone_name) else ""
+
+    def shutdown(self):
+        # waits for queued writes so nothing is lost on unload
+        self.executor.shutdown(wait=True)
+
+
 class UserDataAccessor(commands.Cog, GlobalCog):
     """Data and Statistics Module"""
 
@@ -60,10 +203,122 @@ class UserDataAccessor(commands.Cog, GlobalCog):
     FOLDER = "sqlite_dbs"  # default self.FOLDER name
     NUMERIC_UPPER_BOUND = 5.0e7  # (50,000,000)
 
+    # connection pool settings (see utils/sqlite_pool.py)
+    POOL_SIZE = 4  # max. idle connections kept per guild
+    POOL_IDLE_TIMEOUT = 300.0  # seconds before an idle connection is closed
+    POOL_CACHED_STATEMENTS = 256  # prepared statements cached per connection
+
+    # pragmas applied to every guild database connection;
+    # WAL keeps Kaede's and Yoshimura's readers from blocking on each
+    # other's commits (see utils/sqlite_pool.py for what each one does)
+    DB_PRAGMAS = dict(DEFAULT_PRAGMAS)
+
+    # buffered counter increments are flushed once this many are pending
+    # (they are also flushed every few seconds by <flush_counter_buffer>)
+    COUNTER_FLUSH_THRESHOLD = 500
+
+    # point awards for the same member within this many seconds are sent
+    # to UnbelievaBoat as one PATCH (see <award_points()>); unsent awards
+    # are kept in a per-bot ledger file inside <FOLDER>
+    AWARD_COALESCE_WINDOW = 10.0
+    AWARD_LEDGER = "award_ledger_{}.jsonl"
+
+    # a reacter's points are paid this many seconds after the reaction (see
+    # <self.delayed>); further reactions by the same user on the same message
+    # until REACTION_AWARD_HOLD seconds after the payout earn nothing
+    REACTION_AWARD_DELAY = 4.0
+    REACTION_AWARD_HOLD = 60.0
+
+    # threads per guild for offloaded reads (see <AsyncUserDataAccessor>)
+    DB_READERS_PER_GUILD = 2
+
+    # members converted to rows at a time by <bulk_add_users()>
+    BULK_CHUNK_SIZE = 2000
+
+    # per-message feature records kept for reuse by later listeners,
+    # reactions and replies (see <MessageAnalyzer>)
+    MESSAGE_FEATURES_CACHE = 2048
+
+    # messages fetched over REST for reaction handlers are shared through
+    # <fetch_message()> for this many seconds (evicted on edit/delete)
+    MESSAGE_CACHE_TTL = 60.0
+    MESSAGE_CACHE_SIZE = 1024
+
+    # sampled per-user activity (see <ActivityLog>): in-memory records for
+    # "uda activity", batched into a rotating log file inside <FOLDER>
+    ACTIVITY_LOG = "activity_{}.log"
+    ACTIVITY_CAPACITY = 5000
+    ACTIVITY_SAMPLE_RATE = 1.0
+
+    # clearance levels checked by GlobalCog.set_clearance are cached this
+    # many seconds (changes made through this bot invalidate them at once;
+    # the TTL covers changes made by the other bot)
+    CLEARANCE_CACHE_TTL = 60.0
+
     def __init__(self, bot):
         self.bot = bot
         self.distributor = points.Distributor(bot)
 
+        # warm per-guild connections (see <connect()>)
+        self.pool = SQLitePool(
+            size=self.POOL_SIZE,
+            idle_timeout=self.POOL_IDLE_TIMEOUT,
+            cached_statements=self.POOL_CACHED_STATEMENTS,
+            pragmas=self.DB_PRAGMAS,
+        )
+
+        # guild IDs whose db file + tables have already been verified,
+        # and cached db file paths (guild ID -> path)
+        self.verified_dbs = set()
+        self.fpaths = {}
+
+        # write-behind buffer for update("add", ...) increments
+        self.counters = CounterBuffer(max_pending=self.COUNTER_FLUSH_THRESHOLD)
+        self._counter_flush = None  # Future of the queued threshold flush
+
+        # awaitable facade: runs DB work off the event loop
+        self.aio = AsyncUserDataAccessor(
+            self, readers_per_guild=self.DB_READERS_PER_GUILD
+        )
+
+        # event loop lag samples (shown in "uda stats")
+        self.loop_lag = LoopLagMonitor()
+        self.loop_lag_task = self.bot.loop.create_task(self.loop_lag.run())
+
+        # async UnbelievaBoat API client (one keep-alive session per bot)
+        self.ub = UBClient()
+
+        # coalescing queue for UnbelievaBoat point awards; one ledger per
+        # bot script (kaede/yoshimura), re-queueing anything left unsent
+        script = os.path.splitext(os.path.basename(sys.argv[0]))[0].lower()
+        self.awards = AwardQueue(
+            self.send_award,
+            os_join(self.FOLDER, self.AWARD_LEDGER.format(script)),
+            window=self.AWARD_COALESCE_WINDOW,
+        )
+        self.awards.load()
+
+        # deferred awards (e.g. reaction points), keyed to drop duplicates
+        self.delayed = DelayedQueue(bot.loop, hold=self.REACTION_AWARD_HOLD)
+
+        # structured activity records (replaces printing stats per message)
+        self.activity = ActivityLog(
+            os_join(self.FOLDER, self.ACTIVITY_LOG.format(script)),
+            capacity=self.ACTIVITY_CAPACITY,
+            sample_rate=self.ACTIVITY_SAMPLE_RATE,
+        )
+
+        # guild ID -> UserIndex of user IDs known to exist in 'udata'
+        # (loaded lazily, see <get_user_index()>)
+        self.known_users = {}
+
+        # guild ID -> RoleIndex of role names/IDs (built lazily, see
+        # <get_role_index()>; kept current by the on_guild_role_* listeners)
+        self.role_indexes = RoleIndexes(bot.get_guild)
+
+        # guild ID -> user ID -> clearance (see <get_clearance()>)
+        self.clearances = ClearanceCache(ttl=self.CLEARANCE_CACHE_TTL)
+
         # flag to disable the bot
         self.disabled = False
 
@@ -185,9 +440,23 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         # designated zone names (#TODO: automate designation zone retrieval)
         self.zone_names = list(self.zone_info.keys())
 
-        # currently designated zones (RAM-only)
+        # currently designated zones (RAM-only); guild ID -> ZoneIndex
+        # (loaded lazily, see <get_zone_index()>)
         self.zones = {}
 
+        # shared REST-fetched messages for all reaction listeners
+        self.messages = MessageCache(
+            ttl=self.MESSAGE_CACHE_TTL, maxsize=self.MESSAGE_CACHE_SIZE
+        )
+
+        # shared per-message analysis for all message/reaction listeners
+        self.features = MessageAnalyzer(
+            self.zones_of_channel,
+            maxsize=self.MESSAGE_FEATURES_CACHE,
+            med_len=self.distributor.TEXT_LEN_MED,
+            long_len=self.distributor.TEXT_LEN_LONG,
+        )
+
         # help create mirror in GlobalCog to access db
         GlobalCog.accessor_mirror = self
 
@@ -195,6 +464,81 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         if not os_isdir("sqlite_dbs"):
             makedirs("sqlite_dbs")
 
+        self.evict_idle_connections.start()
+        self.flush_counter_buffer.start()
+        self.checkpoint_wal.start()
+        self.flush_award_queue.start()
+        self.flush_activity_log.start()
+        self.reload_zones.start()
+
+    def cog_unload(self):
+        """
+        Flush buffered counters and close all pooled database connections
+        when the cog is unloaded (this also happens on bot shutdown).
+        """
+        self.flush_counter_buffer.cancel()
+        self.evict_idle_connections.cancel()
+        self.checkpoint_wal.cancel()
+        self.flush_award_queue.cancel()
+        self.flush_activity_log.cancel()
+        self.reload_zones.cancel()
+        self.loop_lag_task.cancel()
+
+        # let offloaded writes finish before the final flush
+        self.aio.shutdown()
+        self.flush_counters()
+
+        # queued awards stay in the ledger and are sent after the restart
+        self.delayed.run_pending()
+        self.awards.close()
+        self.activity.close()
+
+        # fold the WAL back into the main db files before shutting down
+        self.pool.checkpoint("TRUNCATE")
+        self.pool.close()
+
+        # the loop is still running while extensions are unloaded
+        self.bot.loop.create_task(self.ub.close())
+
+    # keep the role indexes current (see <get_role_index()>)
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.role_indexes.role_added(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self.role_indexes.role_added(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.role_indexes.role_removed(role)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.role_indexes.drop(guild.id)
+
+    # drop changed messages from the fetch cache (see <fetch_message()>)
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        self.messages.evict(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self.messages.evict(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        for message_id in payload.message_ids:
+            self.messages.evict(message_id)
+
+    async def fetch_message(self, channel, message_id: int) -> discord.Message:
+        """
+        Return message <message_id> of <channel>, shared by all listeners:
+        cached for a while, and fetched only once if several handlers ask
+        for it at the same time (see utils/message_cache.py).
+        """
+        return await self.messages.get(channel, message_id)
+
     def get_currdir(self) -> str:
         """
         Return current directory of MAIN BOT SCRIPT
@@ -205,6 +549,10 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         """
         Return filepath (incl. filename) of server w/GuildID <gid>
         """
+        fpath = self.fpaths.get(gid)
+        if fpath is not None:
+            return fpath
+
         currdir = self.get_currdir()
         isdir_path = os_join(currdir, self.FOLDER)
 
@@ -213,7 +561,8 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             makedirs(isdir_path)
 
         # return full file path
-        return os_join(isdir_path, gid + self.EXT_NAME)
+        fpath = self.fpaths[gid] = os_join(isdir_path, gid + self.EXT_NAME)
+        return fpath
 
         # OLD IMPLEMENTATION:
         # return os_join(os_dirname(self.get_currdir()),
@@ -234,6 +583,9 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         Assumption(s): Only execute(s) after checking db_exists(...)
         """
         conn = sql3_connect(self.get_fpath(gid))
+
+        # journal_mode=WAL is stored in the db file itself
+        apply_pragmas(conn, self.DB_PRAGMAS)
         conn.commit()
         conn.close()
         self.CREATE_TABLE(gid)
@@ -245,10 +597,18 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 1. user stats (the main table)
                 2. "unverified_users" (for unverified/new users)
                 3. blacklist?
+
+        NOTE: connections come from <self.pool>; closing the connection
+        (or leaving a "with" block) returns it to the pool.
         """
+        # fast path: db file and tables were already verified for this guild
+        if gid in self.verified_dbs:
+            return self.pool.acquire(gid, self.get_fpath(gid))
+
         # if file exists and tables exist
         if self.db_exists(gid) and self.db_made:
-            return sql3_connect(self.get_fpath(gid))
+            self.verified_dbs.add(gid)
+            return self.pool.acquire(gid, self.get_fpath(gid))
 
         # if file exists but unsure if tables exist
         elif self.db_exists(gid):
@@ -265,12 +625,14 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             )
 
             # create/initialize db
-            if cur.fetchone() is None:
-                conn.close()
+            missing = cur.fetchone() is None
+            conn.close()
+            if missing:
                 self.CREATE_TABLE(gid)
 
             self.db_made = True
-            return sql3_connect(self.get_fpath(gid))
+            self.verified_dbs.add(gid)
+            return self.pool.acquire(gid, self.get_fpath(gid))
 
         # if file DOESN'T exist: create db, save and close
         conn = sql3_connect(self.get_fpath(gid))
@@ -278,7 +640,8 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         conn.close()
 
         self.CREATE_TABLE(gid)
-        return sql3_connect(self.get_fpath(gid))
+        self.verified_dbs.add(gid)
+        return self.pool.acquire(gid, self.get_fpath(gid))
 
     def get_columns(self):
         """
@@ -409,10 +772,17 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                     "retrieved fields is type None"
                 )
             
+            # include increments that are still buffered in memory
+            result = list(result)
+            pending = self.counters.get_user(gid, table, uid)
+            for i, field in enumerate(fields):
+                if field in pending:
+                    result[i] += pending[field]
+
             # convert result to string (labels and values underneath) and return
             result_dict = dict(zip(
                 fields,
-                [str(value) for value in list(result)]
+                [str(value) for value in result]
             ))
             
             result_str = ",\n".join(
@@ -540,9 +910,8 @@ class UserDataAccessor(commands.Cog, GlobalCog):
 
                     # also add user to the UNVERIFIED list/table (IF they don't have a verified role)
                     verified_status = "unverified"
-                    if (
-                        discord.utils.get(member.roles, name=roles.VERIFIED_MEMBER)
-                        is None
+                    if not self.get_role_index(gid, guild).member_has(
+                        member, roles.VERIFIED_MEMBER
                     ):
                         vals = tuple(
                             [
@@ -570,6 +939,8 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                         pass
 
                     conn.commit()
+                    self.get_user_index(gid).add(uid)
+                    self.clearances.invalidate(gid, uid)
 
             # occurs if ID entry already exists
             except sqlite3.IntegrityError:
@@ -581,6 +952,74 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 print("[userdata_accessor.adduser] ERROR:")
                 traceback.print_exc()
 
+    def bulk_add_users(self, gid: str, members, chunk_size: int = None) -> int:
+        """
+        Add every (non-bot) member in <members> that isn't in the DB yet.
+
+        Same rows as <ADD_USER()>, but all inserts for 'udata' and
+        'unverified_users' go through executemany() in ONE transaction.
+        <members> may be any iterable; it is consumed <chunk_size> members
+        at a time, so memory use stays flat for very large guilds.
+
+        RETURN: number of 'udata' rows inserted
+        """
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        index = self.get_user_index(gid)
+        role_index = self.get_role_index(gid)
+
+        udata_cmd = "INSERT OR IGNORE INTO udata ({}) VALUES ({})".format(
+            ", ".join(self.attrs), ", ".join(["?"] * len(self.attrs))
+        )
+        unverified_cmd = "INSERT OR IGNORE INTO unverified_users VALUES ({})".format(
+            ", ".join(["?"] * len(self.unverified_users_attrs))
+        )
+
+        # defaults after (id, username, discrim, member_status)
+        text_defaults = self.text_attrs_default_vals[4:]
+        numeric_defaults = [0] * len(self.numeric_attrs)
+        unverified_defaults = [
+            v["value"] for v in self.unverified_users_default_vals.values()
+        ][2:]
+
+        added, inserted = [], 0
+        members = iter(members)
+        with self.connect(gid) as conn:
+            cur = conn.cursor()
+            while True:
+                chunk = list(itertools.islice(members, chunk_size))
+                if not chunk:
+                    break
+
+                udata_rows, unverified_rows = [], []
+                for member in chunk:
+                    uid = str(member.id)
+                    if member.bot or uid in index:
+                        continue
+
+                    verified = role_index.member_has(member, roles.VERIFIED_MEMBER)
+                    status = "verified" if verified else "unverified"
+                    udata_rows.append(
+                        [uid, member.name, member.discriminator, status]
+                        + text_defaults
+                        + numeric_defaults
+                    )
+                    if not verified:
+                        unverified_rows.append([uid, status] + unverified_defaults)
+                    added.append(uid)
+
+                cur.executemany(udata_cmd, udata_rows)
+                inserted += max(cur.rowcount, 0)
+                cur.executemany(unverified_cmd, unverified_rows)
+
+            conn.commit()
+
+        # (rows skipped by "OR IGNORE" were added by the other bot meanwhile)
+        for uid in added:
+            index.add(uid)
+        if added:
+            self.clearances.invalidate(gid)
+        return inserted
+
     def DELETE_USER(self, gid: str, uid: str):
         """
         Delete specified user from all records in all databases where user appears.
@@ -589,6 +1028,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         code -1:    failed to delete user records
         """
         try:
+            self.flush_counters(gid)
             with self.connect(gid) as conn:
                 cur = conn.cursor()
 
@@ -602,6 +1042,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 # cur.execute("DELETE FROM blacklist WHERE id=?", (uid,))
 
                 conn.commit()
+            self.forget_user(gid, uid)
             return 0
         except:
             traceback.print_exc()
@@ -633,69 +1074,98 @@ class UserDataAccessor(commands.Cog, GlobalCog):
 
         STRUCTURE OF SELF.ZONES:
         ------------------------
-            [guild_id1]
-                [zone_name1] : [channel_id1, ..., channel_idN]
-                [zone_name2] : [channel_id1, ..., channel_idN]
+            [guild_id1] : ZoneIndex
+                [zone_name1] : "channel_id1,...,channel_idN"
+                [zone_name2] : "channel_id1,...,channel_idN"
                     ...             ...
-                [zone_nameN] : [channel_id1, ..., channel_idN]
+                [zone_nameN] : "channel_id1,...,channel_idN"
 
                 ...
                 ...
 
-            [guild_idN]
-                [zone_name1] : [channel_id1, ..., channel_idN]
-                [zone_name2] : [channel_id1, ..., channel_idN]
-                    ...             ...
-                [zone_nameN] : [channel_id1, ..., channel_idN]
+            [guild_idN] : ZoneIndex
+                ...
+
+        (each ZoneIndex also maps channel IDs back to their zones,
+        see utils/zone_index.py)
         """
         try:
-            # print("[load_zone_entries] now executing")
-            with self.connect(gid) as conn:
-                self.zones_being_loaded = True
+            rows = self.fetch_zone_entries(gid)
+            if rows is None:
+                return
 
-                # retrieve guild's zone data from DB
-                cur = conn.cursor()
-                cur.execute("SELECT * FROM designated_zones")
+            # load everything regardless
+            if naive_load or gid not in self.zones:
+                entries = rows
 
-                if gid not in self.zones:
-                    self.zones[gid] = {}
-                elif (self.zones[gid] is None) or len(self.zones[gid]) == 0:
-                    self.zones[gid] = {}
+            # only load zones that are null in the cache entry
+            else:
+                entries = dict(self.zones[gid])
+                for zone, channel_ids in rows.items():
+                    if entries.get(zone) is None:
+                        entries[zone] = channel_ids
 
-                for row in cur.fetchall():
+            self.swap_zone_index(gid, entries)
+        except:
+            traceback.print_exc()
 
-                    # print(f"[loading] current designation name: {row[0]")
-                    # row[0]: designation_name
-                    # row[1]: comma-separated channel_id(s)
+    def fetch_zone_entries(self, gid: str):
+        """
+        Return guild <gid>'s zones from the DB ({zone_name: channel_ids}),
+        adding rows for the zones of <self.zone_info> it doesn't have yet.
 
-                    # load everything regardless
-                    if naive_load:
-                        self.zones[gid][row[0]] = row[1]
+        Writes: run it on the writer thread (<self.aio.write()>) off the loop.
+        Returns None if the DB couldn't be read.
+        """
+        try:
+            with self.connect(gid) as conn:
 
-                    # only load if zone is null in cache entry
-                    elif (
-                        row[0] not in self.zones[gid] or self.zones[gid][row[0]] is None
-                    ):
-                        self.zones[gid][row[0]] = row[1]
+                # retrieve guild's zone data from DB
+                cur = conn.cursor()
+                cur.execute("SELECT designation_name, channel_id FROM designated_zones")
+                entries = dict(cur.fetchall())
 
                 # add in unmentioned/unaccounted zone names from
                 # the UDA template <self.zone_info>; apply persistent changes.
                 for zone in self.zone_info:
-                    if zone not in self.zones[gid]:
-
-                        # print(f"[loading] unaccounted designation name: {zone}")
-
+                    if zone not in entries:
                         cmd = "INSERT INTO designated_zones VALUES(?,?,?)"
                         cur.execute(cmd, (zone, "", self.zone_info[zone]["priority"]))
+                        entries[zone] = ""
+                return entries
+        except:
+            traceback.print_exc()
+            return None
 
-                        self.zones[gid][zone] = ""
+    def swap_zone_index(self, gid: str, entries: dict) -> bool:
+        """
+        Replace guild <gid>'s ZoneIndex with one of <entries>, unless they
+        are what it already holds. Returns True if it was replaced.
+        """
+        # swap in a fresh index, so lookups never see a half-loaded one;
+        # cached message features hold zone names, so drop them on change
+        previous = self.zones.get(gid)
+        if previous is not None and dict(previous) == entries:
+            return False
+        self.zones[gid] = ZoneIndex(entries)
+        if previous is not None:
+            self.features.clear()
+        return True
 
-                self.zones_being_loaded = False
+    def get_zone_index(self, gid: str) -> ZoneIndex:
+        """
+        Return the ZoneIndex for guild <gid>, loading it from the DB if needed.
 
-                # print("[load_zone_entries] finished executing. now leaving.")
-                # print(f"Currently loaded zones:\n{self.zones}")
-        except:
-            traceback.print_exc()
+        If the load fails, an empty index is returned but not cached (so the
+        next call tries again).
+        """
+        index = self.zones.get(gid)
+        if index is None:
+            self.load_zone_entries(gid)
+            index = self.zones.get(gid)
+            if index is None:
+                return ZoneIndex()
+        return index
 
     def add_designation_category(
         self, gid: str, zone_name: str, channel_id: str = "", limit: int = 1
@@ -713,7 +1183,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 cur = conn.cursor()
 
                 # if zone does not yet, add the zone name + default vals
-                if zone_name not in self.zones[gid]:
+                if zone_name not in self.get_zone_index(gid):
                     cur.execute(
                         "INSERT INTO designated_zones VALUES(?,?,?)",
                         (zone_name, channel_id, 1),
@@ -763,47 +1233,11 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         """
         Return true if specified designation <zone_name> has been set
         for the guild with a guild ID of <gid>.
+
+        NOTE: answered from memory (see <get_zone_index()>).
         """
         try:
-
-            # load designation zones into memory if needed
-            if (gid not in self.zones) or (
-                (len(self.zones[gid]) <= 0) and (not self.zones_being_loaded)
-            ):
-                # print(f"[designation_is_set] calling <load_zone_entries()>")
-                self.load_zone_entries(gid)
-                # print(f"[designation_is_set] exited <load_zone_entries()>")
-
-            try:
-                # print(f"[designation_is_set] now trying to find {zone_name} entry in cache")
-
-                # check RAM/cache if zone is set for the guild
-                found = self.zones[gid][zone_name] not in ("", " ", "n/a")
-                # print(f"[designation_is_set] {zone_name} {'' if found else 'NOT'} found for {gid}.")
-
-                if not found:
-                    # check DB if zone is set for the guild
-                    with self.connect(gid) as conn:
-                        cur = conn.cursor()
-                        cmd = "SELECT channel_id FROM designated_zones WHERE designation_name=?"
-                        cur.execute(cmd, (zone_name,))
-                        result = cur.fetchone()
-                        if result is not None:
-
-                            result = result[0] not in {"", "n/a", None}
-                            # print((
-                            #    f"[designation_is_set] {zone_name} zone entry "
-                            #    f"{'' if result else 'NOT'} found."
-                            # ))
-                            return result
-
-                        # print(f"[designation_is_set] no DB results for {zone_name}.")
-                else:
-                    return True
-
-            except KeyError:
-                traceback.print_exc()
-                return False
+            return self.get_zone_index(gid).is_set(zone_name)
         except:
             traceback.print_exc()
             return False
@@ -826,13 +1260,10 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         #     not allow adding (3) a third channel to the <introductions> zone for a guild.
 
         # load zones in RAM/cache (if needed)
-        if gid not in self.zones or (
-            (len(self.zones[gid]) <= 0) and (not self.zones_being_loaded)
-        ):
-            self.load_zone_entries(gid)
+        zones = self.get_zone_index(gid)
 
         # ensure zone is a valid zone
-        if zone_name not in self.zones[gid] and zone_name not in self.zone_info:
+        if zone_name not in zones and zone_name not in self.zone_info:
             raise Exception("Invalid or nonexistent designation zone ({zone_name}).")
 
         with self.connect(gid) as conn:
@@ -868,9 +1299,9 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             cur.execute(cmd, (channel_ids, zone_name))
             conn.commit()
 
-            # push update to self.zones (in-memory "cache")
-            self.zones[gid][zone_name] = channel_ids
-            # print(f"[set_designation] cache updated: {zone_name}={self.zones[gid][zone_name]}")
+            # push update to self.zones (in-memory "cache"; re-indexes the zone)
+            zones[zone_name] = channel_ids
+            self.features.clear()
 
     def remove_designation(
         self, gid: str, zone_name: str, channel_id: str, is_channel_bypass: bool = False
@@ -884,11 +1315,10 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         # print(f"[rm_designation] TARGETS: channel={channel_id}, zone={zone_name}\n")
 
         # load zones in RAM/cache (if needed)
-        if gid not in self.zones:
-            self.load_zone_entries(gid)
+        zones = self.get_zone_index(gid)
 
         # ensure zone is a valid zone
-        if zone_name not in self.zones[gid] and zone_name not in self.zone_info:
+        if zone_name not in zones and zone_name not in self.zone_info:
             raise Exception("Invalid or nonexistent designation zone.")
 
         # check if channel IS an entry in the given zone's entries for this guild
@@ -926,28 +1356,21 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             cur.execute(cmd, (channel_ids, zone_name))
             conn.commit()
 
-            # push update to self.zones (in-memory "cache")
-            self.zones[gid][zone_name] = channel_ids
-
-            # print(f"[rm_designation] self.zones[gid] status:\n\n{self.zones[gid]}\n\n")
+            # push update to self.zones (in-memory "cache"; re-indexes the zone)
+            zones[zone_name] = channel_ids
+            self.features.clear()
 
     def get_designation_channel_id(self, gid: str, zone_name: str):
         """
         Return the associated channel id(s) for <zone_name>. Returns ("") if fail.
+
+        NOTE: answered from memory (see <get_zone_index()>).
         """
         try:
-
-            # attempt retrieval from RAM/cache
-            if self.zones[gid][zone_name] not in ("", " ", "n/a"):
-                return self.zones[gid][zone_name]
-
-            # (if needed) attempt retrieval from DB
-            with self.connect(gid) as conn:
-                cur = conn.cursor()
-                cmd = "SELECT channel_id FROM designated_zones WHERE designation_name=?"
-                cur.execute(cmd, (zone_name,))
-                channel_id = cur.fetchone()
-                return channel_id[0] if channel_id else ""
+            zones = self.get_zone_index(gid)
+            if zones.is_set(zone_name):
+                return zones[zone_name]
+            return ""
         except:
             traceback.print_exc()
             return ""
@@ -958,54 +1381,32 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         as the zone <zone_name> for the current guild <gid>.
 
         NOTE: <channel_name> must be the name of a pre-defined "designation zone."
+        Answered from memory, including for channels that are NOT in the zone;
+        the index is updated by <set_designation()>/<remove_designation()> and
+        reloaded by "dzone refresh" and <reload_zones>.
         """
-        if (gid not in self.zones) or (
-            (len(self.zones[gid]) <= 0) and (not self.zones_being_loaded)
-        ):
-            self.load_zone_entries(gid)
-
-        if zone_name not in self.zones[gid] and zone_name not in self.zone_info:
+        try:
+            return self.get_zone_index(gid).is_channel(zone_name, channel_id)
+        except:
+            traceback.print_exc()
             return False
 
+    def zones_of_channel(self, gid: str, channel_id: str) -> frozenset:
+        """
+        Return the names of all zones channel <channel_id> is registered as.
+        """
         try:
-
-            # print(f"[is_channel] TARGETS: channel={channel_id}, zone={zone_name}")
-
-            # check if channel is an entry for the zone (RAM/cache)
-            ram_entry = (self.zones[gid][zone_name] or "").split(",")
-
-            if channel_id not in ram_entry:
-                # print(f"[is_channel] 1st check failed")
-
-                # check DB if channel is an entry for the zone (for guild)
-                with self.connect(gid) as conn:
-                    cur = conn.cursor()
-                    cmd = "SELECT channel_id FROM designated_zones WHERE designation_name=?"
-                    cur.execute(cmd, (zone_name,))
-
-                    result = cur.fetchone()
-                    if result is not None:
-                        # print(f"[is_channel] DB result found: {result}")
-                        # print(f"[is_channel] now cross-referencing DB result")
-
-                        result = channel_id in result[0].split(",")
-                        # print(f"[is_channel] result: {channel_id} {'IS' if result else 'NOT'} found.")
-                        return result
-
-                    # print(f"[is_channel] DB result wasn't found")
-
-            else:
-                # print(f"[is_channel] channel found in zone entries! returning True.")
-                return True
-
-        except KeyError:
-            return False
+            return self.get_zone_index(gid).zones_of(channel_id)
         except:
             traceback.print_exc()
-            return False
+            return frozenset()
 
-        # end-case: this channel is not a registered <zone>
-        return False
+    def get_message_features(self, message):
+        """
+        Return the (cached) MessageFeatures of <message>
+        (see utils/message_features.py).
+        """
+        return self.features.get(message)
 
     def strfmt_zones(self, gid: str):
         """
@@ -1043,19 +1444,51 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         self.ADD_USER(gid, uid)
         self.checking_user = False
 
+    def get_user_index(self, gid: str) -> UserIndex:
+        """
+        Return the in-memory index of known user IDs for guild <gid>,
+        loading it from 'udata' on first use.
+        """
+        index = self.known_users.get(gid)
+        if index is None:
+            with self.connect(gid) as conn:
+                rows = conn.execute("SELECT id FROM udata").fetchall()
+            index = UserIndex(r[0] for r in rows if str(r[0]).isdigit())
+            self.known_users[gid] = index
+        return index
+
+    def forget_user(self, gid: str, uid: str):
+        """
+        Drop <uid> from the known-user index (call after deleting their row).
+        """
+        index = self.known_users.get(gid)
+        if index is not None:
+            index.discard(uid)
+        self.clearances.invalidate(gid, str(uid))
+
     def user_exists(self, gid: str, uid: str) -> bool:
         """
         Return true if row/entry made in DB for user
+
+        NOTE: known users are answered from memory (see <get_user_index()>);
+        only misses hit the DB, in case the other bot added the user.
         """
         try:
+            index = self.get_user_index(gid)
+            if uid in index:
+                return True
+
             with self.connect(gid) as conn:
                 cur = conn.cursor()
                 cmd = "SELECT EXISTS(SELECT 1 FROM udata WHERE id=?)"
                 cur.execute(cmd, (uid,))
 
                 # returns either true if found, or false
-                res = cur.fetchone()[0]
-                return bool(res)
+                res = bool(cur.fetchone()[0])
+                if res and str(uid).isdigit():
+                    index.add(uid)
+                    self.clearances.invalidate(gid, str(uid))  # added meanwhile
+                return res
 
         except sqlite3.OperationalError:
             traceback.print_exc()
@@ -1068,32 +1501,58 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         """
         Check/return the given user's <uid> clearance level.
         """
+        clearance = self.get_clearance(gid, uid)
+        if clearance is None:
+            return -1  # return -1 (error case)
+        return clearance
+
+    def get_clearance(self, gid: str, uid: str):
+        """
+        Return user <uid>'s clearance level, or None if they have no row.
+
+        NOTE: answered from <self.clearances> when possible; anything that
+        changes a clearance must call <invalidate_clearance()>.
+        """
+        clearance = self.clearances.get(gid, uid)
+        if clearance is not MISS:
+            return clearance
+
         try:
             with self.connect(gid) as conn:
                 cur = conn.cursor()
-                cmd = "SELECT clearance FROM udata WHERE id=?"
-                cur.execute(cmd, (uid,))
-
-            clearance = cur.fetchone()
-            if clearance:
-                return clearance[0]  # return clearance level
-            return -1  # return -1 (error case)
-
+                cur.execute("SELECT clearance FROM udata WHERE id=?", (uid,))
+                row = cur.fetchone()
         except:
+            # don't cache errors (e.g. the guild DB doesn't exist yet)
             traceback.print_exc()
-            return -1
+            return None
+
+        clearance = None
+        if row is not None:
+            clearance = self.with_pending(row[0], gid, "udata", uid, "clearance")
+        self.clearances.put(gid, uid, clearance)
+        return clearance
+
+    def invalidate_clearance(self, gid: str, uid: Optional[str] = None):
+        """
+        Drop the cached clearance of <uid> (all users of <gid> if None).
+        """
+        self.clearances.invalidate(gid, None if uid is None else str(uid))
+
+    def get_role_index(self, gid: str, guild_object=None) -> RoleIndex:
+        """
+        Return the RoleIndex (role name -> role) of guild <gid>, building it
+        on first use; faster if <guild_object> provided.
+        """
+        return self.role_indexes.get(gid, guild_object)
 
     def fetch_role(self, role_name: str, gid: str, guild_object=None):
         """
-        Return the discord.Role(?) object; faster if <message_object> provided.
+        Return the discord.Role named <role_name> (or None); faster if
+        <guild_object> provided.
         """
         try:
-            roles = None
-            if guild_object is None:
-                roles = self.bot.get_guild(int(gid)).roles
-            else:
-                roles = guild_object.roles
-            return discord.utils.get(roles, name=role_name)
+            return self.get_role_index(gid, guild_object).get(role_name)
         except:
             traceback.print_exc()
             return None
@@ -1113,7 +1572,9 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                     member = guild_object.get_member(int(uid))
 
             # checking if specified role is present in User/Member
-            return self.fetch_role(role_name, gid, guild_object) in member.roles
+            return self.get_role_index(gid, guild_object).member_has(
+                member, role_name
+            )
 
         except:
             traceback.print_exc()
@@ -1127,8 +1588,8 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             if member is None:
                 guild = self.bot.get_guild(int(gid))
                 member = guild.get_member(int(uid))
-            return (
-                discord.utils.get(member.roles, name=roles.VERIFIED_MEMBER) is not None
+            return self.get_role_index(gid, member.guild).member_has(
+                member, roles.VERIFIED_MEMBER
             )
         except:
             traceback.print_exc()
@@ -1179,7 +1640,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                     cur.execute(cmd)
                     res = cur.fetchone()[0]
                     # print("[get_attr][udata] attr=", attr, ", val=", res, ", type:", type(res), "\n")
-                    return res
+                    return self.with_pending(res, gid, "udata", uid, attr)
             except:
                 return ""
 
@@ -1193,12 +1654,21 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                     # cur.execute(cmd, (attr, uid))
                     res = cur.fetchone()[0]
                     # print("[get_attr][unver] attr=", attr, ", val=", res, ", type:", type(res), "\n")
-                    return res
+                    return self.with_pending(res, gid, table, uid, attr)
             except:
                 return ""
 
         return ""
 
+    def with_pending(self, value, gid: str, table: str, uid: str, attr: str):
+        """
+        Return <value> (read from the DB) plus any buffered, unflushed
+        increment for the same counter.
+        """
+        if isinstance(value, numbers.Number):
+            return value + self.counters.get(gid, table, uid, attr)
+        return value
+
     def get_user_stats(
         self,
         gid: str,
@@ -1216,7 +1686,14 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 cur.execute("SELECT * FROM udata WHERE id=?", (uid,))
                 labels = cur.description
                 whitelist_labels = []
-                raw_items = [str(x) for x in cur.fetchone()]
+
+                # include increments that are still buffered in memory
+                row = list(cur.fetchone())
+                pending = self.counters.get_user(gid, "udata", uid)
+                for i, label in enumerate(labels):
+                    if label[0] in pending:
+                        row[i] += pending[label[0]]
+                raw_items = [str(x) for x in row]
                 items = []
 
                 # only get items that are not blacklisted
@@ -1516,7 +1993,26 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         """
         Add contents[amount] to contents[attr] in guild-associated db, or
         add <amount> to <attr> for <uid>
+
+        NOTE: numeric increments are buffered in <self.counters> and written
+        in batches by <flush_counters()>; reads through <get_attr()> and
+        <get_user_stats()> already include the buffered amount.
         """
+        if contents["attr"] == "clearance":
+            self.invalidate_clearance(contents["gid"], contents["uid"])
+
+        if isinstance(contents["amount"], numbers.Number):
+            flush_now = self.counters.add(
+                contents["gid"],
+                contents["table"],
+                contents["uid"],
+                contents["attr"],
+                contents["amount"],
+            )
+            if flush_now:
+                self.queue_counter_flush()
+            return
+
         try:
             with self.connect(contents["gid"]) as conn:
                 cur = conn.cursor()
@@ -1532,6 +2028,49 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         except:
             traceback.print_exc()
 
+    def queue_counter_flush(self):
+        """
+        Queue one <flush_counters()> on the writer thread (unless one is
+        already queued), so it stays ordered with the other DB writes.
+        """
+        queued = self._counter_flush
+        if queued is not None and not queued.done():
+            return
+        try:
+            self._counter_flush = self.aio.submit_write(self.flush_counters)
+        except RuntimeError:
+            # writer already shut down (cog unloading): flush here
+            self.flush_counters()
+
+    def flush_counters(self, gid: Optional[str] = None):
+        """
+        Write buffered counter increments to the DB; one transaction per guild.
+
+        If <gid> is None, all guilds with pending increments are flushed.
+        """
+        for guild_id in [gid] if gid else self.counters.guilds():
+            deltas = self.counters.drain(guild_id)
+            if not deltas:
+                continue
+
+            # group by (table, column) so each group is one executemany()
+            groups = {}
+            for (table, uid, attr), amount in deltas.items():
+                groups.setdefault((table, attr), []).append((amount, uid))
+
+            try:
+                with self.connect(guild_id) as conn:
+                    cur = conn.cursor()
+                    for (table, attr), rows in groups.items():
+                        cmd = "UPDATE {} SET {} = {} + ? WHERE id = ?".format(
+                            table, attr, attr
+                        )
+                        cur.executemany(cmd, rows)
+            except:
+                # keep the increments around for the next attempt
+                traceback.print_exc()
+                self.counters.restore(guild_id, deltas)
+
     def multiply(self, contents):
         """
         Multiply contents[attr] in guild db by contents[amount] or,
@@ -1539,6 +2078,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         Note: can divide if ratio (e.g. 0.43) supplied as amount
         """
         try:
+            self.flush_counters(contents["gid"])
             with self.connect(contents["gid"]) as conn:
                 cur = conn.cursor()
                 cmd = "UPDATE {} SET {} = {} * {} WHERE id = {}".format(
@@ -1553,8 +2093,15 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         except:
             traceback.print_exc()
 
+        # after the commit: a lookup in between would re-cache the old value
+        if contents["attr"] == "clearance":
+            self.invalidate_clearance(contents["gid"], contents["uid"])
+
     def setval(self, contents):
         """Set <attr> for user <uid> = <amount>"""
+        # buffered increments must land before the new value is set
+        self.flush_counters(contents["gid"])
+
         with self.connect(contents["gid"]) as conn:
             try:
                 cur = conn.cursor()
@@ -1585,7 +2132,11 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             except:
                 traceback.print_exc()
 
-    def ub_addpoints(
+        # after the commit: a lookup in between would re-cache the old value
+        if contents["attr"] == "clearance":
+            self.invalidate_clearance(contents["gid"], contents["uid"])
+
+    async def ub_addpoints(
         self,
         gid,
         uid,
@@ -1593,6 +2144,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         cash_amount: Optional[float] = None,
         bank_amount: Optional[float] = None,
         member: Optional[discord.Member] = None,
+        priority: int = PRIORITY_NORMAL,
     ):
         """
         [dedicated method] Increment or decrement a user's balance (in UnbelievaBoat wallet).
@@ -1601,7 +2153,8 @@ class UserDataAccessor(commands.Cog, GlobalCog):
 
         If decrementing, pass in a negative number.
 
-        Issues a PATCH request to UnbelievaBoat's API.
+        Issues a PATCH request to UnbelievaBoat's API (see <self.ub>);
+        waits its turn in the rate limiter by <priority> (lower goes first).
         """
 
         if cash_amount is None and bank_amount is None:
@@ -1618,11 +2171,48 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             gid = member.guild.id
             uid = member.id
 
-        res = ub_patch(self.bot.user.id, gid, uid, data)
+        res = await self.ub.patch(
+            self.bot.user.id, gid, uid, data, priority=priority
+        )
         print(f"[ub_addpoints] JSON response:\n\n{res.text}\n\n")
         return res
 
-    def ub_setpoints(
+    def award_points(
+        self,
+        gid,
+        uid,
+        reason_for_action,
+        cash_amount: Optional[float] = None,
+        bank_amount: Optional[float] = None,
+        member: Optional[discord.Member] = None,
+    ):
+        """
+        Queue a balance increment (in UnbelievaBoat wallet) for the member.
+
+        Same arguments as <ub_addpoints()>, but awards for one member are
+        combined over <AWARD_COALESCE_WINDOW> seconds and sent as a single
+        PATCH by <flush_award_queue>. Use <ub_addpoints()> directly when the
+        response is needed.
+        """
+        if cash_amount is None and bank_amount is None:
+            print("[award_points] both bank_amount and cash_amount are None")
+            return
+
+        if isinstance(member, discord.Member):
+            gid = member.guild.id
+            uid = member.id
+
+        self.awards.add(gid, uid, reason_for_action, cash_amount, bank_amount)
+
+    async def send_award(self, gid, uid, cash, bank, reason):
+        """
+        Send one (combined) award for <self.awards>.
+        """
+        return await self.ub_addpoints(
+            gid, uid, reason, cash_amount=cash, bank_amount=bank, priority=PRIORITY_LOW
+        )
+
+    async def ub_setpoints(
         self,
         gid,
         uid,
@@ -1636,7 +2226,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
 
         Accepts a (discord.Member) object in place of <gid> & <uid>
 
-        Issues a PUT request to UnbelievaBoat's API.
+        Issues a PUT request to UnbelievaBoat's API (see <self.ub>).
         """
         if cash_amount is None and bank_amount is None:
             return None
@@ -1651,21 +2241,24 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             gid = member.guild.id
             uid = member.id
 
-        return ub_put(self.bot.user.id, gid, uid, data)
+        return await self.ub.put(self.bot.user.id, gid, uid, data)
 
-    def ub_getpoints(self, gid, uid, member: Optional[discord.Member] = None):
+    async def ub_getpoints(
+        self, gid, uid, member: Optional[discord.Member] = None
+    ):
         """
         [dedicated method] Retrieve user's current balance (in UnbelievaBoat wallet).
 
         Accepts a (discord.Member) object in place of <gid> & <uid>
 
-        Issues a GET request to UnbelievaBoat's API.
+        Issues a GET request to UnbelievaBoat's API (see <self.ub>).
         """
         if isinstance(member, discord.Member):
             gid = member.guild.id
             uid = member.id
 
-        return ub_get(self.bot.user.id, gid, uid)
+        # balance checks are interactive; don't queue behind point awards
+        return await self.ub.get(self.bot.user.id, gid, uid, priority=PRIORITY_HIGH)
 
     """================================"""
     """STUFF FOR                       """
@@ -1712,7 +2305,9 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 if not user_xp:
                     print("[can_levelup]: no xp data")
                     return False
-                user_xp = user_xp[0]
+                user_xp = self.with_pending(
+                    user_xp[0], str(message.guild.id), "udata", uid, xp
+                )
 
                 # query for user's current level
                 cur.execute("SELECT {} FROM udata WHERE id={}".format(level_type, uid))
@@ -1756,10 +2351,12 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             print("[levelup] ERROR:")
             traceback.print_exc()
 
-    def givepoints(self, message):
+    async def givepoints(self, message, features=None):
         """
         Primary client-side function to access the point distribution class;
 
+        <features>: the message's MessageFeatures, if the caller has them
+
         Note about 'flags':
             - it is a dict of point award enablers/disablers
             - naming is similar to distributor flags, for consistency
@@ -1794,11 +2391,13 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 return self.reset_negative_flags()
 
             # retrieve user's awarded points (get_points() = tuple)
-            a = self.distributor.get_points(message, self.pt_flags)
+            if features is None:
+                features = self.get_message_features(message)
+            a = self.distributor.get_points(message, self.pt_flags, features)
             awarded_points, awarded_xp = a
 
             # update/add xp
-            self.update("add", awarded_xp, "xp", message)
+            await self.aio.update("add", awarded_xp, "xp", message)
 
             # update/add points--
             #   - value of calculated <awarded_points> must be at least 2
@@ -1810,7 +2409,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             #     for the base amount (1 points) awarded per message,
             #     which the UB bot already awards for.
             if awarded_points >= 2.0:
-                self.ub_addpoints(
+                self.award_points(
                     None,
                     None,
                     "Msg-based point award.",
@@ -1828,7 +2427,7 @@ class UserDataAccessor(commands.Cog, GlobalCog):
             print("[givepoints() error]:")
             traceback.print_exc()
 
-    def award_stream_points(
+    async def award_stream_points(
         self,
         stream_time_seconds,
         member: discord.Member,
@@ -1845,13 +2444,13 @@ class UserDataAccessor(commands.Cog, GlobalCog):
 
             # give points (and XP, if applicable)
             if xp_on:
-                self.update("add", awarded_points, "xp", None, member=member)
+                await self.aio.update("add", awarded_points, "xp", None, member=member)
 
             # ADDING POINTS TO USER'S BALANCE
             # (1 Sep. 2021):
             #   - commented out "self.update(...)", replaced with "self.ub_addpoints(...)"
             # self.update('add', awarded_points, 'points', None, member=member)
-            return self.ub_addpoints(
+            self.award_points(
                 None,
                 None,
                 "Points for stream activity.",
@@ -1867,14 +2466,17 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         """
         Helper method for saving userdata files.
 
-        NOTE: this routine currently uses the `shutil` built-in Python
-        library for copying userdata file(s).
+        NOTE: this routine uses SQLite's online backup API rather than a
+        plain file copy; in WAL mode recent commits may still live in the
+        "-wal" file, which a copy of the main file alone would miss.
         """
+        # make sure buffered increments are part of the backup
+        self.flush_counters()
+
         for file in os.listdir(os_join(os.getcwd(), self.FOLDER)):
 
-            # only make backups of non-backup files
-            # assumption is the file ends with ".sqlite3" (UserDataAccessor.EXT_NAME)
-            if not file.endswith(".backup"):
+            # only make backups of db files (skips ".backup", "-wal", "-shm")
+            if file.endswith(self.EXT_NAME):
 
                 # we can convert to the appropriate timezone externally if needed
                 timestamp = datetime.datetime.now(timezone.utc)
@@ -1885,8 +2487,63 @@ class UserDataAccessor(commands.Cog, GlobalCog):
                 f += timestamp.strftime(" %Y:%m:%d-%H:%M:%S-%Z") + ".backup"
                 fname = os_join(self.FOLDER, f)
 
-                # make new backup copy
-                shutil.copy2(os_join(self.FOLDER, file), fname)
+                # make new backup copy (consistent snapshot incl. the WAL)
+                gid = file[: -len(self.EXT_NAME)]
+                dest = sql3_connect(fname)
+                try:
+                    with self.connect(gid) as conn:
+                        conn.backup(dest)
+                finally:
+                    dest.close()
+
+    # looping task for closing connections that have sat idle too long
+    @tasks.loop(seconds=60.0)
+    async def evict_idle_connections(self):
+        await self.aio.write(self.pool.evict_idle)
+
+    # looping task for folding WAL files back into the guild databases;
+    # PASSIVE never blocks the other bot's readers or writers
+    @tasks.loop(minutes=10.0)
+    async def checkpoint_wal(self):
+        await self.aio.write(self.pool.checkpoint, "PASSIVE")
+
+    # looping task for sending coalesced point awards to UnbelievaBoat
+    @tasks.loop(seconds=1.0)
+    async def flush_award_queue(self):
+        await self.awards.flush()
+
+    @flush_award_queue.before_loop
+    async def before_flush_award_queue(self):
+        # the bot's user ID is needed to pick the UB token
+        await self.bot.wait_until_ready()
+
+    # looping task for picking up zone changes made by the other bot
+    # (both bots share the guild databases)
+    @tasks.loop(seconds=60.0)
+    async def reload_zones(self):
+        for gid in list(self.zones):
+            index = self.zones[gid]
+            version = index.version
+            entries = await self.aio.write(self.fetch_zone_entries, gid)
+
+            # the rows may predate a designation change made on the loop
+            # meanwhile (the index is newer then); the next reload gets them
+            if entries is None or self.zones.get(gid) is not index:
+                continue
+            if index.version == version:
+                self.swap_zone_index(gid, entries)
+
+    # looping task for writing sampled activity records to the log file
+    @tasks.loop(seconds=5.0)
+    async def flush_activity_log(self):
+        if self.activity.pending:
+            await self.bot.loop.run_in_executor(None, self.activity.flush)
+
+    # looping task for writing buffered counter increments to the DB
+    # (on the writer thread, ordered with setval/multiply/DELETE_USER)
+    @tasks.loop(seconds=5.0)
+    async def flush_counter_buffer(self):
+        await self.aio.write(self.flush_counters)
 
     # looping task for autosaving user data
     @tasks.loop(minutes=360.0)  # every 6 hrs.
@@ -1917,6 +2574,152 @@ class UserDataAccessor(commands.Cog, GlobalCog):
         """
         self.userdata_backup_helper()
 
+    @uda.command("stats", hidden=True)
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def uda_stats(self, ctx):
+        """
+        Show internal accessor statistics (e.g. database connection pool usage).
+        """
+        pool = self.pool.get_stats()
+        lines = [
+            "[connection pool]",
+            f"opened: {pool['opened']}, reused: {pool['reused']}, "
+            f"closed: {pool['closed']}, idle: {pool['idle']} "
+            f"({pool['keys']} guilds)",
+            "[counter buffer]",
+            f"pending: {self.counters.pending}",
+            "[award queue]",
+            "awards: {awards_in}, patches: {patches_out}, "
+            "coalescing ratio: {coalescing_ratio:.2f}, queue depth: "
+            "{queue_depth} members ({pending_awards} awards), "
+            "failures: {failures}".format(**self.awards.get_stats()),
+            "[ub rate limiter]",
+            "granted: {granted}, queued: {queued}, 429 penalties: {penalties}, "
+            "max wait: {max_wait:.2f}s".format(**self.ub.limiter.get_stats()),
+            "[db executor]",
+            "writes: {writes}, reads: {reads}, pending: {pending}, "
+            "reader pools: {reader_pools}".format(**self.aio.executor.get_stats()),
+            "[event loop lag]",
+            "p50: {p50:.1f} ms, p99: {p99:.1f} ms, max: {max:.1f} ms, "
+            "worst since start: {worst:.1f} ms".format(
+                **{k: v * 1000 for k, v in self.loop_lag.get_stats().items()}
+            ),
+            "[activity log]",
+            "seen: {seen}, recorded: {recorded}, written: {written}, "
+            "pending: {pending}".format(**self.activity.get_stats()),
+            "[message features]",
+            "hits: {hits}, misses: {misses}, hit rate: {hit_rate:.2f}, "
+            "cached: {cached}".format(**self.features.get_stats()),
+            "[delayed awards]",
+            "pending: {pending}, max pending: {max_pending}, scheduled: "
+            "{scheduled}, deduped: {deduped}, runs: {runs}, errors: "
+            "{errors}".format(**self.delayed.get_stats()),
+            "[message fetch cache]",
+            "hits: {hits}, joined: {joined}, fetches: {fetches}, "
+            "hit ratio: {hit_ratio:.2f}, errors: {errors}, evictions: "
+            "{evictions}, cached: {cached}".format(**self.messages.get_stats()),
+            "[point rules]",
+            "reloads: {reloads}, guild overrides: {guild_overrides}".format(
+                **self.distributor.rules.get_stats()
+            ),
+            "[clearance cache]",
+            "hits: {hits}, negative hits: {negative_hits}, misses: {misses}, "
+            "hit rate: {hit_rate:.2f}, invalidations: {invalidations}, "
+            "cached: {cached}".format(**self.clearances.get_stats()),
+            "[role index]",
+            "guilds: {guilds}, roles: {roles}, builds: {builds}, "
+            "updates: {updates}".format(**self.role_indexes.get_stats()),
+            "[known users]",
+            f"guilds: {len(self.known_users)}, users: "
+            f"{sum(len(i) for i in self.known_users.values())}, ~"
+            f"{sum(i.nbytes() for i in self.known_users.values()) // 1024} KiB",
+        ]
+        await ctx.reply("```{}```".format("\n".join(lines)))
+
+    @uda.command("activity", hidden=True)
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def uda_activity(
+        self, ctx, member: Optional[discord.Member] = None, limit: int = 10
+    ):
+        """
+        Show the most recent recorded activity in this guild
+        (optionally only for <member>), newest first.
+        """
+        uid = None if member is None else member.id
+        records = self.activity.recent(ctx.guild.id, uid, limit=min(limit, 25))
+        if not records:
+            await ctx.reply("No recent activity recorded.")
+            return
+
+        lines = []
+        for rec in records:
+            when = datetime.datetime.fromtimestamp(rec.time, timezone.utc)
+            where = f" in <#{rec.channel}>" if rec.channel else ""
+            lines.append(
+                f"`{when:%Y-%m-%d %H:%M:%S}` <@{rec.uid}> {rec.kind}{where}"
+            )
+        await ctx.reply(
+            "\n".join(lines), allowed_mentions=discord.AllowedMentions.none()
+        )
+
 
 def setup(bot):
     bot.add_cog(UserDataAccessor(bot))
+
+
+# benchmark below:
+# bulk_add_users() against a synthetic 100k-member guild
+# (run from the repo root: "python -m cogs.userdata_accessor")
+if __name__ == "__main__":
+    import tempfile
+    from types import SimpleNamespace
+
+    N_MEMBERS = 100_000
+    GID = "1"
+
+    UserDataAccessor.FOLDER = tempfile.mkdtemp()
+    acc = UserDataAccessor(commands.Bot(command_prefix="!"))
+    acc.make_new(GID)
+
+    # no gateway connection: serve the guild's roles from a stand-in
+    verified_role = SimpleNamespace(id=11, name=roles.VERIFIED_MEMBER, position=1)
+    guild = SimpleNamespace(
+        id=int(GID), roles=[verified_role], get_role={11: verified_role}.get
+    )
+    acc.role_indexes.get_guild = lambda gid: guild
+    verified = [verified_role]
+
+    def synthetic_members():
+        # generator: the import never holds all 100k members at once
+        for i in range(N_MEMBERS):
+            yield SimpleNamespace(
+                id=10 ** 17 + i,
+                name=f"member'{i}",  # quote: the old string-built INSERT broke here
+                discriminator=f"{i % 10000:04d}",
+                bot=i % 100 == 0,
+                roles=verified if i % 5 < 3 else [],
+                _roles={11} if i % 5 < 3 else set(),
+            )
+
+    t0 = time.perf_counter()
+    added = acc.bulk_add_users(GID, synthetic_members())
+    elapsed = time.perf_counter() - t0
+
+    with acc.connect(GID) as conn:
+        n_udata = conn.execute("SELECT count(*) FROM udata").fetchone()[0]
+        n_unverified = conn.execute(
+            "SELECT count(*) FROM unverified_users"
+        ).fetchone()[0]
+
+    print(f"bulk_add_users, {N_MEMBERS} members:")
+    print(f"  {added} rows in {elapsed:.2f}s  ({added / elapsed:,.0f} rows/s)")
+    print(f"  udata: {n_udata}, unverified_users: {n_unverified}")
+    assert added == n_udata
+
+    # second run: everyone is known, nothing is written
+    t0 = time.perf_counter()
+    assert acc.bulk_add_users(GID, synthetic_members()) == 0
+    print(f"  re-run (all known): {time.perf_counter() - t0:.2f}s")
+    acc.cog_unload()
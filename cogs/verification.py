@@ -20,7 +20,12 @@ class Verification(commands.Cog, GlobalCog):
         self.action_types = {"message": "message_pass", "reaction": "reaction_pass"}
 
     async def verify_if_able(
-        self, gid: str, uid: str, action_type: str, attachment: str = None
+        self,
+        gid: str,
+        uid: str,
+        action_type: str,
+        attachment: str = None,
+        features=None,
     ):
         """
         If user <uid> for the guild <gid> has passed all verification prerequisites (via flags/attribs),
@@ -30,39 +35,46 @@ class Verification(commands.Cog, GlobalCog):
             - remove user entry from <unverified_users> table
 
         The <action_type> variable must either be "message" or "reaction" (for now).
+
+        For "message", pass the message's MessageFeatures as <features> if
+        available (otherwise its text as <attachment>).
         """
         if action_type == "message" and (
-            attachment and self.check_intro_message(attachment)
+            self.check_intro_message(attachment, features)
         ):
             # update user's msg flag
-            self.give_credit(gid, uid, action_type)
+            await self.give_credit(gid, uid, action_type)
 
         elif action_type == "reaction":
             # update user's reaction flag
-            self.give_credit(gid, uid, action_type)
+            await self.give_credit(gid, uid, action_type)
 
         else:
             raise Exception("Unrecognized action type '{}'".format(action_type))
 
         # verify user if all prerequisites fulfilled
-        if self.check_verification_prereqs(gid, uid):
+        if await self.check_verification_prereqs(gid, uid):
+            # get UserDataAccessor cog currently in use
+            accessor = self.bot.get_cog("UserDataAccessor")
+
             guild = self.bot.get_guild(int(gid))
-            role = discord.utils.get(guild.roles, name=roles.VERIFIED_MEMBER)
+            role = accessor.fetch_role(roles.VERIFIED_MEMBER, gid, guild)
             member = guild.get_member(int(uid))
 
             # give user the "Verified" role
             await member.add_roles(role)
 
-            # get UserDataAccessor cog currently in use
-            accessor = self.bot.get_cog("UserDataAccessor")
-
             # update "member_status" attrib.
-            accessor.update("set", "verified", "member_status", None, member=member)
+            await accessor.aio.update(
+                "set", "verified", "member_status", None, member=member
+            )
 
             # remove user entry from "unverified_users" table
-            accessor.remove_user_from_unverified(gid, uid, status_already_set=True)
+            await accessor.aio.remove_user_from_unverified(
+                gid, uid, status_already_set=True
+            )
 
-    def give_credit(self, gid: str, uid: str, action_type: str):
+    async def give_credit(self, gid: str, uid: str, action_type: str):
         """
         Updates the value of an attrib. associated with <action_type> in "unverified_users" table.
 
@@ -82,7 +94,7 @@ class Verification(commands.Cog, GlobalCog):
 
             # print( f"giving credit for {action_type}" )
 
-            accessor.update(
+            await accessor.aio.update(
                 "set",
                 1,
                 self.action_types[action_type],
@@ -93,13 +105,17 @@ class Verification(commands.Cog, GlobalCog):
             return True
         return False
 
-    def check_intro_message(self, text: str):
+    def check_intro_message(self, text: str, features=None):
         """
         Return True if provided <text> meets all criteria for a sufficient intro message.
+
+        <text> is not used if the message's MessageFeatures are given (<features>).
         """
-        return (len(text) > 20) and (len(text.split(" ")) > 2)
+        if features is not None:
+            return (features.clean_length > 20) and (features.word_count > 2)
+        return bool(text) and (len(text) > 20) and (len(text.split(" ")) > 2)
 
-    def check_verification_prereqs(self, gid: str, uid: str):
+    async def check_verification_prereqs(self, gid: str, uid: str):
         """
         Helper method for <verify_if_able()>.
 
@@ -112,13 +128,17 @@ class Verification(commands.Cog, GlobalCog):
         accessor = self.bot.get_cog("UserDataAccessor")
 
         # only proceed if first flag is true
-        flag1 = accessor.get_attr("message_pass", gid, uid, table="unverified_users")
+        flag1 = await accessor.aio.get_attr(
+            "message_pass", gid, uid, table="unverified_users"
+        )
         # print( f"flag1={flag1}, type={type(flag1)}" )
         if not flag1:
             return False
 
         # last flag value determines if all prereqs. fulfilled
-        flag2 = accessor.get_attr("reaction_pass", gid, uid, table="unverified_users")
+        flag2 = await accessor.aio.get_attr(
+            "reaction_pass", gid, uid, table="unverified_users"
+        )
         # print( f"flag2={flag2}, type={type(flag2)}" )
         return bool(flag2) or False
 
@@ -128,21 +148,20 @@ class Verification(commands.Cog, GlobalCog):
         accessor = self.bot.get_cog("UserDataAccessor")
 
         if message.guild is not None:
-            is_intro_channel = accessor.is_channel(
-                "introductions", str(message.guild.id), str(message.channel.id)
-            )
+            features = await accessor.aio.message_features(message)
 
             # only parse msg if msg in "intro" channel AND user doesn't have "Verified" role
-            if is_intro_channel and (
-                discord.utils.get(message.author.roles, name=roles.VERIFIED_MEMBER)
-                is None
+            if "introductions" in features.zones and not (
+                accessor.get_role_index(
+                    str(message.guild.id), message.guild
+                ).member_has(message.author, roles.VERIFIED_MEMBER)
             ):
                 # check message criteria and verify if needed
                 await self.verify_if_able(
                     str(message.guild.id),
                     str(message.author.id),
                     "message",
-                    message.clean_content,
+                    features=features,
                 )
 
     @commands.Cog.listener()
@@ -163,7 +182,7 @@ class Verification(commands.Cog, GlobalCog):
         # (side note: "if" indentation is based on PEP8, in case it looks wonky)
         if (
             payload.guild_id
-            and accessor.is_channel(
+            and await accessor.aio.is_channel(
                 "rules", str(payload.guild_id), str(payload.channel_id)
             )
             and not member.bot
@@ -192,15 +211,15 @@ class Verification(commands.Cog, GlobalCog):
             gid = str(ctx.guild.id)
             if uid is None or uid == "self":
                 uid = str(ctx.author.id)
-            status = accessor.get_attr("member_status", gid, uid)
+            status = await accessor.aio.get_attr("member_status", gid, uid)
 
             # if status is "unverified," attempt to get details from <unverified_users>
             description = status
             if status == "unverified":
-                has_reacted = accessor.get_attr(
+                has_reacted = await accessor.aio.get_attr(
                     "reaction_pass", gid, uid, table="unverified_users"
                 )
-                has_intro = accessor.get_attr(
+                has_intro = await accessor.aio.get_attr(
                     "message_pass", gid, uid, table="unverified_users"
                 )
 
@@ -240,7 +259,7 @@ class Verification(commands.Cog, GlobalCog):
         !remove_from_unverified @Koyorin
         """
         accessor = self.bot.get_cog("UserDataAccessor")
-        accessor.remove_user_from_unverified(str(ctx.guild.id), str(user.id))
+        await accessor.aio.remove_user_from_unverified(str(ctx.guild.id), str(user.id))
         await self.react_success(ctx)
 
     @commands.command("unverify", aliases=["uv"], hidden=True)
@@ -262,7 +281,7 @@ class Verification(commands.Cog, GlobalCog):
         """
         try:
             accessor = self.bot.get_cog("UserDataAccessor")
-            role = discord.utils.get(ctx.guild.roles, name="Verified")
+            role = accessor.fetch_role("Verified", str(ctx.guild.id), ctx.guild)
             member = ctx.guild.get_member(int(userid))
 
             if (not member) or (not role):
@@ -273,7 +292,7 @@ class Verification(commands.Cog, GlobalCog):
                 await member.remove_roles(role)
 
                 # set the member status in primary userdata table
-                accessor.update(
+                await accessor.aio.update(
                     "set", "unverified", "member_status", None, member=member
                 )
             except:
@@ -284,7 +303,7 @@ class Verification(commands.Cog, GlobalCog):
             # parse <options> for extra actions to take
             if options and (options == "-u"):
                 try:
-                    accessor.add_user_to_unverified(str(ctx.guild.id), userid)
+                    await accessor.aio.add_user_to_unverified(str(ctx.guild.id), userid)
                 except:
                     raise commands.CommandError(
                         "Error while trying to add user to 'unverified_users' table. Aborting."
@@ -308,14 +327,16 @@ class Verification(commands.Cog, GlobalCog):
         !verify @User64
         """
         accessor = self.bot.get_cog("UserDataAccessor")
-        role = discord.utils.get(ctx.guild.roles, name=roles.VERIFIED_MEMBER)
+        role = accessor.fetch_role(roles.VERIFIED_MEMBER, str(ctx.guild.id), ctx.guild)
 
         # just add entry in db if user not in there yet
-        accessor.ADD_USER(str(ctx.guild.id), str(member.id))
+        await accessor.aio.ADD_USER(str(ctx.guild.id), str(member.id))
 
         if role and (role not in member.roles):
             await member.add_roles(role)
-            accessor.remove_user_from_unverified(str(ctx.guild.id), str(member.id))
+            await accessor.aio.remove_user_from_unverified(
+                str(ctx.guild.id), str(member.id)
+            )
             await react_success(ctx)
 
         elif role is None:
@@ -46,15 +46,15 @@ class Utility(commands.Cog, GlobalCog):
     @GlobalCog.no_points()
     @commands.guild_only()
     @commands.is_owner()
-    async def init_db(self, ctx, max_users=1500):
+    async def init_db(self, ctx, max_users: Optional[int] = None):
         """
         WARNING: USE THIS SPARINGLY (PREFERABLY ONCE)
 
         USE THIS WHEN FIRST GETTING THE DATABASE SETUP FOR
         ALL (or <max_users>) IN YOUR SERVER.
 
-        THIS WILL SCAN <max_users> USERS FOR THE "Verified" ROLE,
-        AND UPDATE THIS STATUS IN THE DATABASE.
+        THIS WILL SCAN <max_users> USERS (default: everyone) FOR THE
+        "Verified" ROLE, AND UPDATE THIS STATUS IN THE DATABASE.
         """
 
         # first check to ensure the "busy" (long_process_active) flag isn't already set
@@ -66,24 +66,14 @@ class Utility(commands.Cog, GlobalCog):
         # commence main operation now
         try:
             acc = self.accessor_mirror
-            add_user = acc.ADD_USER
             gid = str(ctx.guild.id)
-            counter = 0
-            max_users = min(max_users, 1500)  # hard-coded limit
-            for member in ctx.guild.members:
-
-                # add user to the database for this given server
-                #
-                # NOTE (for <except> clause):
-                # - if using 'continue':    scans >= max_users; (no increment on error)
-                # - if using 'pass':        scans <= max_users; (increments on error)
-                if counter >= max_users:
-                    break
-                try:
-                    acc.ADD_USER(gid, str(member.id))
-                except:
-                    pass
-                counter += 1
+            members = ctx.guild.members
+            if max_users is not None:
+                members = members[:max_users]
+
+            # one bulk transaction on the accessor's writer thread
+            added = await acc.aio.bulk_add_users(gid, members)
+            print(f"[init_db] {added} new users added ({len(members)} scanned)")
 
             await react_success(ctx)
 
@@ -132,42 +122,56 @@ class Utility(commands.Cog, GlobalCog):
             except:
                 pass
 
-            # connect and execute an update
-            with mirror.connect(gid) as conn:
-                cur = conn.cursor()
+            # CASE 3 (specific user): resolve the member up front, since the
+            # DB work below runs on the accessor's writer thread
+            if user not in ("all", "column"):
+                convert_class = commands.MemberConverter()
+                user = await convert_class.convert(ctx, user)
 
-                # CASE 1: if user == 'all', apply change to all users
-                if user == "all":
-                    userlist = ctx.guild.members
-                    cmd = "UPDATE " + table + " SET {} = {} WHERE id={}"
-                    execute = cur.execute
-                    cfmt = cmd.format
+                # tmp = ctx.guild.get_member(user)
+                # if tmp and not tmp.bot: user = str(tmp.id)
+                # else: user = mirror.validate_gamertag(user, gid, uid)
 
-                    for u in userlist:
-                        execute(cfmt(attr, val, str(u.id)))
+            userlist = ctx.guild.members if user == "all" else None
 
-                # CASE 2: updating an entire column
-                elif user == "column":
-                    cmd = "UPDATE {} SET ? = ?".format(table)
-                    cur.execute(cmd, (attr, val))
+            def apply_setval():
+                # buffered increments must land before values are overwritten
+                mirror.flush_counters(gid)
 
-                # CASE 3: if user is a specific user
-                else:
-                    convert_class = commands.MemberConverter()
-                    user = await convert_class.convert(ctx, user)
+                # connect and execute an update
+                with mirror.connect(gid) as conn:
+                    cur = conn.cursor()
+
+                    # CASE 1: if user == 'all', apply change to all users
+                    if user == "all":
+                        cmd = "UPDATE " + table + " SET {} = {} WHERE id={}"
+                        execute = cur.execute
+                        cfmt = cmd.format
+
+                        for u in userlist:
+                            execute(cfmt(attr, val, str(u.id)))
 
-                    # tmp = ctx.guild.get_member(user)
-                    # if tmp and not tmp.bot: user = str(tmp.id)
-                    # else: user = mirror.validate_gamertag(user, gid, uid)
+                    # CASE 2: updating an entire column
+                    elif user == "column":
+                        cmd = "UPDATE {} SET ? = ?".format(table)
+                        cur.execute(cmd, (attr, val))
 
-                    if user is not None:
+                    # CASE 3: if user is a specific user
+                    elif user is not None:
                         cmd = "UPDATE {} SET {} = {} WHERE id={}".format(
                             table, attr, val, str(user.id)
                         )
                         cur.execute(cmd)
 
-                conn.commit()
-                await react_success(ctx)
+                    conn.commit()
+
+                # write-through: drop cached clearance levels that changed
+                if table == "udata" and attr == "clearance":
+                    one_user = user not in ("all", "column")
+                    mirror.invalidate_clearance(gid, user.id if one_user else None)
+
+            await mirror.aio.write(apply_setval)
+            await react_success(ctx)
         except:
             traceback.print_exc()
             await react_fail(ctx)
@@ -236,7 +240,7 @@ class Utility(commands.Cog, GlobalCog):
         uda = self.bot.get_cog("UserDataAccessor")
 
         # restrict this command to bot_operator_zone only
-        if not uda.is_channel(
+        if not await uda.aio.is_channel(
             "bot_operator_zone", str(ctx.guild.id), str(ctx.channel.id)
         ):
             raise commands.CommandError(
@@ -257,6 +261,7 @@ class Utility(commands.Cog, GlobalCog):
             options = options.split(" ")
         args = parser.parse_args(options)
         gid = str(ctx.guild.id)
+        zones = await uda.aio.zone_index(gid)
         zone_list, channels_list, n_list, fmt_list, = (
             [],
             [],
@@ -268,16 +273,16 @@ class Utility(commands.Cog, GlobalCog):
         if args.registered:
             zone_list = []
 
-            for zone_name in uda.zones[gid]:
-                if uda.zones[gid][zone_name] not in {"", "n/a", None}:
+            for zone_name in zones:
+                if zones.is_set(zone_name):
                     zone_list.append(zone_name)
         else:
-            zone_list = [z for z in uda.zones[gid]]
+            zone_list = [z for z in zones]
 
         for zone in zone_list:
 
             # get channel IDs listed per zone (for convenience)
-            ids = (uda.zones[gid][zone] or "").split(",")
+            ids = sorted(zones.channels(zone))
 
             # CHECK: "-i" flag -- get channel mentions
             if args.identities:
@@ -341,8 +346,8 @@ class Utility(commands.Cog, GlobalCog):
         # get the UDA (UserDataAccessor) cog
         uda = self.bot.get_cog("UserDataAccessor")
 
-        if zone_name in uda.zones[str(ctx.guild.id)]:
-            CL = uda.check_clearance(str(ctx.guild.id), str(ctx.author.id))
+        if zone_name in await uda.aio.zone_index(str(ctx.guild.id)):
+            CL = await uda.aio.check_clearance(str(ctx.guild.id), str(ctx.author.id))
 
             # only admins with CL7+ can set the "introductions" zone.
             # NOTE: this limit applies even if the
@@ -362,7 +367,9 @@ class Utility(commands.Cog, GlobalCog):
             try:
                 if text_channel is None:
                     text_channel = ctx.channel
-                uda.set_designation(str(ctx.guild.id), zone_name, str(text_channel.id))
+                await uda.aio.set_designation(
+                    str(ctx.guild.id), zone_name, str(text_channel.id)
+                )
                 await react_success(ctx)
             except:
                 traceback.print_exc()
@@ -404,7 +411,7 @@ class Utility(commands.Cog, GlobalCog):
         """
 
         uda = self.bot.get_cog("UserDataAccessor")
-        is_valid_name = uda.get_designation_channel_id(
+        is_valid_name = await uda.aio.get_designation_channel_id(
             str(ctx.guild.id), zone_name.lower()
         )
 
@@ -432,32 +439,35 @@ class Utility(commands.Cog, GlobalCog):
         channel_id = str(channel_id)
         gid = str(ctx.guild.id)
 
-        # ALL zones specified
-        if zone_name == "all":
+        def clear_zones():
+            # ALL zones specified
+            if zone_name == "all":
 
-            # clear ALL entries for ALL zones
-            if channel_id == "all":
-                for zone in uda.zones[gid]:
-                    uda.set_designation(gid, zone, "", overwrite=True)
+                # clear ALL entries for ALL zones
+                if channel_id == "all":
+                    for zone in list(uda.get_zone_index(gid)):
+                        uda.set_designation(gid, zone, "", overwrite=True)
 
-            else:
-                # remove the specified channel ID for ALL zones if it's found
-                for zone in uda.zones[gid]:
-                    uda.remove_designation(gid, zone_name, channel_id)
+                else:
+                    # remove the specified channel ID for ALL zones if it's found
+                    for zone in list(uda.get_zone_index(gid)):
+                        uda.remove_designation(gid, zone, channel_id)
 
-        # one (1) zone specified
-        else:
+            # one (1) zone specified
+            else:
 
-            # clear ALL entries for one (1) zone
-            if channel_id == "all":
-                uda.set_designation(gid, zone_name, "", overwrite=True)
+                # clear ALL entries for one (1) zone
+                if channel_id == "all":
+                    uda.set_designation(gid, zone_name, "", overwrite=True)
 
-            # clear one (1) entry for one (1) zone
-            else:
-                uda.remove_designation(
-                    gid, zone_name, channel_id, is_channel_bypass=True
-                )
+                # clear one (1) entry for one (1) zone
+                else:
+                    uda.remove_designation(
+                        gid, zone_name, channel_id, is_channel_bypass=True
+                    )
 
+        # (one writer-thread job, so the zones change together)
+        await uda.aio.write(clear_zones)
         await react_success(ctx)
 
     # dzone add
@@ -489,11 +499,13 @@ class Utility(commands.Cog, GlobalCog):
             args = parser.parse_args(options)
 
             # add specified zone <zone_name>
-            uda.add_designation_category(str(ctx.guild.id), zone_name, limit=args.limit)
+            await uda.aio.add_designation_category(
+                str(ctx.guild.id), zone_name, limit=args.limit
+            )
 
         # route 2: (default) no options specified
         else:
-            uda.add_designation_category(str(ctx.guild.id), zone_name)
+            await uda.aio.add_designation_category(str(ctx.guild.id), zone_name)
 
         await react_success(ctx)
 
@@ -507,7 +519,7 @@ class Utility(commands.Cog, GlobalCog):
         Zone tool to manually reload/refresh all zones for the guild if needed.
         """
         uda = self.bot.get_cog("UserDataAccessor")
-        uda.load_zone_entries(str(ctx.guild.id))
+        await uda.aio.load_zone_entries(str(ctx.guild.id))
         await react_success(ctx)
 
     @commands.command("grant_self_clearance", hidden=True)
@@ -520,12 +532,18 @@ class Utility(commands.Cog, GlobalCog):
         """
         try:
             if level >= 0 and level <= self.max_clearance_level:
+                mirror = self.accessor_mirror
                 gid = str(ctx.guild.id)
-                with self.accessor_mirror.connect(gid) as conn:
-                    cur = conn.cursor()
-                    cmd = "UPDATE udata SET clearance=? WHERE id=?"
-                    cur.execute(cmd, (level, str(ctx.author.id)))
-                    conn.commit()
+
+                def apply_clearance():
+                    with mirror.connect(gid) as conn:
+                        cur = conn.cursor()
+                        cmd = "UPDATE udata SET clearance=? WHERE id=?"
+                        cur.execute(cmd, (level, str(ctx.author.id)))
+                        conn.commit()
+                    mirror.invalidate_clearance(gid, ctx.author.id)
+
+                await mirror.aio.write(apply_clearance)
                 await react_success(ctx)
             else:
                 await react_fail(ctx)
@@ -559,75 +577,74 @@ class Utility(commands.Cog, GlobalCog):
         if member.id == ctx.author.id:
             return
 
-        # get clearance data and close DB connection afterwards
+        # get clearance data (cached; see UserDataAccessor.get_clearance())
         acc = self.accessor_mirror
-        author_clearance, user_clearance = None, None
-        with acc.connect(str(ctx.guild.id)) as conn:
-            cur = conn.cursor()
-
-            # retrieve YOUR clearance level
-            cur.execute("SELECT clearance FROM udata where id=?", (str(ctx.author.id),))
-            author_clearance = cur.fetchone()
-            if author_clearance:
-                author_clearance = float(author_clearance[0])
-            else:
-                raise commands.CommandError(
-                    "Requester's clearance level could not be retrieved."
-                )
+        gid = str(ctx.guild.id)
 
-            # if YOUR clearance level  <=  <level>: return
-            if author_clearance <= level:
-                return
+        # retrieve YOUR clearance level
+        author_clearance = await acc.aio.get_clearance(gid, str(ctx.author.id))
+        if author_clearance is not None:
+            author_clearance = float(author_clearance)
+        else:
+            raise commands.CommandError(
+                "Requester's clearance level could not be retrieved."
+            )
 
-            # retrieve USER's clearance level
-            cur.execute("SELECT clearance FROM udata where id=?", (str(member.id),))
-            user_clearance = cur.fetchone()
-            if user_clearance:
-                user_clearance = float(user_clearance[0])
-            else:
-                raise commands.CommandError(
-                    "Requester's clearance level could not be retrieved."
-                )
+        # if YOUR clearance level  <=  <level>: return
+        if author_clearance <= level:
+            return
 
-            # checking to ensure target user is "Verified":
-            verif_role = discord.utils.get(ctx.guild.roles, name=roles.VERIFIED_MEMBER)
-            if verif_role is not None:
-                if (user_clearance < 1) and (verif_role not in member.roles):
-                    raise commands.CommandError(
-                        "Error: target user unverified. Clearance can only be given to Verified members."
-                    )
-            else:
-                raise commands.CommandError("The 'Verified' role could not be found.")
-
-            # (edge case) deny clearance PROMOTION if user is unverified and has a CL >= 1
-            if (
-                (verif_role not in member.roles)
-                and (user_clearance >= 1)
-                and (level > user_clearance)
-            ):
+        # retrieve USER's clearance level
+        user_clearance = await acc.aio.get_clearance(gid, str(member.id))
+        if user_clearance is not None:
+            user_clearance = float(user_clearance)
+        else:
+            raise commands.CommandError(
+                "Requester's clearance level could not be retrieved."
+            )
+
+        # checking to ensure target user is "Verified":
+        role_index = acc.get_role_index(gid, ctx.guild)
+        verified = role_index.member_has(member, roles.VERIFIED_MEMBER)
+        if role_index.get(roles.VERIFIED_MEMBER) is not None:
+            if (user_clearance < 1) and not verified:
                 raise commands.CommandError(
-                    "Action denied. Please contact an admin as "
-                    "the target user is **unverified**, but has a (CL)earance "
-                    "**greater than 0**, which is not allowed for **unverified** users.\n\n"
-                    "Tip: use `!verify_status <userid>` to see target user's (CL)earance."
+                    "Error: target user unverified. Clearance can only be given to Verified members."
                 )
+        else:
+            raise commands.CommandError("The 'Verified' role could not be found.")
 
-            # (normal)  if user's clearance level  >=  <level>: return
-            # (force)   needs to be "-f" or "--force" to force demotion of clearance
-            if user_clearance >= level:
-                if (force is None) or (force not in ("-f", "--force")):
-                    return
+        # (edge case) deny clearance PROMOTION if user is unverified and has a CL >= 1
+        if (not verified) and (user_clearance >= 1) and (level > user_clearance):
+            raise commands.CommandError(
+                "Action denied. Please contact an admin as "
+                "the target user is **unverified**, but has a (CL)earance "
+                "**greater than 0**, which is not allowed for **unverified** users.\n\n"
+                "Tip: use `!verify_status <userid>` to see target user's (CL)earance."
+            )
 
-            # do not allow a multi-level clearance grant unless *force* enabled
-            if level - user_clearance > 1:
-                if (force is None) or (force not in ("-f", "--force")):
-                    return
+        # (normal)  if user's clearance level  >=  <level>: return
+        # (force)   needs to be "-f" or "--force" to force demotion of clearance
+        if user_clearance >= level:
+            if (force is None) or (force not in ("-f", "--force")):
+                return
 
-            # proceed with granting clearance
-            cur.execute(
-                "UPDATE udata SET clearance=? WHERE id=?", (level, str(member.id))
-            )
-            conn.commit()
+        # do not allow a multi-level clearance grant unless *force* enabled
+        if level - user_clearance > 1:
+            if (force is None) or (force not in ("-f", "--force")):
+                return
+
+        # proceed with granting clearance
+        def apply_clearance():
+            with acc.connect(gid) as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE udata SET clearance=? WHERE id=?", (level, str(member.id))
+                )
+                conn.commit()
+            acc.invalidate_clearance(gid, member.id)
+
+        await acc.aio.write(apply_clearance)
         await react_success(ctx)
 
     @commands.command("resetstats", hidden=True)
@@ -643,9 +660,10 @@ class Utility(commands.Cog, GlobalCog):
             mirror = GlobalCog.accessor_mirror
             gid = str(ctx.guild.id)
             uid = str(ctx.author.id)
-            status_string = "unverified"
 
-            if user is not None:
+            def reset_stats():
+                status_string = "unverified"
+                mirror.flush_counters(gid)
                 with mirror.connect(gid) as conn:
                     cur = conn.cursor()
 
@@ -658,6 +676,7 @@ class Utility(commands.Cog, GlobalCog):
                     # delete user from the table(s)
                     cur.execute("DELETE FROM udata WHERE id=?", (user,))
                     conn.commit()
+                mirror.forget_user(gid, user.id)
 
                 # re-add user to <udata> table
                 mirror.ADD_USER(gid, user)
@@ -670,6 +689,10 @@ class Utility(commands.Cog, GlobalCog):
                     cmd = "UPDATE udata SET clearance=?, member_status=? WHERE id=?"
                     cur.execute(cmd, (1, status_string, uid))
                     conn.commit()
+                mirror.invalidate_clearance(gid, uid)
+
+            if user is not None:
+                await mirror.aio.write(reset_stats)
         except:
             traceback.print_exc()
             await react_fail(ctx)
@@ -690,9 +713,11 @@ class Utility(commands.Cog, GlobalCog):
         """
         try:
             mirror = self.accessor_mirror
-            status = mirror.DELETE_USER(str(ctx.guild.id), str(userid))
+            status = await mirror.aio.DELETE_USER(str(ctx.guild.id), str(userid))
             if unverify:
-                role = discord.utils.get(ctx.guild.roles, name=roles.VERIFIED_MEMBER)
+                role = mirror.fetch_role(
+                    roles.VERIFIED_MEMBER, str(ctx.guild.id), ctx.guild
+                )
                 member = ctx.guild.get_member(int(userid))
                 await member.remove_roles(role)
             await react_success(ctx)
@@ -720,7 +745,7 @@ class Utility(commands.Cog, GlobalCog):
         try:
             # retrieving and printing specified table data to console
             acc = self.accessor_mirror
-            data = acc.print_table(str(ctx.guild.id), "N/A", table)
+            data = await acc.aio.print_table(str(ctx.guild.id), "N/A", table)
             if data:
                 print("----------------")
                 print(f"\nCURRENT TABLE:\n{data}\n")
@@ -728,7 +753,7 @@ class Utility(commands.Cog, GlobalCog):
 
             # send back to discord if user wants to see it in chat
             if (destination in ("--here", "-h")) and data:
-                if acc.is_channel(
+                if await acc.aio.is_channel(
                     "bot_operator_zone", str(ctx.guild.id), str(ctx.channel.id)
                 ):
                     await ctx.reply(data)
@@ -1,13 +1,12 @@
 from cogs.userdata_accessor import UserDataAccessor
 from discord.ext import commands
 from utils.custom_help_command import CustomHelpCommand
-from utils.sync_utils import create_prefixes_file, get_prefix
+from utils.sync_utils import get_prefix, prefix_cache
 import asyncio
 import blop_tknloader as tknloader
 import datetime
 import discord
 import functools
-import json
 import logging
 import os
 import platform
@@ -115,28 +114,14 @@ async def on_help_command_error(ctx, error):
 
 @bot.event
 async def on_guild_join(guild):
-    # create prefix file if needed
-    create_prefixes_file()
-
-    with open("prefixes.json", "r") as f:
-        prefixes = json.load(f)
-    if "kaede" not in prefixes:
-        prefixes["kaede"] = {}
-    prefixes["kaede"] = "!"  # default prefix
-    with open("prefixes.json", "w") as f:
-        json.dump(prefixes, f, indent=4)
+    # bot's default prefix for the new guild (keeps one set before a re-join)
+    prefix = prefix_cache.get("kaede")
+    prefix_cache.set("kaede", guild.id, prefix, overwrite=False)
 
 
 @bot.event
 async def on_guild_remove(guild):
-    # create prefix file if needed
-    create_prefixes_file()
-
-    with open("prefixes.json", "r") as f:
-        prefixes = json.load(f)
-    prefixes.pop("kaede", None)
-    with open("prefixes.json", "w") as f:
-        json.dump(prefixes, f, indent=4)
+    prefix_cache.remove("kaede", guild.id)
 
 
 @bot.event
@@ -176,13 +161,9 @@ async def on_message(message):
     if message.guild is not None:
         gid = str(message.guild.id)
         
-        # if system is NOT checking user's entry in DB...
-        if not accessor.checking_user:
-        
-            # attempt to add DB entry for user
-            accessor.check_user(gid, uid)
-        else:
-            await asyncio.sleep(0.3)
+        # attempt to add DB entry for user (off the event loop; the
+        # accessor's single writer thread serializes these)
+        await accessor.aio.check_user(gid, uid)
 
     # processing commands
     try:
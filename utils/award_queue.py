@@ -0,0 +1,256 @@
+"""
+Coalescing, disk-backed queue for UnbelievaBoat point awards.
+
+Awards for the same (guild, member) that arrive within <window> seconds of
+each other are summed and sent as ONE PATCH, with the individual reasons
+combined into a single reason string (e.g. "Points for reaction add. (x3) |
+Points for sharing artwork.").
+
+Every award is appended to a JSON-lines ledger before it is queued, and the
+ledger is rewritten to hold only unsent awards after each flush, so awards
+still waiting in memory survive a restart (they are re-queued by
+<AwardQueue.load()>). Delivery is at-least-once: a crash between a
+successful PATCH and the ledger rewrite re-sends that award.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+import traceback
+
+
+class AwardQueue:
+    """
+    <send>:         coroutine function (gid, uid, cash, bank, reason) -> response
+                    (anything with an "ok" attribute, or None)
+    <ledger_path>:  JSON-lines file holding not-yet-sent awards
+    <window>:       seconds to hold a member's first award for others to join
+    """
+
+    # UB reasons show up in the member's transaction log; keep them readable
+    MAX_REASON_LEN = 256
+
+    def __init__(self, send, ledger_path: str, window: float = 10.0):
+        self.send = send
+        self.ledger_path = ledger_path
+        self.window = window
+
+        # (gid, uid) -> {"cash", "bank", "reasons": {reason: count},
+        #                "first": monotonic time, "entries": [ledger records]}
+        self.pending = {}
+        self._ledger = None
+        self._flush_lock = asyncio.Lock()
+
+        # metrics (see <AwardQueue.get_stats()>)
+        self.awards_in = 0
+        self.patches_out = 0
+        self.failures = 0
+
+    """ ---------------------------- ledger ---------------------------- """
+
+    def _append(self, record: dict):
+        if self._ledger is None:
+            folder = os.path.dirname(os.path.abspath(self.ledger_path))
+            os.makedirs(folder, exist_ok=True)
+            self._ledger = open(self.ledger_path, "a")
+        self._ledger.write(json.dumps(record) + "\n")
+        self._ledger.flush()
+
+    def _rewrite(self):
+        """
+        Replace the ledger with the awards that are still pending.
+        """
+        if self._ledger is not None:
+            self._ledger.close()
+            self._ledger = None
+
+        folder = os.path.dirname(os.path.abspath(self.ledger_path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            for entry in self.pending.values():
+                for record in entry["entries"]:
+                    f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.ledger_path)
+
+    def load(self) -> int:
+        """
+        Re-queue awards left in the ledger by a previous run.
+
+        RETURN: number of awards restored
+        """
+        if not os.path.isfile(self.ledger_path):
+            return 0
+
+        restored = 0
+        with open(self.ledger_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn last line from a crash mid-write
+                    continue
+                self._merge(record)
+                restored += 1
+        return restored
+
+    """ ---------------------------- queue ----------------------------- """
+
+    def _merge(self, record: dict):
+        key = (record["gid"], record["uid"])
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.pending[key] = {
+                "cash": 0,
+                "bank": 0,
+                "reasons": {},
+                "first": time.monotonic(),
+                "entries": [],
+            }
+        entry["cash"] += record["cash"]
+        entry["bank"] += record["bank"]
+        reasons = entry["reasons"]
+        reasons[record["reason"]] = reasons.get(record["reason"], 0) + 1
+        entry["entries"].append(record)
+        self.awards_in += 1
+
+    def add(self, gid, uid, reason: str, cash: float = 0, bank: float = 0):
+        """
+        Queue an award; it is sent by the next <flush()> after the window.
+        """
+        record = {
+            "gid": str(gid),
+            "uid": str(uid),
+            "cash": cash or 0,
+            "bank": bank or 0,
+            "reason": reason,
+            "time": time.time(),
+        }
+        self._append(record)
+        self._merge(record)
+
+    def combine_reasons(self, reasons: dict) -> str:
+        parts = [r if n == 1 else f"{r} (x{n})" for r, n in reasons.items()]
+        reason = " | ".join(parts)
+        if len(reason) > self.MAX_REASON_LEN:
+            reason = reason[: self.MAX_REASON_LEN - 3] + "..."
+        return reason
+
+    async def flush(self, force: bool = False) -> int:
+        """
+        Send every award whose window has closed (all of them if <force>).
+
+        Failed sends are put back and retried on the next flush.
+
+        RETURN: number of PATCHes sent successfully
+        """
+        async with self._flush_lock:
+            cutoff = time.monotonic() - self.window
+            due = [
+                k for k, e in self.pending.items() if force or e["first"] <= cutoff
+            ]
+            if not due:
+                return 0
+
+            sent = 0
+            for key in due:
+                entry = self.pending.pop(key)
+                reason = self.combine_reasons(entry["reasons"])
+                res = None
+                try:
+                    res = await self.send(
+                        key[0], key[1], entry["cash"], entry["bank"], reason
+                    )
+                    ok = res is not None and res.ok
+                except:
+                    traceback.print_exc()
+                    ok = False
+
+                if ok:
+                    sent += 1
+                    self.patches_out += 1
+                    continue
+
+                # client errors (e.g. member left the guild) will never
+                # succeed; 429s are retried like network errors
+                status = getattr(res, "status", None)
+                if status is not None and 400 <= status < 500 and status != 429:
+                    print(f"[AwardQueue] dropping award {key}: HTTP {status}")
+                    self.failures += 1
+                    continue
+
+                # put it back (merging with anything queued meanwhile)
+                self.failures += 1
+                newer = self.pending.pop(key, None)
+                self.pending[key] = entry
+                if newer is not None:
+                    entry["cash"] += newer["cash"]
+                    entry["bank"] += newer["bank"]
+                    for r, n in newer["reasons"].items():
+                        entry["reasons"][r] = entry["reasons"].get(r, 0) + n
+                    entry["entries"].extend(newer["entries"])
+
+            self._rewrite()
+            return sent
+
+    def close(self):
+        if self._ledger is not None:
+            self._ledger.close()
+            self._ledger = None
+
+    def get_stats(self) -> dict:
+        """
+        Coalescing ratio = awards received per PATCH sent.
+        """
+        return {
+            "awards_in": self.awards_in,
+            "patches_out": self.patches_out,
+            "coalescing_ratio": self.awards_in / max(self.patches_out, 1),
+            "queue_depth": len(self.pending),
+            "pending_awards": sum(len(e["entries"]) for e in self.pending.values()),
+            "failures": self.failures,
+        }
+
+
+# basic tests below
+if __name__ == "__main__":
+
+    class Response:
+        ok = True
+
+    async def main():
+        folder = tempfile.mkdtemp()
+        ledger = os.path.join(folder, "ledger.jsonl")
+        sent = []
+
+        async def send(gid, uid, cash, bank, reason):
+            sent.append((gid, uid, cash, bank, reason))
+            return Response()
+
+        queue = AwardQueue(send, ledger, window=0.05)
+        queue.add(1, 2, "Points for sharing artwork.", bank=10)
+        queue.add(1, 2, "Points for reaction add.", bank=1)
+        queue.add(1, 2, "Points for reaction add.", bank=1)
+        queue.add(1, 3, "Points for reaction add.", bank=1)
+
+        assert await queue.flush() == 0  # window still open
+
+        # restart before the window closes: nothing is lost
+        queue.close()
+        queue = AwardQueue(send, ledger, window=0.0)
+        assert queue.load() == 4
+        assert await queue.flush() == 2
+
+        assert sent[0] == (
+            "1",
+            "2",
+            0,
+            12,
+            "Points for sharing artwork. | Points for reaction add. (x2)",
+        )
+        assert os.path.getsize(ledger) == 0
+        print(queue.get_stats())
+
+    asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,185 @@
+"""
+Per-guild cache of user clearance levels (see GlobalCog.set_clearance).
+
+Every clearance-gated command used to open a connection and SELECT the
+author's clearance before it ran. <ClearanceCache> keeps the values read
+from the DB for <ttl> seconds:
+
+    - write-through: code that changes a clearance (setval, giveclearance,
+      resetstats, deleting/adding users ...) calls <invalidate()>, so this
+      bot never serves its own stale value
+    - the TTL bounds how long a change made by the OTHER bot (both bots
+      share the guild databases) can go unnoticed
+    - users without a row are cached too (negative entries, value None),
+      so commands from unknown users don't hit the DB every time
+"""
+import time
+
+
+# returned by <ClearanceCache.get()> when nothing (fresh) is cached
+MISS = object()
+
+
+class ClearanceCache:
+    """
+    <ttl>:      seconds a cached clearance (or "no such user") is trusted
+    <maxsize>:  entries kept per guild (oldest dropped first)
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._guilds = {}  # guild ID -> {user ID: (expires, clearance or None)}
+
+        # counters (see <ClearanceCache.get_stats()>)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, gid: str, uid: str):
+        """
+        Return the cached clearance of <uid> (None = user unknown), or MISS.
+        """
+        entry = self._guilds.get(gid, {}).get(uid)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return MISS
+        if entry[1] is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry[1]
+
+    def put(self, gid: str, uid: str, clearance):
+        """
+        Cache <clearance> for <uid> (None if the user has no row).
+        """
+        entries = self._guilds.setdefault(gid, {})
+        entries.pop(uid, None)  # re-insert: dicts keep insertion order
+        entries[uid] = (time.monotonic() + self.ttl, clearance)
+        if len(entries) > self.maxsize:
+            del entries[next(iter(entries))]
+
+    def invalidate(self, gid: str, uid: str = None):
+        """
+        Forget <uid>'s cached clearance (every user of <gid> if <uid> is None).
+        """
+        self.invalidations += 1
+        if uid is None:
+            self._guilds.pop(gid, None)
+        else:
+            self._guilds.get(gid, {}).pop(uid, None)
+
+    def clear(self):
+        self._guilds.clear()
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.negative_hits) / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "cached": sum(len(e) for e in self._guilds.values()),
+        }
+
+
+# benchmark below:
+# dispatch latency of a command wrapped with GlobalCog.set_clearance, with
+# the clearance read from a guild DB per call (old get_attr()) vs. cached
+# (run from the repo root: "python -m utils.clearance_cache")
+if __name__ == "__main__":
+    import asyncio
+    import contextlib
+    import io
+    import os
+    import random
+    import sqlite3
+    import statistics
+    import tempfile
+    from types import SimpleNamespace
+
+    from cogs.globalcog import GlobalCog
+
+    N = 20000
+    USERS = 5000
+
+    # correctness: expiry, negative entries, invalidation, size bound
+    cache = ClearanceCache(ttl=0.05, maxsize=3)
+    cache.put("1", "a", 3.0)
+    cache.put("1", "b", None)
+    assert cache.get("1", "a") == 3.0 and cache.get("1", "b") is None
+    assert cache.get("1", "c") is MISS and cache.get("2", "a") is MISS
+    cache.invalidate("1", "a")
+    assert cache.get("1", "a") is MISS
+    for uid in "cdef":
+        cache.put("1", uid, 1.0)
+    assert cache.get("1", "b") is MISS and cache.get("1", "f") == 1.0
+    time.sleep(0.06)
+    assert cache.get("1", "f") is MISS
+
+    # a guild database like the bots' (file-backed, WAL)
+    path = os.path.join(tempfile.mkdtemp(), "1.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE udata (id TEXT PRIMARY KEY, clearance REAL)")
+    conn.executemany(
+        "INSERT INTO udata VALUES (?, ?)",
+        [(str(10 ** 17 + i), float(i % 10)) for i in range(USERS)],
+    )
+    conn.commit()
+
+    def old_clearance(gid, uid):
+        # what UserDataAccessor.get_attr("clearance", ...) did per command
+        # (on an already pooled connection, see utils/sqlite_pool.py)
+        with conn:
+            cur = conn.cursor()
+            cur.execute("SELECT {} FROM udata WHERE id={}".format("clearance", uid))
+            row = cur.fetchone()
+            return row[0] if row else ""
+
+    cache = ClearanceCache(ttl=60.0)
+
+    def new_clearance(gid, uid):
+        clearance = cache.get(gid, uid)
+        if clearance is MISS:
+            clearance = old_clearance(gid, uid) or None
+            cache.put(gid, uid, clearance)
+        return clearance
+
+    class Cog(GlobalCog):
+        @GlobalCog.set_clearance(1)
+        async def command(self, ctx):
+            return True
+
+    async def dispatch(lookup, authors):
+        GlobalCog.get_clearance = lambda self, gid, uid: lookup(gid, uid)
+        cog, guild = Cog(), SimpleNamespace(id=1)
+        latencies = []
+        for author in authors:
+            ctx = SimpleNamespace(guild=guild, author=author)
+            t0 = time.perf_counter()
+            await cog.command(ctx)
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    # commands come from a few hundred active members (plus some unknown)
+    rng = random.Random(0)
+    active = [10 ** 17 + rng.randrange(USERS) for _ in range(300)] + [42]
+    authors = [SimpleNamespace(id=rng.choice(active), name="user") for _ in range(N)]
+
+    for name, lookup in (
+        ("per-command SELECT", old_clearance),
+        ("cached", new_clearance),
+    ):
+        with contextlib.redirect_stderr(io.StringIO()):  # "[ACCESS DENIED]" lines
+            latencies = asyncio.run(dispatch(lookup, authors))
+        latencies.sort()
+        print(
+            f"{name:<20} mean {statistics.mean(latencies) * 1e6:8.1f} us,  "
+            f"p50 {latencies[N // 2] * 1e6:8.1f} us,  "
+            f"p99 {latencies[int(N * 0.99)] * 1e6:8.1f} us"
+        )
+    print(f"  {cache.get_stats()}")
@@ -0,0 +1,83 @@
+"""
+In-memory write-behind buffer for numeric counter increments.
+
+Increments are merged per (guild, table, user, column) and written out in
+batches by the owner of the buffer (see UserDataAccessor.flush_counters()).
+"""
+import threading
+
+
+class CounterBuffer:
+    """
+    Holds not-yet-written deltas, grouped by guild.
+
+    STRUCTURE:
+    ----------
+        [guild_id]
+            (table, user_id, column) : delta
+    """
+
+    def __init__(self, max_pending: int = 500):
+        self.max_pending = max_pending
+        self._deltas = {}
+        self._lock = threading.Lock()
+
+        # total number of merged entries waiting to be flushed
+        self.pending = 0
+
+    def add(self, gid: str, table: str, uid: str, attr: str, amount) -> bool:
+        """
+        Merge <amount> into the pending delta for the given counter.
+
+        RETURN: True if the buffer reached <max_pending> entries
+        (i.e. the caller should flush now).
+        """
+        key = (table, uid, attr)
+        with self._lock:
+            guild = self._deltas.setdefault(gid, {})
+            if key in guild:
+                guild[key] += amount
+            else:
+                guild[key] = amount
+                self.pending += 1
+            return self.pending >= self.max_pending
+
+    def get(self, gid: str, table: str, uid: str, attr: str):
+        """
+        Return the pending (unflushed) delta for one counter (0 if none).
+        """
+        with self._lock:
+            return self._deltas.get(gid, {}).get((table, uid, attr), 0)
+
+    def get_user(self, gid: str, table: str, uid: str) -> dict:
+        """
+        Return {column: pending delta} for every buffered column of a user.
+        """
+        with self._lock:
+            guild = self._deltas.get(gid)
+            if not guild:
+                return {}
+            return {k[2]: v for k, v in guild.items() if k[0] == table and k[1] == uid}
+
+    def guilds(self) -> list:
+        """
+        Return IDs of guilds that currently have pending deltas.
+        """
+        with self._lock:
+            return [gid for gid, guild in self._deltas.items() if guild]
+
+    def drain(self, gid: str) -> dict:
+        """
+        Remove and return all pending deltas for guild <gid>.
+        """
+        with self._lock:
+            guild = self._deltas.pop(gid, None) or {}
+            self.pending -= len(guild)
+            return guild
+
+    def restore(self, gid: str, deltas: dict):
+        """
+        Merge drained <deltas> back in (e.g. after a failed flush).
+        """
+        for (table, uid, attr), amount in deltas.items():
+            self.add(gid, table, uid, attr, amount)
@@ -0,0 +1,145 @@
+"""
+Runs blocking database work off the discord.py event loop.
+
+    - writes go to ONE dedicated thread, so they still happen one at a time
+      and in the order they were submitted (SQLite only allows one writer
+      per file anyway)
+    - reads go to a small thread pool per guild, so a slow query in one
+      guild cannot starve reads in another
+
+Callers simply "await" the result (see AsyncUserDataAccessor in
+cogs/userdata_accessor.py).
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DBExecutor:
+    """
+    <readers_per_guild>:    threads in each guild's reader pool
+    """
+
+    def __init__(self, readers_per_guild: int = 2):
+        self.readers_per_guild = readers_per_guild
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+        self._readers = {}
+        self._lock = threading.Lock()
+
+        # counters (see <DBExecutor.get_stats()>)
+        self.writes = 0
+        self.reads = 0
+        self.pending = 0
+
+    def _reader(self, key) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._readers.get(key)
+            if pool is None:
+                pool = self._readers[key] = ThreadPoolExecutor(
+                    self.readers_per_guild, thread_name_prefix=f"db-reader-{key}"
+                )
+            return pool
+
+    async def _run(self, executor, fn, args, kwargs):
+        loop = asyncio.get_event_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(
+                executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
+
+    async def write(self, fn, *args, **kwargs):
+        """
+        Run <fn>(*args, **kwargs) on the writer thread and return its result.
+        """
+        self.writes += 1
+        return await self._run(self._writer, fn, args, kwargs)
+
+    def submit_write(self, fn, *args, **kwargs):
+        """
+        Queue <fn>(*args, **kwargs) on the writer thread without waiting for
+        it (for sync code, on or off the loop); returns a
+        concurrent.futures.Future.
+        """
+        self.writes += 1
+        return self._writer.submit(fn, *args, **kwargs)
+
+    async def read(self, key, fn, *args, **kwargs):
+        """
+        Run <fn>(*args, **kwargs) on the reader pool for <key> (a guild ID).
+        """
+        self.reads += 1
+        return await self._run(self._reader(key), fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True):
+        self._writer.shutdown(wait=wait)
+        with self._lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+        for pool in readers:
+            pool.shutdown(wait=wait)
+
+    def get_stats(self) -> dict:
+        return {
+            "writes": self.writes,
+            "reads": self.reads,
+            "pending": self.pending,
+            "reader_pools": len(self._readers),
+        }
+
+
+# benchmark below:
+# event loop lag while importing N users one row + commit at a time
+# (what "initdb" / "setval all" did inline), inline vs. on the writer thread
+if __name__ == "__main__":
+    import os
+    import sqlite3
+    import tempfile
+    import time
+
+    from utils.loop_monitor import LoopLagMonitor
+
+    N = 3000
+    path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE udata(id text PRIMARY KEY, xp real)")
+
+    def add_user(uid):
+        with sqlite3.connect(path) as conn:
+            conn.execute("INSERT OR IGNORE INTO udata VALUES(?, 0)", (uid,))
+
+    async def measure(import_users):
+        monitor = LoopLagMonitor(interval=0.01)
+        task = asyncio.ensure_future(monitor.run())
+        await asyncio.sleep(0.05)
+        t0 = time.perf_counter()
+        await import_users()
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return elapsed, monitor.get_stats()
+
+    async def main():
+        executor = DBExecutor()
+
+        async def inline():
+            for i in range(N):
+                add_user(f"a{i}")
+
+        async def offloaded():
+            for i in range(N):
+                await executor.write(add_user, f"b{i}")
+
+        print(f"event loop lag while adding {N} users:")
+        for name, fn in (("inline", inline), ("DBExecutor", offloaded)):
+            elapsed, lag = await measure(fn)
+            print(
+                f"  {name:<11} {elapsed:6.2f}s  lag p50 {lag['p50'] * 1000:7.1f} ms"
+                f"  p99 {lag['p99'] * 1000:7.1f} ms  max {lag['max'] * 1000:7.1f} ms"
+            )
+        executor.shutdown()
+
+    asyncio.get_event_loop().run_until_complete(main())
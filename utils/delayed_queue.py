@@ -0,0 +1,258 @@
+"""
+Keyed delayed-execution queue on the event loop (for deferred point awards).
+
+Reaction listeners used to `await asyncio.sleep(4.0)` before paying out,
+so every reaction kept a task (and the messages it had fetched) alive for
+4-8 seconds; a burst of reactions on a popular post meant thousands of
+sleeping coroutines. <DelayedQueue.schedule()> instead records the call
+with its due time and returns at once:
+
+    - pending calls sit in a min-heap ordered by due time; ONE loop timer
+      (loop.call_at) is armed for the earliest and fires every due call
+    - each call has a key (e.g. ("reaction", message ID, user ID)); while
+      a key is pending, and for <hold> seconds after its call ran, the
+      same key can't be scheduled again, so repeated reactions by the same
+      user on the same message are dropped instead of queued
+
+Calls may be plain functions or coroutine functions (run as tasks).
+"""
+import asyncio
+import collections
+import heapq
+import inspect
+import itertools
+import traceback
+
+
+class DelayedQueue:
+    """
+    <loop>:     event loop the calls run on
+    <hold>:     seconds a key stays taken after its call ran
+    """
+
+    def __init__(self, loop, hold: float = 0.0):
+        self.loop = loop
+        self.hold = hold
+
+        self._heap = []  # [due, seq, key]
+        self._calls = {}  # key -> (due, func, args, kwargs)
+        self._held = collections.OrderedDict()  # key -> loop time it's released
+        self._seq = itertools.count()
+        self._timer = None  # asyncio.TimerHandle for the earliest due call
+        self._timer_due = None
+
+        # counters (see <DelayedQueue.get_stats()>)
+        self.scheduled = 0
+        self.deduped = 0
+        self.runs = 0
+        self.errors = 0
+        self.max_pending = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    def schedule(self, key, delay: float, func, *args, **kwargs) -> bool:
+        """
+        Call <func>(*args, **kwargs) in <delay> seconds.
+
+        Returns False (and schedules nothing) if <key> is pending or held.
+        """
+        now = self.loop.time()
+        self._release(now)
+        if key in self._calls or key in self._held:
+            self.deduped += 1
+            return False
+
+        due = now + delay
+        self._calls[key] = (due, func, args, kwargs)
+        heapq.heappush(self._heap, [due, next(self._seq), key])
+        self.scheduled += 1
+        self.max_pending = max(self.max_pending, len(self._calls))
+
+        if self._timer_due is None or due < self._timer_due:
+            self._arm(due)
+        return True
+
+    def cancel(self, key) -> bool:
+        """
+        Drop the pending call for <key> (its heap entry is skipped later).
+        """
+        return self._calls.pop(key, None) is not None
+
+    def _arm(self, due):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self.loop.call_at(due, self._fire)
+        self._timer_due = due
+
+    def _release(self, now):
+        # held keys expire in the order they were added (constant <hold>)
+        while self._held:
+            key, until = next(iter(self._held.items()))
+            if until > now:
+                break
+            del self._held[key]
+
+    def _fire(self):
+        self._timer = self._timer_due = None
+        now = self.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            due, _, key = heapq.heappop(self._heap)
+            call = self._calls.get(key)
+            if call is None or call[0] != due:
+                continue  # cancelled (or re-scheduled later)
+            del self._calls[key]
+            if self.hold > 0:
+                self._held[key] = now + self.hold
+            self._run(*call[1:])
+
+        # drop cancelled entries at the top, then wait for the next due call
+        while self._heap:
+            due, _, key = self._heap[0]
+            call = self._calls.get(key)
+            if call is not None and call[0] == due:
+                self._arm(due)
+                break
+            heapq.heappop(self._heap)
+
+    def _run(self, func, args, kwargs):
+        self.runs += 1
+        try:
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                self.loop.create_task(self._await(result))
+        except:
+            traceback.print_exc()
+            self.errors += 1
+
+    async def _await(self, result):
+        try:
+            await result
+        except:
+            traceback.print_exc()
+            self.errors += 1
+
+    def run_pending(self):
+        """
+        Run every pending call now (e.g. on shutdown, so no award is lost).
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = self._timer_due = None
+        calls = sorted(self._calls.values(), key=lambda call: call[0])
+        self._calls.clear()
+        self._heap.clear()
+        for call in calls:
+            self._run(*call[1:])
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self._calls),
+            "max_pending": self.max_pending,
+            "scheduled": self.scheduled,
+            "deduped": self.deduped,
+            "runs": self.runs,
+            "errors": self.errors,
+        }
+
+
+# benchmark below:
+# a burst of reactions on a popular art post (default 20k, ~30% of them
+# repeated by the same user on the same message); each reaction pays the
+# reacter after a delay. Old: the listener sleeps, holding its task and the
+# fetched message. New: the listener schedules the payout and returns.
+# Compares live tasks, peak memory and payouts.
+# (run from the repo root: "python -m utils.delayed_queue [N]")
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+    import tracemalloc
+    from types import SimpleNamespace
+
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    DELAY = 1.0  # stands in for the 4.0s (x2) of the listeners
+
+    async def checks():
+        loop = asyncio.get_running_loop()
+        queue = DelayedQueue(loop, hold=0.2)
+        ran = []
+
+        async def coro(x):
+            ran.append(x)
+
+        assert queue.schedule("a", 0.05, ran.append, "a")
+        assert queue.schedule("b", 0.01, coro, "b")
+        assert not queue.schedule("a", 0.0, ran.append, "dup")
+        assert queue.schedule("c", 0.02, ran.append, "c") and queue.cancel("c")
+        await asyncio.sleep(0.1)
+        assert ran == ["b", "a"], ran
+        assert not queue.schedule("a", 0.0, ran.append, "held")
+        await asyncio.sleep(0.2)
+        assert queue.schedule("a", 0.0, ran.append, "again")
+        queue.run_pending()
+        assert ran[-1] == "again" and len(queue) == 0
+
+    asyncio.run(checks())
+
+    rng = random.Random(0)
+    users = [10 ** 17 + i for i in range(int(N * 0.7))]
+    reactions = users + rng.choices(users, k=N - len(users))  # 30% repeats
+    rng.shuffle(reactions)
+
+    def fetched_message():
+        # roughly what a fetched discord.Message keeps alive
+        return SimpleNamespace(
+            id=1,
+            content="x" * 200,
+            author=SimpleNamespace(id=2, name="artist"),
+            embeds=[{"type": "image", "url": "https://example.com/a.png"}],
+            attachments=[],
+            reactions=[],
+        )
+
+    async def old(paid):
+        async def listener(uid):
+            message = fetched_message()
+            await asyncio.sleep(DELAY)
+            paid.append((message.id, uid))
+
+        tasks = [asyncio.ensure_future(listener(uid)) for uid in reactions]
+        await asyncio.sleep(0)
+        live = len([t for t in asyncio.all_tasks() if not t.done()])
+        peak = tracemalloc.get_traced_memory()[0]
+        await asyncio.gather(*tasks)
+        return live, peak
+
+    async def new(paid):
+        queue = DelayedQueue(asyncio.get_running_loop(), hold=DELAY)
+
+        async def listener(uid):
+            message = fetched_message()
+            key = ("reaction", message.id, uid)
+            queue.schedule(key, DELAY, paid.append, (message.id, uid))
+
+        tasks = [asyncio.ensure_future(listener(uid)) for uid in reactions]
+        await asyncio.gather(*tasks)
+        live = len([t for t in asyncio.all_tasks() if not t.done()])
+        peak = tracemalloc.get_traced_memory()[0]
+        await asyncio.sleep(DELAY + 0.1)
+        assert len(queue) == 0
+        return live, peak, queue.get_stats()
+
+    for name, run in (("sleep in listener", old), ("DelayedQueue", new)):
+        paid = []
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        live, peak, *stats = asyncio.run(run(paid))
+        elapsed = time.perf_counter() - t0
+        tracemalloc.stop()
+        print(
+            f"{name:<18} {N:,} reactions: {live:6,} live tasks, "
+            f"{peak / 2 ** 20:6.1f} MiB, {len(paid):6,} payouts, {elapsed:.2f}s"
+        )
+        if stats:
+            print(f"  {stats[0]}")
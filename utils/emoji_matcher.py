@@ -0,0 +1,207 @@
+"""
+Precompiled emoji matcher (drop-in for `emojis.count` / `emojis.get`).
+
+The `emojis` package matches text against one regex alternation of all
+~1,800 emojis, which the `re` engine tries one by one at every position of
+the text. <EmojiMatcher> is built once at import from the same emoji table:
+
+    - a character-class regex of every character an emoji can START with
+      finds candidate positions (a bitmap lookup per character in C)
+    - at each candidate, a dict trie finds the longest emoji starting there
+
+Matches are the same as `emojis`: scanning left to right, the LONGEST emoji
+starting at a position wins (e.g. a ZWJ family sequence, not its first
+person). Custom Discord emojis ("<:name:id>", "<a:name:id>") can be counted
+in the same pass.
+"""
+import re
+
+import emojis
+
+
+# custom (guild) emoji, as found in message content
+CUSTOM_EMOJI = re.compile(r"<a?:[A-Za-z0-9_~]+:[0-9]+>")
+
+# every non-BMP emoji starts in this block; listing those characters one by
+# one would stop `re` from compiling the class to a bitmap (much slower)
+_ASTRAL_RANGE = "\U0001F000-\U0001FAFF"
+
+_END = ""  # trie key marking the end of an emoji
+
+
+def first_char_class(chars, extra: str = "") -> str:
+    """
+    Return a regex character class matching (a superset of) <chars>.
+    """
+    bmp = sorted(re.escape(c) for c in chars if ord(c) <= 0xFFFF)
+    astral = [c for c in chars if ord(c) > 0xFFFF]
+    if any(not "\U0001F000" <= c <= "\U0001FAFF" for c in astral):
+        # (not the case for the current table) fall back to listing them
+        bmp += sorted(re.escape(c) for c in astral)
+        astral = []
+    return "[" + "".join(bmp) + (_ASTRAL_RANGE if astral else "") + extra + "]"
+
+
+class EmojiMatcher:
+    """
+    <words>:    the emoji table (default: every emoji known to `emojis`)
+    """
+
+    def __init__(self, words=None):
+        if words is None:
+            words = emojis.emojis.EMOJI_TO_ALIAS_SORTED
+
+        self.trie = {}
+        for word in words:
+            node = self.trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+
+        firsts = [ch for ch in self.trie if ch != _END]
+        self.candidate_re = re.compile(first_char_class(firsts))
+        self.candidate_custom_re = re.compile(first_char_class(firsts, "<"))
+
+    def longest(self, text: str, start: int) -> int:
+        """
+        Return the end of the longest emoji at <text>[<start>:], or -1.
+        """
+        node = self.trie
+        end = -1
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if _END in node:
+                end = i + 1
+        return end
+
+    def iter(self, text: str, custom: bool = False):
+        """
+        Yield (start, end, is_custom) for every emoji in <text>.
+        """
+        search = (self.candidate_custom_re if custom else self.candidate_re).search
+        longest = self.longest
+        pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return
+            start = m.start()
+            if custom and text[start] == "<":
+                c = CUSTOM_EMOJI.match(text, start)
+                if c is not None:
+                    yield start, c.end(), True
+                    pos = c.end()
+                    continue
+            end = longest(text, start)
+            if end > 0:
+                yield start, end, False
+                pos = end
+            else:
+                pos = start + 1
+
+    def count(self, text: str, custom: bool = False) -> int:
+        """
+        Return the number of emojis in <text> (same as `emojis.count`).
+
+        Set <custom> to True to also count custom "<:name:id>" emojis.
+        """
+        if custom:
+            return sum(self.count_all(text))
+
+        # same scan as <iter()>, inlined (this runs for every message)
+        search = self.candidate_re.search
+        longest = self.longest
+        n = pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return n
+            start = m.start()
+            end = longest(text, start)
+            if end > 0:
+                n += 1
+                pos = end
+            else:
+                pos = start + 1
+
+    def count_all(self, text: str) -> tuple:
+        """
+        Return (Unicode emojis, custom emojis) in <text>, in one pass.
+        """
+        n_unicode = n_custom = 0
+        for _, _, is_custom in self.iter(text, custom=True):
+            if is_custom:
+                n_custom += 1
+            else:
+                n_unicode += 1
+        return n_unicode, n_custom
+
+    def get(self, text: str) -> set:
+        """
+        Return the unique emojis in <text> (same as `emojis.get`).
+        """
+        return {text[start:end] for start, end, _ in self.iter(text)}
+
+    def first(self, text: str):
+        """
+        Return the first emoji in <text>, or None.
+        """
+        for start, end, _ in self.iter(text):
+            return text[start:end]
+        return None
+
+
+# shared instance, built once at import
+emoji_matcher = EmojiMatcher()
+
+
+# benchmark below:
+# emojis.count vs. EmojiMatcher.count on short and long messages, and an
+# exactness check against emojis.count/get on random text
+if __name__ == "__main__":
+    import random
+    import time
+
+    table = emojis.emojis.EMOJI_TO_ALIAS_SORTED
+    rng = random.Random(0)
+
+    def random_text(n_words):
+        words = []
+        for _ in range(n_words):
+            r = rng.random()
+            if r < 0.08:
+                words.append(rng.choice(table))
+            elif r < 0.1:
+                words.append(f"<:blob{rng.randint(0, 99)}:{rng.randint(1, 10 ** 6)}>")
+            elif r < 0.12:
+                # pieces of multi-codepoint emojis (ZWJ, modifiers, flags)
+                words.append(rng.choice(table)[: rng.randint(1, 3)])
+            else:
+                words.append(rng.choice(("the", "art", "lol", "1", "#", "©")))
+        return " ".join(words)
+
+    # exactness
+    for _ in range(3000):
+        text = random_text(rng.randint(0, 80))
+        assert emoji_matcher.count(text) == emojis.count(text), text
+        assert emoji_matcher.get(text) == emojis.get(text), text
+        assert emoji_matcher.first(text) == next(emojis.iter(text), None), text
+        n_custom = len(CUSTOM_EMOJI.findall(text))
+        assert emoji_matcher.count_all(text)[1] == n_custom, text
+
+    for n_words, n in ((10, 5000), (300, 500), (2000, 50)):
+        texts = [random_text(n_words) for _ in range(n)]
+        avg_len = sum(map(len, texts)) / n
+        timings = []
+        for fn in (emojis.count, emoji_matcher.count):
+            t0 = time.perf_counter()
+            for text in texts:
+                fn(text)
+            timings.append(time.perf_counter() - t0)
+        print(
+            f"~{avg_len:6.0f} chars:  emojis.count {n / timings[0]:9,.0f} msg/s,  "
+            f"EmojiMatcher {n / timings[1]:9,.0f} msg/s  "
+            f"({timings[0] / timings[1]:.0f}x)"
+        )
@@ -0,0 +1,222 @@
+"""
+Append-only journal for scheduled jobs (replaces rewriting json_jobs.json).
+
+Every change is ONE appended JSON line, so storing, firing or removing a
+job costs O(1) I/O no matter how many jobs exist:
+
+    {"op": "put", "id": "<job id>", "job": {...job info...}}
+    {"op": "del", "id": "<job id>"}
+
+On startup <JobJournal.load()> replays the lines in order. A line torn by a
+crash mid-write (the last one) is skipped, so at most that single change is
+lost. Once the journal holds more than twice as many lines as live jobs it
+is compacted: the live jobs are written to a temporary file which then
+atomically replaces the journal.
+"""
+import json
+import os
+import traceback
+
+
+class JobJournal:
+    """
+    <path>:         journal file (JSON lines)
+    <legacy_path>:  old whole-dict JSON job file, imported once if the
+                    journal doesn't exist yet
+    <min_compact>:  never compact a journal shorter than this (lines)
+    <fsync>:        fsync after every change (survives power loss, slower)
+    """
+
+    def __init__(self, path, legacy_path=None, min_compact=1000, fsync=False):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.min_compact = min_compact
+        self.fsync = fsync
+
+        self.jobs = {}  # job ID -> job info (live jobs)
+        self.lines = 0  # records in the journal file
+
+        # counters (see <JobJournal.get_stats()>)
+        self.appends = 0
+        self.compactions = 0
+        self.skipped = 0
+
+        self._f = None
+
+    def load(self) -> dict:
+        """
+        Replay the journal (or import the legacy file); return the live jobs.
+        """
+        self.jobs = {}
+        self.lines = 0
+
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                lines = f.readlines()
+            for n, line in enumerate(lines, 1):
+                try:
+                    rec = json.loads(line)
+                    if rec["op"] == "put":
+                        self.jobs[rec["id"]] = rec["job"]
+                    elif rec["op"] == "del":
+                        self.jobs.pop(rec["id"], None)
+                    self.lines += 1
+                except (ValueError, KeyError, TypeError):
+                    # a torn last line is expected after a crash
+                    self.skipped += 1
+                    if n != len(lines):
+                        print(f"[JobJournal] skipped bad line {n} in {self.path}")
+            if self.skipped:
+                self.compact()
+
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r") as f:
+                    self.jobs = {str(k): v for k, v in json.load(f).items()}
+                print(f"[JobJournal] imported {len(self.jobs)} jobs from legacy file")
+            except:
+                traceback.print_exc()
+            self.compact()
+
+        return self.jobs
+
+    def _append(self, rec: dict):
+        if self._f is None:
+            self._f = open(self.path, "a")
+        self._f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        self._f.flush()
+        if self.fsync:
+            os.fsync(self._f.fileno())
+        self.lines += 1
+        self.appends += 1
+
+        if self.lines > max(self.min_compact, 2 * len(self.jobs)):
+            self.compact()
+
+    def put(self, job_id, info: dict):
+        """
+        Store (or replace) job <job_id>.
+        """
+        job_id = str(job_id)
+        self.jobs[job_id] = info
+        self._append({"op": "put", "id": job_id, "job": info})
+
+    def delete(self, job_id):
+        """
+        Remove job <job_id> (no-op if it isn't stored).
+        """
+        job_id = str(job_id)
+        if self.jobs.pop(job_id, None) is not None:
+            self._append({"op": "del", "id": job_id})
+
+    def compact(self):
+        """
+        Rewrite the journal with only the live jobs (atomic replace).
+        """
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for job_id, info in self.jobs.items():
+                rec = {"op": "put", "id": job_id, "job": info}
+                f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        os.replace(tmp, self.path)
+        self.lines = len(self.jobs)
+        self.compactions += 1
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def get_stats(self) -> dict:
+        return {
+            "jobs": len(self.jobs),
+            "lines": self.lines,
+            "appends": self.appends,
+            "compactions": self.compactions,
+        }
+
+
+# benchmark below:
+# store + fire throughput with many pending jobs: rewriting the whole JSON
+# file per change (old save_jobs) vs. appending to the journal, then replay
+# time and recovery from a torn last line
+if __name__ == "__main__":
+    import tempfile
+    import time
+    import uuid
+
+    folder = tempfile.mkdtemp()
+
+    def job_info(i):
+        return {
+            "i": False,
+            "runs_left": 1,
+            "interval": 3600 + i,
+            "unit": "seconds",
+            "at_time": None,
+            "do": "TaskScheduler.do_func",
+            "args": [str(uuid.uuid4()), True, "funcTaskScheduler.reminder_func"],
+            "next_run": "2026-01-01 12:00:00",
+            "tags": ["123456789012345", "1", str(i)],
+        }
+
+    for pending in (1000, 10000, 100000):
+        jobs = {str(i): job_info(i) for i in range(pending)}
+
+        # old: json.dump(indent=4) of every job, per store and per fire
+        old_path = os.path.join(folder, f"old_{pending}.json")
+        n_old = max(5, 20000 // pending)
+        t0 = time.perf_counter()
+        for i in range(n_old):
+            jobs[f"new{i}"] = job_info(i)  # store
+            with open(old_path, "w") as f:
+                json.dump(jobs, f, indent=4)
+            jobs.pop(f"new{i}")  # fire (last run)
+            with open(old_path, "w") as f:
+                json.dump(jobs, f, indent=4)
+        t_old = (time.perf_counter() - t0) / n_old
+
+        # new: journal append per store and per fire
+        journal = JobJournal(os.path.join(folder, f"new_{pending}.jsonl"))
+        journal.load()
+        for job_id, info in jobs.items():
+            journal.put(job_id, info)
+        n_new = 20000
+        t0 = time.perf_counter()
+        for i in range(n_new):
+            journal.put(f"new{i}", job_info(i))
+            journal.delete(f"new{i}")
+        t_new = (time.perf_counter() - t0) / n_new
+        journal.close()
+
+        t0 = time.perf_counter()
+        replayed = JobJournal(journal.path).load()
+        t_load = time.perf_counter() - t0
+        assert replayed == jobs
+
+        print(
+            f"{pending:>7,} jobs: store+fire  json rewrite {1 / t_old:9,.1f}/s,  "
+            f"journal {1 / t_new:9,.0f}/s  ({t_old / t_new:,.0f}x);  "
+            f"replay {t_load:.2f}s"
+        )
+
+    # crash mid-write: the torn last line is dropped, everything else kept
+    path = os.path.join(folder, "torn.jsonl")
+    journal = JobJournal(path)
+    journal.load()
+    journal.put("a", job_info(1))
+    journal.put("b", job_info(2))
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"op": "put", "id": "c", "jo')
+    recovered = JobJournal(path)
+    assert set(recovered.load()) == {"a", "b"} and recovered.skipped == 1
+    recovered.put("d", job_info(3))
+    assert set(JobJournal(path).load()) == {"a", "b", "d"}
+    print("torn last line: recovered OK")
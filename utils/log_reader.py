@@ -0,0 +1,569 @@
+"""
+Streaming reader for append-only text logs (e.g. the "logs_assets" logs).
+
+Serves head, tail, offset pagination and filtered searches WITHOUT reading
+the whole file or forking a "tail" process:
+
+    - "<log>.idx" sidecar: one little-endian uint64 per line, the byte
+      offset just past that line's newline. Line <i> is the byte range
+      idx[i-1]..idx[i], so any slice of lines costs two small seeks. The
+      index is extended incrementally: <LogReader.append()> writes it along
+      with the line, and lines appended by anyone else are indexed on the
+      next read (only the new bytes are scanned).
+    - "<log>.keys.sqlite3" postings (only if the reader has <keys>): for
+      each key function (e.g. "user" -> the line's user ID) the numbers of
+      the lines with each key value. Kept in step with the offset index by
+      <refresh()>/<append()>, so <LogReader.find()> costs an index lookup
+      plus one seek per returned line, however rare the value is.
+    - <reverse_lines()>: block-wise reverse reader (newest line first), for
+      filters without postings; <LogReader.search()> reads at most
+      <max_scan_bytes> of the log.
+
+A torn/stale sidecar (crash, log rotated or truncated) is detected by size
+checks and rebuilt.
+
+Reads may scan or index a lot of new data on first use, so callers on the
+event loop should run them in an executor (the reader is thread-safe).
+"""
+import os
+import sqlite3
+import struct
+import threading
+
+
+_OFFSET = struct.Struct("<Q")
+
+
+def reverse_lines(path, block_size: int = 64 * 1024, end: int = None):
+    """
+    Yield the lines of <path> (bytes, without newline) from last to first,
+    reading it backwards in <block_size> blocks.
+
+    <end>:  byte offset to start from (default: end of file)
+    """
+    with open(path, "rb") as f:
+        if end is None:
+            end = f.seek(0, os.SEEK_END)
+        pos = end
+        rest = b""  # partial line carried over from the later block
+        first = True
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            block = f.read(size) + rest
+            if first:
+                # a final newline doesn't start another (empty) line
+                if block.endswith(b"\n"):
+                    block = block[:-1]
+                first = False
+            lines = block.split(b"\n")
+            rest = lines[0]
+            for line in reversed(lines[1:]):
+                yield line
+        if not first:
+            yield rest
+
+
+class LogReader:
+    """
+    <path>:             log file (UTF-8 text, one entry per line)
+    <block_size>:       read size for scans and the reverse reader
+    <keys>:             {name: callable(line) -> key (str) or None}; lines
+                        are posted under each key (see <find()>)
+    <max_scan_bytes>:   default cap on the bytes <search()> reads (None =
+                        whole log)
+    """
+
+    # lines read per postings transaction when catching up
+    POST_BATCH = 50000
+
+    def __init__(
+        self,
+        path,
+        block_size: int = 64 * 1024,
+        keys: dict = None,
+        max_scan_bytes: int = None,
+    ):
+        self.path = path
+        self.idx_path = path + ".idx"
+        self.keys_path = path + ".keys.sqlite3"
+        self.block_size = block_size
+        self.keys = dict(keys or {})
+        self.max_scan_bytes = max_scan_bytes
+
+        self.count = 0  # indexed lines
+        self.indexed_end = 0  # log offset just past the last indexed line
+        self.posted = 0  # lines whose keys are in the postings
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._db = None  # postings connection (opened on first refresh)
+
+        # counters (see <LogReader.get_stats()>)
+        self.rebuilds = 0
+        self.scanned_bytes = 0
+        self.posting_resets = 0
+
+    # --- index ---
+    def _read_offset(self, idx, i: int) -> int:
+        """
+        Byte offset just past line <i> (0 for i < 0).
+        """
+        if i < 0:
+            return 0
+        idx.seek(i * _OFFSET.size)
+        return _OFFSET.unpack(idx.read(_OFFSET.size))[0]
+
+    def _load(self):
+        """
+        Check the sidecar against the log; reset it if it can't be trusted.
+        """
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        try:
+            idx_size = os.path.getsize(self.idx_path)
+        except FileNotFoundError:
+            idx_size = 0
+
+        count = idx_size // _OFFSET.size
+        end = 0
+        if count:
+            with open(self.idx_path, "rb") as idx:
+                end = self._read_offset(idx, count - 1)
+
+        if end > log_size:
+            # log was truncated/rotated under the index
+            count, end = 0, 0
+            self.rebuilds += 1
+        if idx_size != count * _OFFSET.size:
+            # drop a torn last offset (or the whole stale index)
+            with open(self.idx_path, "ab") as idx:
+                idx.truncate(count * _OFFSET.size)
+
+        self.count, self.indexed_end = count, end
+        self._loaded = True
+
+    def refresh(self):
+        """
+        Index (and post) any complete lines appended to the log since the
+        last call.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._extend_index()
+            self._post()
+
+    def _extend_index(self):
+        if not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        if size < self.indexed_end:
+            self._load()  # truncated: start over
+        if size <= self.indexed_end:
+            return
+
+        offsets = []
+        pos = self.indexed_end
+        with open(self.path, "rb") as log:
+            log.seek(pos)
+            while pos < size:
+                block = log.read(min(self.block_size, size - pos))
+                if not block:
+                    break
+                start = 0
+                while True:
+                    nl = block.find(b"\n", start)
+                    if nl < 0:
+                        break
+                    offsets.append(pos + nl + 1)
+                    start = nl + 1
+                pos += len(block)
+        self.scanned_bytes += pos - self.indexed_end
+
+        if offsets:
+            with open(self.idx_path, "ab") as idx:
+                idx.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            self.count += len(offsets)
+            self.indexed_end = offsets[-1]
+
+    # --- postings ---
+    def _open_postings(self):
+        db = sqlite3.connect(self.keys_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL").fetchall()
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS postings (name TEXT, key TEXT, line INTEGER, "
+            "PRIMARY KEY (name, key, line)) WITHOUT ROWID"
+        )
+        meta = dict(db.execute("SELECT name, value FROM meta"))
+        self._db = db
+        self.posted = meta.get("lines", 0)
+        self._posted_end = meta.get("end", 0)
+        if meta.get("keys") != ",".join(sorted(self.keys)):
+            self._reset_postings()  # new DB, or the key functions changed
+
+    def _reset_postings(self):
+        if self.posted:
+            self.posting_resets += 1
+        with self._db:
+            self._db.execute("DELETE FROM postings")
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('keys', ?), ('lines', 0), "
+                "('end', 0)",
+                (",".join(sorted(self.keys)),),
+            )
+        self.posted = self._posted_end = 0
+
+    def _post(self):
+        """
+        Add the keys of lines <self.posted>..<self.count> to the postings.
+        """
+        if not self.keys:
+            return
+        if self._db is None:
+            self._open_postings()
+
+        # the postings must describe the lines of the current offset index
+        if self.posted > self.count:
+            self._reset_postings()
+        elif self.posted:
+            with open(self.idx_path, "rb") as idx:
+                if self._read_offset(idx, self.posted - 1) != self._posted_end:
+                    self._reset_postings()
+
+        while self.posted < self.count:
+            start = self.posted
+            stop = min(self.count, start + self.POST_BATCH)
+            rows = []
+            for i, line in enumerate(self._lines(start, stop), start):
+                for name, key_of in self.keys.items():
+                    key = key_of(line)
+                    if key is not None:
+                        rows.append((name, key, i))
+            with open(self.idx_path, "rb") as idx:
+                end = self._read_offset(idx, stop - 1)
+
+            rows.sort()  # insert in key order (B-tree locality)
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", rows
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('lines', ?), ('end', ?)",
+                    (stop, end),
+                )
+            self.posted, self._posted_end = stop, end
+
+    def append(self, line: str):
+        """
+        Append one entry to the log (and its offset/keys to the sidecars).
+        """
+        data = (line.replace("\n", " ") + "\n").encode("utf-8")
+        self.refresh()  # index anything appended by someone else first
+        with self._lock:
+            folder = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(folder, exist_ok=True)
+            with open(self.path, "ab") as log:
+                log.write(data)
+                end = log.tell()
+
+            # the log may have had a partial last line before this one;
+            # only index when this write ended exactly where we expected
+            if end == self.indexed_end + len(data):
+                with open(self.idx_path, "ab") as idx:
+                    idx.write(_OFFSET.pack(end))
+                self.count += 1
+                self.indexed_end = end
+                self._post()
+
+    def __len__(self):
+        self.refresh()
+        return self.count
+
+    # --- reads ---
+    def lines(self, start: int, stop: int) -> list:
+        """
+        Return lines <start>..<stop> (0 = oldest; like a list slice).
+        """
+        self.refresh()
+        start, stop, _ = slice(start, stop).indices(self.count)
+        if start >= stop:
+            return []
+        return self._lines(start, stop)
+
+    def _lines(self, start: int, stop: int) -> list:
+        # lines <start>..<stop> of the index (0 <= start < stop <= count)
+        with open(self.idx_path, "rb") as idx:
+            begin = self._read_offset(idx, start - 1)
+            end = self._read_offset(idx, stop - 1)
+        with open(self.path, "rb") as log:
+            log.seek(begin)
+            data = log.read(end - begin)
+        # split on "\n" only, like the index (not str.splitlines())
+        return [line.decode("utf-8", "replace") for line in data[:-1].split(b"\n")]
+
+    def head(self, n: int, offset: int = 0) -> list:
+        """
+        Return the first <n> lines, skipping <offset> lines.
+        """
+        return self.lines(offset, offset + n)
+
+    def tail(self, n: int, offset: int = 0) -> list:
+        """
+        Return the last <n> lines (oldest first), skipping the newest
+        <offset> lines (like "tail -n <n + offset> | head -n <n>").
+        """
+        count = len(self)
+        stop = max(0, count - offset)
+        return self.lines(max(0, stop - n), stop)
+
+    def page(self, page: int, per_page: int = 10) -> list:
+        """
+        Return page <page> (0 = newest entries), newest first.
+        """
+        return list(reversed(self.tail(per_page, page * per_page)))
+
+    def _read_lines(self, numbers) -> list:
+        # lines with the given (indexed) line numbers, in that order
+        out = []
+        with open(self.idx_path, "rb") as idx, open(self.path, "rb") as log:
+            for i in numbers:
+                begin = self._read_offset(idx, i - 1)
+                end = self._read_offset(idx, i)
+                log.seek(begin)
+                out.append(log.read(end - begin - 1).decode("utf-8", "replace"))
+        return out
+
+    def find(
+        self, name: str, key: str, limit: int = 10, offset: int = 0, match=None
+    ) -> list:
+        """
+        Return up to <limit> lines whose <name> key (see <self.keys>) is
+        <key>, newest first, skipping the first <offset> of them. With
+        <match>, only lines for which <match>(line) is also true count.
+
+        Uses the postings: reads only the returned (and skipped) lines.
+        """
+        if name not in self.keys:
+            raise KeyError(name)
+        self.refresh()
+        with self._lock:
+            if match is None:
+                rows = self._db.execute(
+                    "SELECT line FROM postings WHERE name=? AND key=? "
+                    "ORDER BY line DESC LIMIT ? OFFSET ?",
+                    (name, key, limit, offset),
+                ).fetchall()
+                return self._read_lines([row[0] for row in rows])
+
+            out = []
+            below = self.posted
+            while len(out) < limit:
+                rows = self._db.execute(
+                    "SELECT line FROM postings WHERE name=? AND key=? AND line<? "
+                    "ORDER BY line DESC LIMIT ?",
+                    (name, key, below, max(limit, 100)),
+                ).fetchall()
+                if not rows:
+                    break
+                below = rows[-1][0]
+                for line in self._read_lines([row[0] for row in rows]):
+                    if not match(line):
+                        continue
+                    if offset > 0:
+                        offset -= 1
+                        continue
+                    out.append(line)
+                    if len(out) >= limit:
+                        break
+            return out
+
+    def search(
+        self, match, limit: int = 10, offset: int = 0, max_bytes: int = None
+    ) -> list:
+        """
+        Return up to <limit> lines for which <match>(line) is true, newest
+        first, skipping the first <offset> matches. Reads backwards from
+        the end and stops as soon as enough lines were found, or after
+        <max_bytes> (default: <self.max_scan_bytes>) of the log.
+
+        Reads the whole log for rare values; prefer <find()> where a key
+        function exists.
+        """
+        if not os.path.exists(self.path):
+            return []
+        if max_bytes is None:
+            max_bytes = self.max_scan_bytes
+        out = []
+        read = 0
+        for raw in reverse_lines(self.path, self.block_size):
+            read += len(raw) + 1
+            if max_bytes is not None and read > max_bytes:
+                break
+            line = raw.decode("utf-8", "replace")
+            if match(line):
+                if offset > 0:
+                    offset -= 1
+                    continue
+                out.append(line)
+                if len(out) >= limit:
+                    break
+        self.scanned_bytes += read
+        return out
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> dict:
+        return {
+            "lines": self.count,
+            "indexed_bytes": self.indexed_end,
+            "posted_lines": self.posted,
+            "scanned_bytes": self.scanned_bytes,
+            "rebuilds": self.rebuilds,
+            "posting_resets": self.posting_resets,
+        }
+
+
+# benchmark below:
+# build a multi-GB transaction log (default 2 GB; "python -m
+# utils.log_reader <GB>"), index and post it once, then compare subprocess
+# "tail", a full read, and LogReader for tail/pagination/filtered lookups
+# (filters: a rare user near the end, and the worst case, a missing user)
+if __name__ == "__main__":
+    import itertools
+    import random
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    GB = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "1_transactions.log")
+
+    def user_key(line):
+        parts = line.split("\t")
+        return parts[2].split(" (", 1)[0] if len(parts) > 2 else None
+
+    # small checks first: reverse reader + incremental index + postings
+    small = os.path.join(folder, "small.log")
+    log = LogReader(small, block_size=7, keys={"last": lambda l: l[-1]})
+    expected = [f"{i}\tentry é {i}" for i in range(50)]
+    for line in expected[:30]:
+        log.append(line)
+    with open(small, "a") as f:  # appended by "someone else"
+        f.write("\n".join(expected[30:]) + "\n")
+    assert log.head(50) == expected and len(log) == 50
+    assert log.tail(5, 2) == expected[43:48]
+    assert log.page(1, 10) == expected[39:29:-1]
+    assert [l.decode() for l in reverse_lines(small, 5)] == expected[::-1]
+    assert log.search(lambda l: l.endswith("7"), 2, 1) == [expected[37], expected[27]]
+    assert log.search(lambda l: l.endswith("7"), 2, 1, max_bytes=100) == []
+    assert log.find("last", "7", 2, 1) == [expected[37], expected[27]]
+    assert log.find("last", "7", 5, 0, lambda l: "2" in l) == [expected[27]]
+    log.close()
+    os.truncate(small.replace(".log", ".log.idx"), 8 * 10 + 3)  # torn index
+    log = LogReader(small, keys={"last": lambda l: l[-1]})
+    assert log.tail(3) == expected[-3:] and log.find("last", "9", 9)[0] == expected[49]
+    with open(small, "w") as f:  # rotated
+        f.write("0\tnew 9\n")
+    assert log.find("last", "9", 9) == ["0\tnew 9"] and log.posting_resets == 1
+    log.close()
+
+    # write the big log: "<id>\t<date>\t<user>\t<resource>\t<amount>"
+    rng = random.Random(0)
+    users = [f"{100000 + i} (user{i})" for i in range(5000)]
+    resources = [f"DRW-{i:03d}" for i in range(300)]
+    t0 = time.perf_counter()
+    written = 0
+    with open(path, "w") as f:
+        while written < GB * 1e9:
+            chunk = "".join(
+                f"{rng.getrandbits(64):016x}\t2026:01:01-12:00:00-UTC\t"
+                f"{rng.choice(users)}\t{rng.choice(resources)}\t"
+                f"{rng.randint(1, 500)}.0\n"
+                for _ in range(20000)
+            )
+            f.write(chunk)
+            written += len(chunk)
+    # a rare user, near the end
+    with open(path, "a") as f:
+        for _ in range(3):
+            f.write("0\t2026:01:02-00:00:00-UTC\t42 (rare)\tBL-001\t1.0\n")
+            f.write("".join(f"x\td\t{users[0]}\tDRW-000\t1.0\n" for _ in range(1000)))
+    print(f"log: {written / 1e9:.2f} GB in {time.perf_counter() - t0:.0f}s")
+
+    reader = LogReader(path, keys={"user": user_key})
+    t0 = time.perf_counter()
+    n_lines = len(reader)
+    elapsed = time.perf_counter() - t0
+    sidecars = os.path.getsize(path + ".idx") + os.path.getsize(reader.keys_path)
+    print(
+        f"index + postings build (once): {n_lines:,} lines in {elapsed:.1f}s, "
+        f"sidecars {sidecars / 1e6:.0f} MB"
+    )
+
+    def timed(name, fn, repeat=20):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        print(f"  {name:<36} {(time.perf_counter() - t0) / repeat * 1000:9.2f} ms")
+        return result
+
+    def proc_tail():
+        proc = subprocess.Popen(["tail", "-n20", path], stdout=subprocess.PIPE)
+        return [str(line, "utf-8").rstrip("\n") for line in proc.stdout.readlines()]
+
+    def scan_page():
+        with open(path, "r") as f:
+            return list(itertools.islice(f, n_lines // 2, n_lines // 2 + 20))
+
+    print("tail / pages of 20:")
+    a = timed("subprocess tail -n20", proc_tail)
+    b = timed("LogReader.tail(20)", lambda: reader.tail(20), repeat=1000)
+    assert a == b
+    timed("scan to middle page (no index)", scan_page, repeat=1)
+    timed("LogReader.head(20, n/2)", lambda: reader.head(20, n_lines // 2), 1000)
+    timed("LogReader.page(10_000)", lambda: reader.page(10000, 20), 1000)
+
+    print("filters (newest matches first):")
+    rare = timed(
+        "search(user=42, 3) (reverse scan)",
+        lambda: reader.search(lambda l: "\t42 (rare)\t" in l, 3),
+        repeat=5,
+    )
+    assert timed("find(user=42, 3)", lambda: reader.find("user", "42", 3), 1000) == rare
+    missing = timed(
+        "search(user=7, 3) (missing: full scan)",
+        lambda: reader.search(lambda l: "\t7 (" in l, 3),
+        repeat=1,
+    )
+    assert missing == [] == timed(
+        "find(user=7, 3) (missing)", lambda: reader.find("user", "7", 3), 1000
+    )
+    timed(
+        "find(user=<common>, 20, page 50)",
+        lambda: reader.find("user", users[1].split()[0], 20, 1000),
+        repeat=100,
+    )
+
+    timed(
+        "LogReader.append() (+ index)",
+        lambda: reader.append("1\t2026:01:03-00:00:00-UTC\t7 (new)\tBL-002\t2.0"),
+        repeat=1000,
+    )
+    assert reader.tail(1) == ["1\t2026:01:03-00:00:00-UTC\t7 (new)\tBL-002\t2.0"]
+    assert len(reader) == n_lines + 1000
+    assert reader.find("user", "7", 1) == reader.tail(1)
+    print(f"  {reader.get_stats()}")
+
+    reader.close()
+    os.remove(path)
+    os.remove(path + ".idx")
+    os.remove(reader.keys_path)
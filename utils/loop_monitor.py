@@ -0,0 +1,50 @@
+"""
+Event loop lag monitor.
+
+A task sleeps for <interval> seconds over and over; any extra time it takes
+to wake up is time the loop spent running something else without yielding
+(e.g. blocking SQLite work inside a listener). The last <window> samples are
+kept for percentiles.
+"""
+import asyncio
+import collections
+import time
+
+
+class LoopLagMonitor:
+    """
+    <interval>: seconds between samples
+    <window>:   number of recent samples kept
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 3000):
+        self.interval = interval
+        self.samples = collections.deque(maxlen=window)
+        self.worst = 0.0
+
+    async def run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - t0 - self.interval)
+            self.samples.append(lag)
+            if lag > self.worst:
+                self.worst = lag
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def get_stats(self) -> dict:
+        """
+        Lag in seconds: median, 99th percentile and max of the recent window,
+        plus the worst lag seen since startup.
+        """
+        return {
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": max(self.samples, default=0.0),
+            "worst": self.worst,
+        }
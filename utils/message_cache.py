@@ -0,0 +1,204 @@
+"""
+Shared cache for messages fetched over REST (channel.fetch_message()).
+
+Raw reaction events only carry IDs, so every reaction listener used to
+fetch the message itself: one reaction on an art post meant up to three
+GET requests for the same message (Statistics, and twice in PointSystem).
+<MessageCache.get()> keeps fetched messages in a TTL-bounded LRU, and
+concurrent callers for a message that is being fetched await that one
+request (single flight) instead of sending their own.
+
+Cached messages are not updated by the gateway; the owner must <evict()>
+them on edits/deletes (see the on_raw_message_* listeners in
+UserDataAccessor). Fields that change without an edit event (e.g. the
+reaction counts) may be up to <ttl> seconds old.
+"""
+import asyncio
+import collections
+import time
+
+
+class MessageCache:
+    """
+    <ttl>:      seconds a fetched message is reused
+    <maxsize>:  messages kept (least recently used dropped first)
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._cache = collections.OrderedDict()  # message ID -> (expires, msg)
+        self._inflight = {}  # message ID -> asyncio.Task fetching it
+
+        # counters (see <MessageCache.get_stats()>)
+        self.hits = 0
+        self.joined = 0  # callers that awaited another caller's fetch
+        self.fetches = 0
+        self.errors = 0
+        self.evictions = 0
+
+    async def get(self, channel, message_id: int):
+        """
+        Return message <message_id> of <channel> (cached, or fetched once
+        no matter how many handlers ask for it at the same time).
+
+        Raises whatever <channel.fetch_message()> raises (errors are not
+        cached).
+        """
+        entry = self._cache.get(message_id)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self.hits += 1
+                self._cache.move_to_end(message_id)
+                return entry[1]
+            del self._cache[message_id]
+
+        task = self._inflight.get(message_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(channel, message_id))
+            self._inflight[message_id] = task
+        else:
+            self.joined += 1
+
+        # shield: a cancelled caller mustn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, channel, message_id: int):
+        self.fetches += 1
+        current = asyncio.current_task()
+        try:
+            message = await channel.fetch_message(message_id)
+        except BaseException:
+            self.errors += 1
+            raise
+        finally:
+            # still registered = nothing evicted the message meanwhile
+            registered = self._inflight.get(message_id) is current
+            if registered:
+                del self._inflight[message_id]
+
+        if registered:
+            self.put(message)
+        return message
+
+    def put(self, message):
+        """
+        Cache <message> (e.g. one received with an event).
+        """
+        self._cache[message.id] = (time.monotonic() + self.ttl, message)
+        self._cache.move_to_end(message.id)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def evict(self, message_id: int):
+        """
+        Drop message <message_id> (edited/deleted); an in-flight fetch of
+        it still answers its callers but isn't cached.
+        """
+        if self._cache.pop(message_id, None) is not None:
+            self.evictions += 1
+        self._inflight.pop(message_id, None)
+
+    def clear(self):
+        self._cache.clear()
+        self._inflight.clear()
+
+    def get_stats(self) -> dict:
+        requests = self.hits + self.joined + self.fetches
+        return {
+            "hits": self.hits,
+            "joined": self.joined,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "hit_ratio": (self.hits + self.joined) / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "cached": len(self._cache),
+        }
+
+
+# benchmark below:
+# a burst of reactions on a few popular art posts; each reaction runs the
+# three handlers that need the message (Statistics, PointSystem art points,
+# PointSystem author points) concurrently against a simulated REST latency.
+# Compares REST calls and the time a reaction waits for its message:
+# fetch per handler vs. MessageCache
+# (run from the repo root: "python -m utils.message_cache [N]")
+if __name__ == "__main__":
+    import random
+    import sys
+    from types import SimpleNamespace
+
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    LATENCY = 0.05  # seconds per simulated GET /messages/{id}
+    POSTS = 20
+
+    class Channel:
+        def __init__(self):
+            self.calls = 0
+
+        async def fetch_message(self, message_id):
+            self.calls += 1
+            await asyncio.sleep(LATENCY)
+            if message_id < 0:
+                raise LookupError("Unknown Message")
+            return SimpleNamespace(id=message_id, author=f"artist{message_id}")
+
+    async def checks():
+        # single flight, errors not cached, eviction during a fetch
+        channel, cache = Channel(), MessageCache(ttl=60.0)
+        got = await asyncio.gather(*(cache.get(channel, 1) for _ in range(50)))
+        assert channel.calls == 1 and all(m is got[0] for m in got)
+        assert await cache.get(channel, 1) is got[0] and channel.calls == 1
+
+        for _ in range(2):
+            results = await asyncio.gather(
+                cache.get(channel, -1), cache.get(channel, -1), return_exceptions=True
+            )
+            assert all(isinstance(r, LookupError) for r in results)
+        assert channel.calls == 3
+
+        pending = asyncio.ensure_future(cache.get(channel, 2))
+        await asyncio.sleep(0)
+        cache.evict(2)  # edited while being fetched
+        assert (await pending).id == 2 and 2 not in cache._cache
+
+        # a cancelled caller doesn't cancel the fetch for the others
+        first = asyncio.ensure_future(cache.get(channel, 3))
+        second = asyncio.ensure_future(cache.get(channel, 3))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert (await second).id == 3
+
+    asyncio.run(checks())
+
+    rng = random.Random(0)
+    # popular posts get most of the reactions
+    reactions = [int(rng.paretovariate(1.2)) % POSTS for _ in range(N)]
+
+    async def burst(fetch):
+        async def reaction(message_id):
+            # the three listeners run concurrently for each reaction
+            t0 = time.perf_counter()
+            await asyncio.gather(*(fetch(message_id) for _ in range(3)))
+            return time.perf_counter() - t0
+
+        tasks = []
+        for message_id in reactions:
+            tasks.append(asyncio.ensure_future(reaction(message_id)))
+            await asyncio.sleep(0.0002)  # a few thousand reactions/s arriving
+        return await asyncio.gather(*tasks)
+
+    for name in ("fetch per handler", "MessageCache"):
+        channel, cache = Channel(), MessageCache(ttl=60.0)
+        if name == "MessageCache":
+            fetch = lambda mid: cache.get(channel, mid)
+        else:
+            fetch = channel.fetch_message
+
+        waits = asyncio.run(burst(fetch))
+        print(
+            f"{name:<18} {N:,} reactions: {channel.calls:6,} REST calls "
+            f"({channel.calls / N:.3f}/reaction), "
+            f"mean wait {sum(waits) / N * 1000:5.1f} ms"
+        )
+    print(f"  {cache.get_stats()}")
@@ -0,0 +1,308 @@
+"""
+Per-message feature extraction, shared by every on_message/reaction listener.
+
+Several cogs look at the same discord.Message: the point distributor
+(length, emojis, links, embeds), Verification (intro message criteria),
+PointSystem (attachment types, replies, art zone) ... Instead of each of
+them re-running the same regexes and checks, <MessageAnalyzer.get()>
+computes one immutable <MessageFeatures> record per message and caches it,
+so later listeners (and reactions/replies to the same message) reuse it.
+"""
+import collections
+from typing import NamedTuple, Optional
+
+from utils.emoji_matcher import emoji_matcher
+from utils.sync_utils import get_links
+
+
+_NO_ZONES = frozenset()
+
+
+class MessageFeatures(NamedTuple):
+    key: tuple  # (message ID, edited_at)
+    length: int  # len(message.content)
+    length_bucket: str  # "short", "medium" or "long"
+    clean_length: int  # len(message.clean_content)
+    word_count: int  # space-separated words in message.clean_content
+    emoji_count: int  # emojis in message.clean_content
+    links: tuple  # URLs in message.content
+    attachment_kinds: tuple  # "image", "video" or "other" per attachment
+    embed_kinds: tuple  # "video", "image" or "other" per embed
+    reply_to: Optional[int]  # ID of the message replied to
+    zones: frozenset  # designation zones the channel is registered as
+
+    @property
+    def has_art(self) -> bool:
+        """
+        True if the (first) attachment is an image or video.
+        """
+        return bool(self.attachment_kinds) and self.attachment_kinds[0] != "other"
+
+
+def attachment_kind(attachment) -> str:
+    content_type = attachment.content_type or ""
+    if "image" in content_type:
+        return "image"
+    if "video" in content_type:
+        return "video"
+    return "other"
+
+
+def embed_kind(embed) -> str:
+    if embed.video:
+        return "video"
+    if embed.image:
+        return "image"
+    return "other"
+
+
+def extract_features(
+    message, zones: frozenset = _NO_ZONES, med_len: int = 50, long_len: int = 185
+) -> MessageFeatures:
+    """
+    Compute the <MessageFeatures> of <message> (uncached).
+
+    <zones>:    designation zones of the message's channel
+    <med_len>:  content length for the "medium" length bucket
+    <long_len>: content length for the "long" length bucket
+    """
+    content = message.content or ""
+    clean = message.clean_content or ""
+    length = len(content)
+
+    if length >= long_len:
+        bucket = "long"
+    elif length >= med_len:
+        bucket = "medium"
+    else:
+        bucket = "short"
+
+    ref = message.reference
+    return MessageFeatures(
+        key=(message.id, message.edited_at),
+        length=length,
+        length_bucket=bucket,
+        clean_length=len(clean),
+        word_count=len(clean.split(" ")),
+        emoji_count=emoji_matcher.count(clean),
+        links=tuple(get_links(content)),
+        attachment_kinds=tuple(attachment_kind(a) for a in message.attachments),
+        embed_kinds=tuple(embed_kind(e) for e in message.embeds),
+        reply_to=ref.message_id if ref is not None else None,
+        zones=zones,
+    )
+
+
+class MessageAnalyzer:
+    """
+    LRU cache of <MessageFeatures>, keyed by message ID (+ edit time, so an
+    edited message is analyzed again).
+
+    <zone_lookup>:  callable(gid, channel_id) -> frozenset of zone names
+    <maxsize>:      number of records kept
+    <med_len>, <long_len>: see <extract_features()>
+    """
+
+    def __init__(
+        self,
+        zone_lookup=None,
+        maxsize: int = 2048,
+        med_len: int = 50,
+        long_len: int = 185,
+    ):
+        self.zone_lookup = zone_lookup
+        self.maxsize = maxsize
+        self.med_len = med_len
+        self.long_len = long_len
+        self._cache = collections.OrderedDict()
+
+        # counters (see <MessageAnalyzer.get_stats()>)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, message) -> MessageFeatures:
+        """
+        Return the (cached) features of <message>.
+        """
+        key = (message.id, message.edited_at)
+
+        # pop + re-insert (not move_to_end) so a concurrent <clear()> from
+        # another thread can't make this raise
+        features = self._cache.pop(key, None)
+        if features is not None:
+            self.hits += 1
+            self._cache[key] = features
+            return features
+
+        self.misses += 1
+        zones = _NO_ZONES
+        if self.zone_lookup is not None and message.guild is not None:
+            zones = self.zone_lookup(str(message.guild.id), str(message.channel.id))
+
+        features = extract_features(message, zones, self.med_len, self.long_len)
+        self._cache[key] = features
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return features
+
+    def clear(self):
+        """
+        Drop all cached records (e.g. after designation zones changed).
+        """
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "cached": len(self._cache),
+        }
+
+
+# benchmark below:
+# replay a synthetic corpus (default 1M events: messages, replies to art and
+# reactions) through the old per-listener checks and through one shared,
+# cached MessageFeatures record per message
+# (run from the repo root: "python -m utils.message_features [N]")
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+    from types import SimpleNamespace
+
+    from cogs.point_distributor import Distributor
+    from utils.zone_index import ZoneIndex
+
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    GID = "1"
+    CHANNELS = [str(100 + i) for i in range(20)]
+    zones = ZoneIndex({"art_zone": "100,101", "introductions": "102", "rules": "103"})
+    raw_zones = dict(zones)
+
+    distributor = Distributor(None)
+    flags = {
+        k: True
+        for k in ("TEXT", "TEXT_MED", "TEXT_LONG", "EMOTE", "IMAGE", "VIDEO", "URL")
+    }
+    flags["NO_POINTS"] = False
+
+    TEXTS = [
+        "hi",
+        "good morning everyone 😀",
+        "check out my new piece https://example.com/art/123 what do you think?",
+        "Hello! I'm new here, I mostly draw fantasy landscapes and characters. "
+        "Looking forward to sharing my work with all of you 🎨✨",
+        "lol",
+        "that lighting is amazing, how long did it take you to render the "
+        "background? the colours on the water are so good",
+    ]
+    IMAGE = SimpleNamespace(content_type="image/png")
+    FILE = SimpleNamespace(content_type="application/zip")
+    NO_EMBED = SimpleNamespace(video=None, image=None)
+    GUILD = SimpleNamespace(id=int(GID))
+
+    def corpus(seed=1):
+        """
+        Yield ("message", msg) and ("reaction", msg) events; ~20% of the
+        messages reply to a recent message, ~30% of events are reactions.
+        """
+        rng = random.Random(seed)
+        recent = []
+        for i in range(N):
+            if recent and rng.random() < 0.3:
+                yield "reaction", rng.choice(recent)
+                continue
+            text = rng.choice(TEXTS)
+            channel = rng.choice(CHANNELS)
+            reply = rng.choice(recent) if recent and rng.random() < 0.2 else None
+            msg = SimpleNamespace(
+                id=i,
+                edited_at=None,
+                guild=GUILD,
+                channel=SimpleNamespace(id=int(channel)),
+                content=text,
+                clean_content=text,
+                attachments=[rng.choice((IMAGE, FILE))] if i % 4 == 0 else [],
+                embeds=[NO_EMBED] if i % 7 == 0 else [],
+                reference=(
+                    SimpleNamespace(message_id=reply.id, resolved=reply)
+                    if reply is not None
+                    else None
+                ),
+            )
+            recent.append(msg)
+            if len(recent) > 500:
+                recent.pop(0)
+            yield "message", msg
+
+    # --- old: every listener inspects the raw message itself ---
+    def old_is_channel(zone_name, channel_id):
+        return channel_id in (raw_zones.get(zone_name) or "").split(",")
+
+    def old_has_art(msg):
+        return len(msg.attachments) > 0 and any(
+            typ in msg.attachments[0].content_type for typ in ("image", "video")
+        )
+
+    def old_get_points(msg):
+        return (
+            distributor.get_text_points(msg.content, flags)
+            + distributor.get_emoji_points(msg.clean_content, flags)
+            + distributor.get_embed_points(msg.embeds, flags)
+            + distributor.get_url_points(msg.content, flags)
+        )
+
+    def old_path(event, msg):
+        chid = str(msg.channel.id)
+        if event == "reaction":
+            return old_is_channel("art_zone", chid) and old_has_art(msg)
+
+        # Verification.on_message
+        intro = old_is_channel("introductions", chid) and (
+            len(msg.clean_content) > 20 and len(msg.clean_content.split(" ")) > 2
+        )
+        # PointSystem: art post, else art reply, else normal points
+        if old_is_channel("art_zone", chid) and old_has_art(msg):
+            return intro, distributor.get_embed_points(msg.embeds, flags)
+        if old_is_channel("art_zone", chid) and msg.reference is not None:
+            replied_to = msg.reference.resolved
+            if old_has_art(replied_to):
+                return intro, old_get_points(replied_to)
+        return intro, old_get_points(msg)
+
+    # --- new: one cached record per message ---
+    analyzer = MessageAnalyzer(lambda gid, chid: zones.zones_of(chid))
+
+    def new_path(event, msg):
+        f = analyzer.get(msg)
+        if event == "reaction":
+            return "art_zone" in f.zones and f.has_art
+
+        intro = "introductions" in f.zones and (
+            f.clean_length > 20 and f.word_count > 2
+        )
+        if "art_zone" in f.zones and f.has_art:
+            return intro, distributor.get_embed_kind_points(f.embed_kinds, flags)
+        if "art_zone" in f.zones and f.reply_to is not None:
+            replied_to = msg.reference.resolved
+            rf = analyzer.get(replied_to)
+            if rf.has_art:
+                return intro, distributor.get_points(replied_to, flags, rf)[0]
+        return intro, distributor.get_points(msg, flags, f)[0]
+
+    def replay(handler):
+        t0 = time.perf_counter()
+        out = [handler(event, msg) for event, msg in corpus()]
+        return time.perf_counter() - t0, out
+
+    base, _ = replay(lambda event, msg: None)
+    t_old, r_old = replay(old_path)
+    t_new, r_new = replay(new_path)
+    assert r_old == r_new, "old and new paths disagree"
+
+    print(f"{N:,} events (corpus generation alone: {base:.1f}s):")
+    for name, t in (("old (per listener)", t_old), ("MessageFeatures", t_new)):
+        print(f"  {name:<20} {t - base:7.1f}s  {N / (t - base):10,.0f} events/s")
+    print(f"  analyzer: {analyzer.get_stats()}")
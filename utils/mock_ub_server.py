@@ -0,0 +1,235 @@
+"""
+Local stand-in for the UnbelievaBoat user-balance API (tests/benchmarks).
+
+Serves GET/PUT/PATCH on "/api/v1/guilds/{gid}/users/{uid}" from an
+in-memory balance table, with optional artificial latency and an optional
+requests-per-second limit that answers 429 + Retry-After like the real API.
+
+Run this file directly for a latency benchmark of blocking `requests`
+calls vs. <UBClient>, and a load test of <UBClient>'s rate limiting.
+"""
+import asyncio
+import collections
+import json
+import threading
+import time
+
+from aiohttp import web
+
+
+class MockUBServer:
+    """
+    <latency>:      seconds to wait before answering each request
+    <rate_limit>:   max. requests per second (None = unlimited)
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit: int = None):
+        self.latency = latency
+        self.rate_limit = rate_limit
+
+        # (gid, uid) -> {"cash": .., "bank": ..}
+        self.balances = collections.defaultdict(lambda: {"cash": 0, "bank": 0})
+
+        # every accepted PATCH/PUT body, in arrival order
+        self.requests = []
+        self.counts = collections.Counter()  # method -> count (incl. 429s)
+        self.rejected = 0
+
+        self._window = collections.deque()  # timestamps of accepted requests
+        self._runner = None
+        self.base_url = None
+
+    def _rate_limited(self):
+        """
+        Return seconds until the next slot frees up, or None if allowed.
+        """
+        if self.rate_limit is None:
+            return None
+        now = time.monotonic()
+        while self._window and self._window[0] <= now - 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.rate_limit:
+            return self._window[0] + 1.0 - now
+        self._window.append(now)
+        return None
+
+    def _body(self, gid, uid):
+        bal = self.balances[(gid, uid)]
+        return {
+            "rank": "1",
+            "user_id": uid,
+            "cash": bal["cash"],
+            "bank": bal["bank"],
+            "total": bal["cash"] + bal["bank"],
+        }
+
+    async def handle(self, request):
+        self.counts[request.method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        retry_after = self._rate_limited()
+        if retry_after is not None:
+            self.rejected += 1
+            return web.json_response(
+                {"message": "You are being rate limited."},
+                status=429,
+                headers={"Retry-After": str(int(retry_after * 1000))},
+            )
+
+        gid = request.match_info["gid"]
+        uid = request.match_info["uid"]
+        bal = self.balances[(gid, uid)]
+
+        if request.method in ("PUT", "PATCH"):
+            data = await request.json()
+            self.requests.append((request.method, gid, uid, data))
+            for k in ("cash", "bank"):
+                if request.method == "PUT":
+                    bal[k] = data.get(k, bal[k])
+                else:
+                    bal[k] += data.get(k, 0)
+
+        return web.json_response(self._body(gid, uid))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start serving; returns the base URL to hand to <UBClient>.
+        """
+        app = web.Application()
+        app.router.add_route("*", "/api/v1/guilds/{gid}/users/{uid}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}/api/v1"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self) -> str:
+        """
+        Run the server on its own event loop in a daemon thread
+        (needed when the caller makes blocking requests).
+        """
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self.base_url
+
+
+# benchmarks below:
+#   1. N point awards, blocking `requests` (the old sync_utils helpers)
+#      vs. UBClient
+#   2. load test: 1,000 awards against a rate-limited server; the client's
+#      limiter is set slightly ABOVE the server's limit so 429s/Retry-After
+#      are exercised too -- every award must still arrive exactly once
+if __name__ == "__main__":
+    import requests
+
+    from utils.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, RateLimiter
+    from utils.ub_client import UBClient
+
+    N = 200
+    server = MockUBServer(latency=0.02)
+    base_url = server.start_in_thread()
+    data = {"cash": 0, "bank": 5, "reason": "benchmark"}
+    head = {"Accept": "application/json", "Authorization": "token"}
+
+    async def lag_monitor(stop, out):
+        # worst delay of a 10ms ticker = how long the event loop was blocked
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.01)
+            out.append(time.perf_counter() - t0 - 0.01)
+
+    async def run(award_all):
+        stop, lags = asyncio.Event(), []
+        monitor = asyncio.ensure_future(lag_monitor(stop, lags))
+        await asyncio.sleep(0.02)
+        t0 = time.perf_counter()
+        await award_all()
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        await monitor
+        return elapsed, max(lags)
+
+    async def blocking():
+        for i in range(N):
+            url = f"{base_url}/guilds/1/users/{i}"
+            requests.patch(url, data=json.dumps(data), headers=head)
+
+    async def main():
+        # effectively unlimited: this part measures pooling, not rate limits
+        client = UBClient(
+            base_url,
+            token_loader=lambda bot_id: "token",
+            limiter=RateLimiter(default_rate=10 ** 6),
+        )
+
+        async def sequential():
+            for i in range(N):
+                await client.patch(0, 1, i, data)
+
+        async def concurrent():
+            await asyncio.gather(*(client.patch(0, 1, i, data) for i in range(N)))
+
+        results = [
+            ("requests (blocking)", await run(blocking)),
+            ("UBClient sequential", await run(sequential)),
+            ("UBClient concurrent", await run(concurrent)),
+        ]
+        await client.close()
+
+        print(f"{N} PATCHes, {server.latency * 1000:.0f}ms server latency:")
+        for name, (elapsed, lag) in results:
+            print(
+                f"  {name:<20}  {elapsed / N * 1000:6.2f} ms/award  "
+                f"worst event loop stall {lag * 1000:7.1f} ms"
+            )
+
+        await load_test()
+
+    async def load_test(n_awards=1000, server_rate=200, client_rate=220):
+        server = MockUBServer(latency=0.005, rate_limit=server_rate)
+        base_url = await server.start()
+        limiter = RateLimiter({"PATCH": client_rate}, max_queue=64)
+        client = UBClient(
+            base_url, token_loader=lambda bot_id: "token", limiter=limiter
+        )
+
+        async def award(i):
+            # every 10th award is a high-priority one (e.g. a command)
+            priority = PRIORITY_HIGH if i % 10 == 0 else PRIORITY_LOW
+            data = {"cash": 0, "bank": 1, "reason": f"award {i}"}
+            res = await client.patch(0, 1, i % 50, data, priority=priority)
+            return res.ok
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(award(i) for i in range(n_awards)))
+        elapsed = time.perf_counter() - t0
+        await client.close()
+        await server.stop()
+
+        delivered = sum(b["bank"] for b in server.balances.values())
+        print(f"load test: {n_awards} awards, server limit {server_rate}/s:")
+        print(
+            f"  {elapsed:.2f}s, ok: {sum(results)}, delivered: {delivered}, "
+            f"429s: {server.rejected}, limiter: {limiter.get_stats()}"
+        )
+        assert all(results) and delivered == n_awards
+        assert len(server.requests) == n_awards
+
+    asyncio.get_event_loop().run_until_complete(main())
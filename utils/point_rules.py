@@ -0,0 +1,389 @@
+"""
+Point rules for the message/reaction point system (see cogs/point_distributor.py).
+
+Rule file ("action_point_distribution.txt"), one `<rule>,<points>` per line;
+blank lines and "#" comments are ignored:
+
+    text,1.0            # short message
+    text_med,2.0        # medium-length message
+    text_long,3.0       # long message
+    emote,2.0           # message has emojis
+    image,5.0           # per image embed/attachment
+    video_upload,7.0    # per video embed
+    url,3.0             # message has links
+    reaction,0.5        # per reaction
+
+Two optional parameters tune the emoji rule (defaults in <PARAMS>):
+
+    emote_many_threshold,10     # more emojis than this ...
+    emote_many_factor,2.1       # ... multiply "emote" by this
+
+Per-guild overrides ("point_overrides.json", optional) replace single values:
+
+    {"<guild_id>": {"image": 8.0, "url": 0}}
+
+Both files are validated and compiled into one flat <PointTable> per guild
+when loaded, and reloaded when they change on disk (checked at most once
+every <poll_interval> seconds). A file that fails validation is reported
+and the last good rules stay in use.
+
+<PointRules.score_batch()> scores many MessageFeatures at once (backfills,
+"what-if" re-scoring); it uses NumPy when it is installed.
+"""
+import json
+import math
+import os
+import threading
+import time
+import traceback
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# rule name -> point flag (see GlobalCog.pt_flags) that enables it
+RULES = {
+    "text": "TEXT",
+    "text_med": "TEXT_MED",
+    "text_long": "TEXT_LONG",
+    "emote": "EMOTE",
+    "image": "IMAGE",
+    "video_upload": "VIDEO",
+    "url": "URL",
+    "reaction": "REACTION",
+}
+
+# optional parameters and their defaults
+PARAMS = {"emote_many_threshold": 10.0, "emote_many_factor": 2.1}
+
+LENGTH_BUCKETS = ("short", "medium", "long")
+
+
+class PointTable(NamedTuple):
+    text: float
+    text_med: float
+    text_long: float
+    emote: float
+    image: float
+    video_upload: float
+    url: float
+    reaction: float
+    emote_many_threshold: float
+    emote_many_factor: float
+
+
+def parse_rules(lines, source: str = "<rules>") -> dict:
+    """
+    Parse and validate rule file <lines>; return {rule: value}.
+
+    Raises ValueError naming <source> and the line number on bad input.
+    """
+    values = {}
+    for n, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            name, value = (part.strip() for part in line.split(","))
+        except ValueError:
+            raise ValueError(f"{source}:{n}: expected '<rule>,<points>'")
+        values.update(validate({name: value}, f"{source}:{n}"))
+
+    missing = [name for name in RULES if name not in values]
+    if missing:
+        raise ValueError(f"{source}: missing rule(s): {', '.join(missing)}")
+    return values
+
+
+def validate(values: dict, source: str) -> dict:
+    """
+    Check rule names and values; return {rule: float value}.
+    """
+    out = {}
+    for name, value in values.items():
+        if name not in RULES and name not in PARAMS:
+            raise ValueError(f"{source}: unknown rule '{name}'")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{source}: '{name}' is not a number ({value!r})")
+        if not math.isfinite(value):
+            raise ValueError(f"{source}: '{name}' must be finite")
+        out[name] = value
+    return out
+
+
+class PointRules:
+    """
+    <path>:             rule file
+    <overrides_path>:   per-guild overrides (JSON); None = no overrides
+    <poll_interval>:    min. seconds between checks for changed files
+    """
+
+    def __init__(self, path: str, overrides_path: str = None, poll_interval=5.0):
+        self.path = path
+        self.overrides_path = overrides_path
+        self.poll_interval = poll_interval
+
+        self.default = None  # PointTable
+        self.guilds = {}  # guild ID (str) -> PointTable
+        self.reloads = 0
+
+        self._stamps = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def _file_stamps(self):
+        stamps = []
+        for path in (self.path, self.overrides_path):
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except (FileNotFoundError, TypeError):
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _compile(self):
+        with open(self.path, "r") as f:
+            base = dict(PARAMS, **parse_rules(f, self.path))
+
+        overrides = {}
+        if self.overrides_path and os.path.exists(self.overrides_path):
+            with open(self.overrides_path, "r") as f:
+                for gid, values in json.load(f).items():
+                    source = f"{self.overrides_path} [{gid}]"
+                    overrides[str(gid)] = validate(values, source)
+
+        default = PointTable(**base)
+        guilds = {gid: PointTable(**dict(base, **v)) for gid, v in overrides.items()}
+        return default, guilds
+
+    def refresh(self, force: bool = False):
+        """
+        Recompile the rules if either file changed on disk (or if <force>).
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.poll_interval:
+            return
+        with self._lock:
+            self._checked = now
+            stamps = self._file_stamps()
+            if not force and stamps == self._stamps:
+                return
+            try:
+                self.default, self.guilds = self._compile()
+                self.reloads += 1
+            except (OSError, ValueError):
+                # first load must succeed; afterwards keep the last good rules
+                if self.default is None:
+                    raise
+                traceback.print_exc()
+            self._stamps = stamps
+
+    def table(self, gid=None) -> PointTable:
+        """
+        Return the compiled point table for guild <gid> (or the defaults).
+        """
+        self.refresh()
+        if gid is not None:
+            table = self.guilds.get(str(gid))
+            if table is not None:
+                return table
+        return self.default
+
+    def value(self, rule: str, gid=None) -> float:
+        return getattr(self.table(gid), rule)
+
+    def score(self, features, flags, gid=None) -> float:
+        """
+        Return the points for one MessageFeatures record under <flags>.
+        """
+        if flags.get("NO_POINTS"):
+            return 0.0
+        t = self.table(gid)
+        points = 0.0
+
+        # text length
+        bucket = features.length_bucket
+        if bucket == "long":
+            points += t.text_long if flags.get("TEXT_LONG", True) else 0.0
+        elif bucket == "medium":
+            points += t.text_med if flags.get("TEXT_MED", True) else 0.0
+        else:
+            points += t.text if flags.get("TEXT", True) else 0.0
+
+        # emojis
+        if features.emoji_count >= 1 and flags.get("EMOTE", True):
+            if features.emoji_count > t.emote_many_threshold:
+                points += t.emote_many_factor * t.emote
+            else:
+                points += t.emote
+
+        # image/video embeds
+        for kind in features.embed_kinds:
+            if kind == "video":
+                points += t.video_upload if flags.get("VIDEO", True) else 0.0
+            elif kind == "image":
+                points += t.image if flags.get("IMAGE", True) else 0.0
+
+        # links
+        if features.links and flags.get("URL", True):
+            points += t.url
+
+        return points
+
+    def score_batch(self, features_list, flags, gid=None):
+        """
+        Score many MessageFeatures records at once.
+
+        Returns a NumPy array of points (a list if NumPy isn't installed).
+        """
+        if np is None:
+            return [self.score(f, flags, gid) for f in features_list]
+
+        n = len(features_list)
+        if flags.get("NO_POINTS") or n == 0:
+            return np.zeros(n)
+        t = self.table(gid)
+
+        def on(flag):
+            return 1.0 if flags.get(flag, True) else 0.0
+
+        # per-record columns
+        bucket = np.fromiter(
+            (LENGTH_BUCKETS.index(f.length_bucket) for f in features_list),
+            dtype=np.int8,
+            count=n,
+        )
+        emoji = np.fromiter((f.emoji_count for f in features_list), float, n)
+        kinds = [f.embed_kinds for f in features_list]
+        videos = np.fromiter((k.count("video") for k in kinds), float, n)
+        images = np.fromiter((k.count("image") for k in kinds), float, n)
+        links = np.fromiter((bool(f.links) for f in features_list), float, n)
+
+        length_points = np.array(
+            [
+                t.text * on("TEXT"),
+                t.text_med * on("TEXT_MED"),
+                t.text_long * on("TEXT_LONG"),
+            ]
+        )
+        emote = t.emote * on("EMOTE")
+
+        points = length_points[bucket]
+        points += np.where(
+            emoji > t.emote_many_threshold,
+            t.emote_many_factor * emote,
+            np.where(emoji >= 1, emote, 0.0),
+        )
+        points += videos * (t.video_upload * on("VIDEO"))
+        points += images * (t.image * on("IMAGE"))
+        points += links * (t.url * on("URL"))
+        return points
+
+    def get_stats(self) -> dict:
+        return {"reloads": self.reloads, "guild_overrides": len(self.guilds)}
+
+
+# basic tests + benchmark below:
+# validation, hot reload, per-guild overrides, then <score()> in a loop vs.
+# <score_batch()> on synthetic MessageFeatures (default 1M records)
+# (run from the repo root: "python -m utils.point_rules [N]")
+if __name__ == "__main__":
+    import random
+    import sys
+    import tempfile
+
+    from utils.message_features import MessageFeatures
+
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "rules.txt")
+    overrides_path = os.path.join(folder, "overrides.json")
+
+    with open("cogs/action_point_distribution.txt", "r") as f:
+        RULE_TEXT = f.read()
+
+    # validation
+    good = RULE_TEXT.splitlines()
+    assert parse_rules(good + ["", "# comment", "url,4  # inline"])["url"] == 4.0
+    for bad in (
+        good + ["text,abc"],
+        good + ["text,1.0,2"],
+        good + ["txt,1.0"],
+        good + ["text,inf"],
+        ["text,1.0"],  # missing rules
+    ):
+        try:
+            parse_rules(bad)
+        except ValueError as e:
+            print(f"rejected: {e}")
+        else:
+            raise AssertionError(f"accepted {bad!r}")
+
+    # hot reload; a broken file keeps the last good rules
+    with open(path, "w") as f:
+        f.write(RULE_TEXT)
+    rules = PointRules(path, overrides_path, poll_interval=0)
+    image = rules.value("image")
+
+    def rewrite(text):
+        with open(path, "w") as f:
+            f.write(text)
+        os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)  # new mtime
+
+    rewrite(RULE_TEXT + "\nimage,99\n")
+    assert rules.value("image") == 99.0 and rules.reloads == 2
+    rewrite(RULE_TEXT + "\nimage,lots\n")  # (prints the error)
+    assert rules.value("image") == 99.0, "broken file replaced good rules"
+    rewrite(RULE_TEXT)
+    assert rules.value("image") == image
+
+    # per-guild overrides
+    with open(overrides_path, "w") as f:
+        json.dump({"42": {"url": 0, "emote_many_factor": 3}}, f)
+    assert rules.value("url", 42) == 0.0 and rules.value("url") > 0
+    assert rules.table("42").emote_many_factor == 3.0 and rules.table(7) is rules.default
+
+    # score() vs. score_batch()
+    rules.poll_interval = 5.0
+    rng = random.Random(0)
+    KINDS = ((), (), (), ("image",), ("video",), ("other",), ("image", "video"))
+    features = [
+        MessageFeatures(
+            key=(i, None),
+            length=0,
+            length_bucket=rng.choice(LENGTH_BUCKETS),
+            clean_length=0,
+            word_count=0,
+            emoji_count=rng.choice((0, 0, 0, 1, 2, 11, 30)),
+            links=("https://example.com",) if rng.random() < 0.1 else (),
+            attachment_kinds=(),
+            embed_kinds=rng.choice(KINDS),
+            reply_to=None,
+            zones=frozenset(),
+        )
+        for i in range(N)
+    ]
+    flags = {flag: True for flag in RULES.values()}
+    flags["VIDEO"] = False
+
+    for gid in (None, 42):
+        t0 = time.perf_counter()
+        looped = [rules.score(f, flags, gid) for f in features]
+        t_loop = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batched = rules.score_batch(features, flags, gid)
+        t_batch = time.perf_counter() - t0
+
+        assert all(abs(a - b) < 1e-9 for a, b in zip(looped, batched))
+        print(
+            f"guild {gid}: score() {N / t_loop:12,.0f}/s,  "
+            f"score_batch() {N / t_batch:12,.0f}/s "
+            f"({'numpy' if np is not None else 'no numpy'})"
+        )
@@ -0,0 +1,189 @@
+"""
+In-memory cache of "prefixes.json" (command prefixes for both bots).
+
+File shape:
+    {
+        "kaede":     {"<guild_id>": "<prefix>", ...},
+        "yoshimura": {"<guild_id>": "<prefix>", ...}
+    }
+
+A plain string in place of a bot's dict (the old shape) is that bot's
+prefix in every guild. The first per-guild <set()> keeps it as the bot's
+fallback, under the reserved <DEFAULT_KEY>:
+
+    {"kaede": {"_default": "<old prefix>", "<guild_id>": "<prefix>", ...}}
+
+The file is shared by both bots, so the cache re-checks its mtime at most
+once every <poll_interval> seconds and reloads it when it changed. Writes
+go to a temp file that is then renamed over "prefixes.json", so the other
+bot never reads a half-written file.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+
+
+# key of a bot's fallback prefix in its dict (see module docstring)
+DEFAULT_KEY = "_default"
+
+
+class PrefixCache:
+    """
+    <path>:             path of the prefixes file
+    <default>:          prefix used when nothing is configured
+    <poll_interval>:    min. seconds between mtime checks
+    """
+
+    def __init__(self, path="prefixes.json", default="!", poll_interval=1.0):
+        self.path = path
+        self.default = default
+        self.poll_interval = poll_interval
+
+        self._data = {}
+        self._stamp = None  # (mtime_ns, size) of the loaded file
+        self._checked = 0.0  # time.monotonic() of the last mtime check
+        self._lock = threading.RLock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        stamp = self._file_stamp()
+        if stamp is None:
+            self._data = {}
+        else:
+            try:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            except ValueError:
+                # keep the last good copy if the file is mid-edit by hand
+                traceback.print_exc()
+        self._stamp = stamp
+        self._checked = time.monotonic()
+
+    def refresh(self, force: bool = False):
+        """
+        Reload the file if it changed on disk (or if <force> is set).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked < self.poll_interval:
+                return
+            self._checked = now
+            if force or self._file_stamp() != self._stamp:
+                self._load()
+
+    def get(self, botname: str, gid=None) -> str:
+        """
+        Return <botname>'s prefix in guild <gid> (or the bot's default, if
+        <gid> is None or has no prefix of its own).
+        """
+        self.refresh()
+        entry = self._data.get(botname)
+        if isinstance(entry, dict):
+            if gid is not None:
+                prefix = entry.get(str(gid))
+                if prefix:
+                    return prefix
+            return entry.get(DEFAULT_KEY) or self.default
+        return entry or self.default
+
+    def set(self, botname: str, gid, prefix: str, overwrite: bool = True):
+        """
+        Set <botname>'s prefix in guild <gid> and save the file.
+        With <overwrite> False, an existing prefix is left alone.
+        """
+        with self._lock:
+            # start from what is on disk right now
+            self.refresh(force=True)
+            entry = self._data.get(botname)
+            if not isinstance(entry, dict):
+                # old shape: keep the bot-wide prefix for the other guilds
+                entry = self._data[botname] = {DEFAULT_KEY: entry} if entry else {}
+            if not overwrite and entry.get(str(gid)):
+                return
+            entry[str(gid)] = prefix
+            self._save()
+
+    def remove(self, botname: str, gid):
+        """
+        Forget <botname>'s prefix in guild <gid> and save the file.
+        """
+        with self._lock:
+            self.refresh(force=True)
+            entry = self._data.get(botname)
+            if isinstance(entry, dict) and entry.pop(str(gid), None) is not None:
+                self._save()
+
+    def _save(self):
+        # atomic replace: write a temp file next to the real one, then rename
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".prefixes-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._stamp = self._file_stamp()
+        self._checked = time.monotonic()
+
+
+# basic tests + lookup microbenchmark below
+if __name__ == "__main__":
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "prefixes.json")
+    with open(path, "w") as f:
+        json.dump({"kaede": {"1": "?"}, "yoshimura": "+"}, f)
+
+    cache = PrefixCache(path, poll_interval=0.0)
+    assert cache.get("kaede", 1) == "?"
+    assert cache.get("kaede", 2) == "!"
+    assert cache.get("yoshimura", 1) == "+"  # old (bot-wide) shape
+
+    # a per-guild prefix doesn't reset the other guilds of an old-shape bot
+    cache.set("yoshimura", 2, "!", overwrite=False)
+    cache.set("yoshimura", 3, "?")
+    assert cache.get("yoshimura", 1) == "+" and cache.get("yoshimura") == "+"
+    assert cache.get("yoshimura", 2) == "!" and cache.get("yoshimura", 3) == "?"
+
+    # another process rewriting the file is picked up
+    other = PrefixCache(path)
+    other.set("kaede", 2, "$")
+    assert cache.get("kaede", 2) == "$"
+    other.set("kaede", 2, "%", overwrite=False)
+    assert cache.get("kaede", 2) == "$"
+    other.remove("kaede", 2)
+    assert cache.get("kaede", 2) == "!"
+
+    N = 100_000
+
+    def read_file_every_time():
+        with open(path, "r") as f:
+            return json.load(f)["kaede"].get("1", "!")
+
+    t0 = time.perf_counter()
+    for _ in range(N // 10):
+        read_file_every_time()
+    before = (time.perf_counter() - t0) / (N // 10)
+
+    cache = PrefixCache(path)
+    t0 = time.perf_counter()
+    for _ in range(N):
+        cache.get("kaede", 1)
+    after = (time.perf_counter() - t0) / N
+
+    print("prefix lookup latency:")
+    print(f"  json.load per message:  {before * 1e6:7.2f} us")
+    print(f"  PrefixCache.get():      {after * 1e6:7.2f} us")
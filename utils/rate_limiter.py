@@ -0,0 +1,153 @@
+"""
+Async token-bucket rate limiter for the UnbelievaBoat API.
+
+Instead of raising when a limit is hit (like the old `ratelimit` decorators
+did, which silently dropped awards inside the listeners' bare excepts),
+callers wait in a per-endpoint priority queue until a token is free:
+
+    - one bucket per endpoint (HTTP method), refilled at <rate> per second
+    - lower <priority> values are served first (see PRIORITY_*)
+    - at most <max_queue> callers wait at once; further callers block
+      before entering the queue (backpressure) rather than failing
+    - <penalize()> pauses an endpoint, e.g. for a server "Retry-After"
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+
+# lower = served first
+PRIORITY_HIGH = 0  # interactive calls (commands, boosts, balance checks)
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # background point awards (messages, reactions, streams)
+
+
+class TokenBucket:
+    """
+    <rate>:     tokens added per second
+    <capacity>: max. tokens (burst size)
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self) -> float:
+        """
+        Seconds until a token can be taken (0 if one is available now).
+        """
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class RateLimiter:
+    """
+    <limits>:       {endpoint: requests per second}
+    <max_queue>:    max. callers waiting for a token (across endpoints)
+    <default_rate>: rate for endpoints missing from <limits>
+    """
+
+    def __init__(self, limits: dict = None, max_queue: int = 256, default_rate=10):
+        self.limits = dict(limits or {})
+        self.default_rate = default_rate
+        self.max_queue = max_queue
+
+        self._buckets = {}
+        self._queues = {}  # endpoint -> heap of (priority, seq, future)
+        self._pumps = {}  # endpoint -> running pump task
+        self._seq = itertools.count()
+        self._slots = None  # asyncio.Semaphore(max_queue), made in the loop
+
+        # metrics (see <RateLimiter.get_stats()>)
+        self.granted = 0
+        self.penalties = 0
+        self.max_wait = 0.0
+
+    def bucket(self, endpoint) -> TokenBucket:
+        b = self._buckets.get(endpoint)
+        if b is None:
+            rate = self.limits.get(endpoint, self.default_rate)
+            b = self._buckets[endpoint] = TokenBucket(rate)
+        return b
+
+    async def acquire(self, endpoint, priority: int = PRIORITY_NORMAL):
+        """
+        Wait until a request to <endpoint> may be sent.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_queue)
+
+        t0 = time.monotonic()
+        async with self._slots:
+            fut = asyncio.get_event_loop().create_future()
+            heap = self._queues.setdefault(endpoint, [])
+            heapq.heappush(heap, (priority, next(self._seq), fut))
+
+            pump = self._pumps.get(endpoint)
+            if pump is None or pump.done():
+                self._pumps[endpoint] = asyncio.ensure_future(self._pump(endpoint))
+
+            # if cancelled, the heap entry stays; the pump skips done futures
+            await fut
+        self.max_wait = max(self.max_wait, time.monotonic() - t0)
+
+    async def _pump(self, endpoint):
+        """
+        Hand out tokens for <endpoint>, highest priority first.
+        """
+        heap = self._queues[endpoint]
+        bucket = self.bucket(endpoint)
+        while heap:
+            wait = bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            _, _, fut = heapq.heappop(heap)
+            if fut.done():
+                continue
+            bucket.take()
+            self.granted += 1
+            fut.set_result(None)
+
+            # let the woken caller run before the next grant
+            await asyncio.sleep(0)
+
+    def penalize(self, endpoint, seconds: float):
+        """
+        Hold all requests to <endpoint> for <seconds> (e.g. Retry-After).
+        """
+        self.penalties += 1
+        self.bucket(endpoint).block(seconds)
+
+    def queue_depth(self) -> int:
+        return sum(
+            sum(1 for *_, f in heap if not f.done()) for heap in self._queues.values()
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "granted": self.granted,
+            "queued": self.queue_depth(),
+            "penalties": self.penalties,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,265 @@
+"""
+In-memory index of a guild's roles by name.
+
+`discord.utils.get(guild.roles, name=...)` sorts every role of the guild
+(<Guild.roles> is rebuilt and sorted on each access) and then scans it; on
+guilds with hundreds of roles that is the cost of every reaction-role,
+verification and "has role?" check. <RoleIndex> maps
+
+    - role name -> role IDs with that name (lowest position first, so the
+      first one is the role `discord.utils.get()` would have returned)
+    - role ID   -> role name
+
+and resolves IDs with <Guild.get_role()> (a dict lookup), so it never holds
+on to stale Role objects. <RoleIndex.member_has()> checks a member's role
+ID set instead of building and scanning <Member.roles>.
+
+The index is kept current by <add()>/<remove()> (see the on_guild_role_*
+listeners in UserDataAccessor); <RoleIndexes> builds one lazily per guild.
+"""
+
+
+_NO_IDS = ()
+
+
+def member_role_ids(member):
+    """
+    Return a container of <member>'s role IDs that supports `in`.
+    """
+    # discord.py keeps them as a sorted SnowflakeList (see <member_has()>)
+    ids = getattr(member, "_roles", None)
+    if ids is not None:
+        return ids
+    return {role.id for role in member.roles}
+
+
+class RoleIndex:
+    """
+    <guild>:    discord.Guild whose roles are indexed
+    """
+
+    def __init__(self, guild):
+        self.guild = guild
+        self._ids = {}  # role name -> tuple of role IDs (lowest position first)
+        self._names = {}  # role ID -> role name
+        self._positions = {}  # role ID -> position (when indexed)
+        for role in guild.roles:
+            self.add(role)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, role):
+        """
+        Index (or re-index, after a rename/move) <role>.
+        """
+        self.remove(role.id)
+        self._names[role.id] = role.name
+        self._positions[role.id] = role.position
+        ids = self._ids.get(role.name, _NO_IDS) + (role.id,)
+        self._ids[role.name] = tuple(sorted(ids, key=self._positions.__getitem__))
+
+    def remove(self, role_id: int):
+        """
+        Drop role <role_id> from the index (no-op if it isn't indexed).
+        """
+        name = self._names.pop(role_id, None)
+        if name is None:
+            return
+        del self._positions[role_id]
+        ids = tuple(i for i in self._ids[name] if i != role_id)
+        if ids:
+            self._ids[name] = ids
+        else:
+            del self._ids[name]
+
+    def ids(self, name: str) -> tuple:
+        """
+        Return the IDs of all roles named <name> (lowest position first).
+        """
+        return self._ids.get(name, _NO_IDS)
+
+    def get(self, name: str):
+        """
+        Return the role named <name> (like `discord.utils.get(guild.roles,
+        name=<name>)`), or None.
+        """
+        for role_id in self._ids.get(name, _NO_IDS):
+            role = self.guild.get_role(role_id)
+            if role is not None:
+                return role
+        return None
+
+    def name_of(self, role_id: int):
+        return self._names.get(role_id)
+
+    def member_has(self, member, name: str) -> bool:
+        """
+        Return True if <member> has a role named <name>.
+        """
+        ids = self._ids.get(name)
+        if not ids:
+            return False
+        member_ids = member_role_ids(member)
+        # SnowflakeList.has() is a binary search ("in" would scan the array)
+        has = getattr(member_ids, "has", member_ids.__contains__)
+        for role_id in ids:
+            # everyone has @everyone (its ID is the guild's; not in _roles)
+            if has(role_id) or role_id == self.guild.id:
+                return True
+        return False
+
+
+class RoleIndexes:
+    """
+    Guild ID (int) -> <RoleIndex>, built on first use.
+
+    <get_guild>:    callable(guild ID) -> discord.Guild (e.g. bot.get_guild)
+    """
+
+    def __init__(self, get_guild):
+        self.get_guild = get_guild
+        self._indexes = {}
+
+        # counters (see <RoleIndexes.get_stats()>)
+        self.builds = 0
+        self.updates = 0
+
+    def get(self, gid, guild=None) -> RoleIndex:
+        """
+        Return the RoleIndex of guild <gid>; faster if <guild> is provided.
+        """
+        gid = int(gid)
+        index = self._indexes.get(gid)
+        if index is None or (guild is not None and index.guild is not guild):
+            # first use, or the guild object was replaced (full reconnect)
+            if guild is None:
+                guild = self.get_guild(gid)
+            index = self._indexes[gid] = RoleIndex(guild)
+            self.builds += 1
+        return index
+
+    def role_added(self, role):
+        index = self._indexes.get(role.guild.id)
+        if index is not None:
+            index.add(role)
+            self.updates += 1
+
+    def role_removed(self, role):
+        index = self._indexes.get(role.guild.id)
+        if index is not None:
+            index.remove(role.id)
+            self.updates += 1
+
+    def drop(self, gid=None):
+        """
+        Forget guild <gid>'s index (all of them if <gid> is None).
+        """
+        if gid is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(int(gid), None)
+
+    def get_stats(self) -> dict:
+        return {
+            "guilds": len(self._indexes),
+            "roles": sum(len(index) for index in self._indexes.values()),
+            "builds": self.builds,
+            "updates": self.updates,
+        }
+
+
+# benchmark below:
+# guilds with hundreds of roles, members with dozens of roles each:
+# `discord.utils.get()` by name (role lookup, and "has role?" via Member.roles)
+# vs. RoleIndex, on real discord.py Guild/Member/Role objects
+# (run from the repo root: "python -m utils.role_index")
+if __name__ == "__main__":
+    import random
+    import time
+    from types import SimpleNamespace
+
+    import discord
+
+    N = 200000
+    rng = random.Random(0)
+    flags = discord.MemberCacheFlags.none()
+    state = SimpleNamespace(self_id=1, member_cache_flags=flags)
+    state.store_user = lambda data: discord.User(state=state, data=data)
+
+    def make_guild(n_roles, gid=1):
+        roles = [
+            {"id": 10_000 + i, "name": f"role-{i}", "position": i, "permissions": 0}
+            for i in range(n_roles)
+        ]
+        roles[0]["name"] = "@everyone"
+        roles[0]["id"] = gid
+        return discord.Guild(data={"id": gid, "roles": roles}, state=state)
+
+    def make_member(guild, uid, n_roles):
+        ids = rng.sample([r.id for r in guild.roles[1:]], n_roles)
+        user = {"id": uid, "username": "u", "discriminator": "0001", "avatar": None}
+        data = {"user": user}
+        data["roles"] = [str(i) for i in ids]
+        return discord.Member(data=data, guild=guild, state=state)
+
+    # correctness: renames, moves, duplicate names, deletes
+    guild = make_guild(20)
+    index = RoleIndex(guild)
+    role = guild.get_role(10_005)
+    assert index.get("role-5") is role
+    role.name = "Verified"
+    index.add(role)
+    assert index.get("role-5") is None and index.get("Verified") is role
+    dup = guild.get_role(10_002)
+    dup.name = "Verified"
+    index.add(dup)
+    assert index.get("Verified") is discord.utils.get(guild.roles, name="Verified")
+    member = make_member(guild, 5, 0)
+    member._roles.add(role.id)
+    assert index.member_has(member, "Verified") and not index.member_has(member, "x")
+    guild._remove_role(dup.id)
+    index.remove(dup.id)
+    assert index.get("Verified") is role and len(index) == 19
+
+    def timed(fn, n=N):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return n / (time.perf_counter() - t0)
+
+    for n_roles, per_member in ((100, 10), (300, 30), (800, 60)):
+        guild = make_guild(n_roles)
+        index = RoleIndex(guild)
+        members = [make_member(guild, 100 + i, per_member) for i in range(50)]
+        names = [r.name for r in guild.roles]
+        # mostly existing names (half in the upper range), some missing
+        lookups = [rng.choice(names) for _ in range(1000)] + ["missing"] * 100
+        checks = [(rng.choice(members), rng.choice(lookups)) for _ in range(1000)]
+
+        it = iter(range(10 ** 9))
+        old_get = timed(
+            lambda: discord.utils.get(guild.roles, name=lookups[next(it) % 1100])
+        )
+        new_get = timed(lambda: index.get(lookups[next(it) % 1100]))
+
+        def old_has():
+            member, name = checks[next(it) % 1000]
+            return discord.utils.get(member.roles, name=name) is not None
+
+        old_has = timed(old_has)
+        new_has = timed(lambda: index.member_has(*checks[next(it) % 1000]))
+
+        for m, name in checks:
+            old = discord.utils.get(m.roles, name=name) is not None
+            assert old == index.member_has(m, name)
+        for name in lookups:
+            assert discord.utils.get(guild.roles, name=name) is index.get(name)
+
+        print(
+            f"{n_roles} roles, {per_member}/member:  "
+            f"get by name {old_get:10,.0f}/s -> {new_get:10,.0f}/s "
+            f"({new_get / old_get:.0f}x);  "
+            f"has role {old_has:10,.0f}/s -> {new_has:10,.0f}/s "
+            f"({new_has / old_has:.0f}x)"
+        )
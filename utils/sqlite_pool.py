@@ -0,0 +1,376 @@
+"""
+Per-guild pool of warm SQLite connections.
+
+Connections handed out by <SQLitePool.acquire()> behave like regular
+sqlite3.Connection objects (including "with conn:" blocks), except that
+closing them -- or leaving a "with" block -- hands them back to the pool
+instead of tearing them down. Each connection keeps its own prepared
+statement cache (see <cached_statements>), so repeated queries skip the
+SQL compile step as long as the connection stays warm.
+
+New connections are tuned with <DEFAULT_PRAGMAS> (WAL journaling etc.),
+so Kaede and Yoshimura -- which write the same guild files -- no longer
+block each other's readers on every commit.
+"""
+import collections
+import sqlite3
+import threading
+import time
+import traceback
+
+
+# pragmas applied to every new connection; order matters (journal_mode first).
+#   journal_mode:   WAL lets readers run while another process commits
+#   synchronous:    NORMAL is safe with WAL (only the last commits may be
+#                   lost on power failure, never corrupted)
+#   cache_size:     negative = KiB of page cache per connection
+#   mmap_size:      bytes of the file to memory-map for reads
+#   busy_timeout:   ms to wait on a lock before raising "database is locked"
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+
+
+def apply_pragmas(conn, pragmas: dict = None):
+    """
+    Apply <pragmas> (default: <DEFAULT_PRAGMAS>) to an open connection.
+    """
+    if pragmas is None:
+        pragmas = DEFAULT_PRAGMAS
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}").fetchall()
+    return conn
+
+
+class PooledConnection:
+    """
+    Wrapper around a sqlite3.Connection borrowed from a <SQLitePool>.
+
+    Everything not defined here is forwarded to the real connection.
+    """
+
+    def __init__(self, pool, key, conn):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        # same commit/rollback behaviour as sqlite3.Connection's
+        # context manager, but the connection is returned afterwards
+        try:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        finally:
+            self.close()
+        return False
+
+    def close(self):
+        """
+        Return the connection to the pool (safe to call more than once).
+        """
+        if not self._released:
+            self._released = True
+            self._pool.release(self._key, self._conn)
+
+
+class SQLitePool:
+    """
+    Keeps up to <size> idle connections per key (normally a guild ID).
+
+    <size>:                 max. idle connections kept per key
+    <idle_timeout>:         seconds before an idle connection is evicted
+    <cached_statements>:    size of each connection's prepared statement cache
+    <pragmas>:              pragmas for new connections (see <DEFAULT_PRAGMAS>)
+    """
+
+    def __init__(
+        self, size=4, idle_timeout=300.0, cached_statements=256, pragmas=None
+    ):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.cached_statements = cached_statements
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+
+        # key -> deque of (connection, last_used); newest on the right
+        self._idle = {}
+        self._lock = threading.Lock()
+
+        # usage counters (see <SQLitePool.get_stats()>)
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+
+    def _open(self, path: str):
+        """
+        Open a brand new connection to <path>.
+        """
+        conn = sqlite3.connect(
+            path, cached_statements=self.cached_statements, check_same_thread=False
+        )
+        apply_pragmas(conn, self.pragmas)
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self, key, path: str) -> PooledConnection:
+        """
+        Borrow a connection for <key>; opens a new one if none are idle.
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn, _ = idle.pop()
+                self.reused += 1
+                return PooledConnection(self, key, conn)
+
+        return PooledConnection(self, key, self._open(path))
+
+    def release(self, key, conn):
+        """
+        Put <conn> back into the idle set for <key> (or close it if full).
+        """
+        try:
+            # never park a connection with a half-finished transaction;
+            # this matches what closing an uncommitted connection did before
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            traceback.print_exc()
+            self._close(conn)
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, collections.deque())
+            if len(idle) < self.size:
+                idle.append((conn, time.monotonic()))
+                return
+
+        self._close(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            traceback.print_exc()
+        with self._lock:
+            self.closed += 1
+
+    def evict_idle(self, max_idle: float = None) -> int:
+        """
+        Close connections that have been idle for longer than <max_idle>
+        seconds (defaults to <self.idle_timeout>).
+
+        RETURN: number of connections closed
+        """
+        if max_idle is None:
+            max_idle = self.idle_timeout
+        cutoff = time.monotonic() - max_idle
+
+        stale = []
+        with self._lock:
+            for key in list(self._idle):
+                idle = self._idle[key]
+
+                # oldest connections sit on the left
+                while idle and idle[0][1] < cutoff:
+                    stale.append(idle.popleft()[0])
+                if not idle:
+                    del self._idle[key]
+
+        for conn in stale:
+            self._close(conn)
+        return len(stale)
+
+    def checkpoint(self, mode: str = "PASSIVE") -> int:
+        """
+        Run "PRAGMA wal_checkpoint(<mode>)" once for every pooled key.
+
+        RETURN: number of databases checkpointed
+        """
+        done = set()
+        for key, conn in self.idle_connections():
+            if key in done:
+                continue
+            try:
+                conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchall()
+                done.add(key)
+            except sqlite3.Error:
+                traceback.print_exc()
+        return len(done)
+
+    def idle_connections(self):
+        """
+        Return a list of (key, connection) pairs for every idle connection.
+
+        Connections stay in the pool; callers must not close them.
+        """
+        with self._lock:
+            return [(k, c) for k, idle in self._idle.items() for c, _ in idle]
+
+    def close(self, key=None):
+        """
+        Close idle connections for <key>, or for every key if <key> is None.
+        """
+        with self._lock:
+            if key is None:
+                idle = [c for q in self._idle.values() for c, _ in q]
+                self._idle.clear()
+            else:
+                idle = [c for c, _ in self._idle.pop(key, ())]
+
+        for conn in idle:
+            self._close(conn)
+
+    def get_stats(self) -> dict:
+        """
+        Return a snapshot of the pool's usage counters.
+        """
+        with self._lock:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "closed": self.closed,
+                "idle": sum(len(q) for q in self._idle.values()),
+                "keys": len(self._idle),
+            }
+
+
+def _storm_worker(path, journal_mode, n_messages, seed, out):
+    """
+    Benchmark helper (see below): one bot process handling a message storm.
+    Puts (elapsed seconds, worst read latency, lock errors) on <out>.
+    """
+    pragmas = dict(DEFAULT_PRAGMAS, journal_mode=journal_mode)
+    if journal_mode != "WAL":
+        pragmas["synchronous"] = "FULL"
+    pool = SQLitePool(pragmas=pragmas)
+
+    worst_read = 0.0
+    errors = 0
+    t0 = time.perf_counter()
+    for i in range(n_messages):
+        uid = str((i * 7 + seed) % 1000)
+        try:
+            r0 = time.perf_counter()
+            with pool.acquire("storm", path) as c:
+                c.execute("SELECT clearance FROM udata WHERE id=?", (uid,)).fetchall()
+            worst_read = max(worst_read, time.perf_counter() - r0)
+
+            with pool.acquire("storm", path) as c:
+                c.execute(
+                    "UPDATE udata SET total_messages = total_messages + 1 "
+                    "WHERE id=?",
+                    (uid,),
+                )
+        except sqlite3.OperationalError:
+            errors += 1
+    out.put((time.perf_counter() - t0, worst_read, errors))
+    pool.close()
+
+
+# basic benchmarks below:
+#   1. replays the accessor queries that one guild message triggers
+#      (user_exists, ADD_USER check, statistics update, clearance check, ...)
+#   2. two processes (Kaede + Yoshimura) hammering the same guild file,
+#      rollback journal vs. WAL
+if __name__ == "__main__":
+    import multiprocessing
+    import os
+    import tempfile
+
+    N_MESSAGES = 2000
+    QUERIES = [
+        ("SELECT EXISTS(SELECT 1 FROM udata WHERE id=?)", False),
+        ("UPDATE udata SET total_messages = total_messages + 1 WHERE id=?", True),
+        ("SELECT clearance FROM udata WHERE id=?", False),
+        ("SELECT member_status FROM udata WHERE id=?", False),
+        ("UPDATE udata SET xp = xp + 1 WHERE id=?", True),
+    ]
+
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "bench.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE udata(id text PRIMARY KEY, total_messages real, "
+            "clearance real, member_status text, xp real)"
+        )
+        conn.executemany(
+            "INSERT INTO udata VALUES(?,0,1,'verified',0)",
+            [(str(i),) for i in range(1000)],
+        )
+
+    def replay(connect):
+        for i in range(N_MESSAGES):
+            uid = str(i % 1000)
+            for cmd, write in QUERIES:
+                with connect() as c:
+                    c.execute(cmd, (uid,)).fetchall()
+
+    # before: one fresh connection per accessor call
+    opened = [0]
+
+    def raw_connect():
+        opened[0] += 1
+        return sqlite3.connect(path)
+
+    t0 = time.perf_counter()
+    replay(raw_connect)
+    raw_time = time.perf_counter() - t0
+
+    # after: pooled connections
+    pool = SQLitePool()
+    t0 = time.perf_counter()
+    replay(lambda: pool.acquire("bench", path))
+    pool_time = time.perf_counter() - t0
+    pool.close()
+
+    print("connections opened per message:")
+    print(f"  before: {opened[0] / N_MESSAGES:.3f}  ({raw_time:.2f}s)")
+    print(f"  after:  {pool.opened / N_MESSAGES:.3f}  ({pool_time:.2f}s)")
+
+    print("two-process message storm (per process):")
+    for mode in ("DELETE", "WAL"):
+        storm_path = os.path.join(tmpdir, f"storm_{mode}.sqlite3")
+        with sqlite3.connect(storm_path) as conn:
+            conn.execute(f"PRAGMA journal_mode={mode}")
+            conn.execute(
+                "CREATE TABLE udata(id text PRIMARY KEY, total_messages real, "
+                "clearance real)"
+            )
+            conn.executemany(
+                "INSERT INTO udata VALUES(?,0,1)", [(str(i),) for i in range(1000)]
+            )
+
+        out = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=_storm_worker, args=(storm_path, mode, N_MESSAGES, seed, out)
+            )
+            for seed in (0, 1)
+        ]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        elapsed = max(r[0] for r in results)
+        worst = max(r[1] for r in results)
+        errors = sum(r[2] for r in results)
+        print(
+            f"  {mode:<6}  {N_MESSAGES / elapsed:8.0f} msg/s  "
+            f"worst read {worst * 1000:7.1f} ms  lock errors {errors}"
+        )
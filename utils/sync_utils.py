@@ -3,21 +3,15 @@ Small collection of synchronous (normal) methods/functions/utilities.
 """
 import discord
 from discord.ext.commands import when_mentioned_or
-from blop_tknloader import unbelievaboat_token as ub_tkn
 import json
 import os
-from ratelimit import limits
 import re
-import requests
-from requests import patch, get, put
 import traceback
+from utils.prefix_cache import PrefixCache
 
 
-# common resources
-UB_BASE_URL = "https://unbelievaboat.com/api/v1"
-UB_USER_TEMPLATE_URL = UB_BASE_URL + "/guilds/{}/users/{}"
-# UB_TKN = "Token {}"
-UB_TKN = "{}"
+# shared, file-watched cache of "prefixes.json" (see utils/prefix_cache.py)
+prefix_cache = PrefixCache("prefixes.json")
 
 
 def create_prefixes_file(path="prefixes.json"):
@@ -31,17 +25,9 @@ def get_prefix(bot, message):
         if message.guild is None:
             return "!"
 
-        create_prefixes_file()
         botname = bot.user.name.lower()
-
-        with open("prefixes.json", "r") as f:
-            prefixes = json.load(f)
-
-        if prefixes[botname] in (None, ""):
-            prefixes[botname] = "!"
-            with open("prefixes.json", "w") as f:
-                json.dump(prefixes, f, indent=4)
-        return when_mentioned_or(prefixes[botname])(bot, message)
+        prefix = prefix_cache.get(botname, message.guild.id)
+        return when_mentioned_or(prefix)(bot, message)
 
     except:
         traceback.print_exc()
@@ -53,17 +39,8 @@ def get_prefix_str(bot, message):
         if message.guild is None:
             return "!"
 
-        create_prefixes_file()
         botname = bot.user.name.lower()
-
-        with open("prefixes.json", "r") as f:
-            prefixes = json.load(f)
-
-        if prefixes[bot.user.name.lower()] in (None, ""):
-            prefixes[botname] = "!"
-            with open("prefixes.json", "w") as f:
-                json.dump(prefixes, f, indent=4)
-        return prefixes[botname]
+        return prefix_cache.get(botname, message.guild.id)
 
     except:
         traceback.print_exc()
@@ -101,39 +78,3 @@ def stream_started(prev, curr):
         (curr.self_stream and (prev.self_stream != curr.self_stream)) and
         ((prev.channel is None) or (prev.channel == curr.channel))
     )
-
-
-@limits(calls=10, period=1.0)
-def ub_get(bot_id, gid, uid):
-    url = UB_USER_TEMPLATE_URL.format(gid, uid)
-    head = {"Authorization": UB_TKN.format(ub_tkn(bot_id))}
-    return get(url, headers=head)
-
-
-@limits(calls=10, period=1.0)
-def ub_put(bot_id, gid, uid, data):
-    url = UB_USER_TEMPLATE_URL.format(gid, uid)
-    head = {
-        "Accept": "application/json",
-        "Authorization": UB_TKN.format(ub_tkn(bot_id)),
-    }
-    return put(url, data=json.dumps(data), headers=head)
-
-
-@limits(calls=20, period=1.0)
-def ub_patch(bot_id, gid, uid, data):
-    url = UB_USER_TEMPLATE_URL.format(gid, uid)
-    head = {
-        "Accept": "application/json",
-        "Authorization": UB_TKN.format(ub_tkn(bot_id)),
-    }
-
-    # print((
-    #    f"[ub_addpoints] prepped request:\n\n"
-    #    f"url: {url}\n"
-    #    f"headers:\n{head}\n"
-    #    f"data:\n{data}"
-    #    f"\n\n"
-    # ))
-
-    return patch(url, data=json.dumps(data), headers=head)
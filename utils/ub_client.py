@@ -0,0 +1,166 @@
+"""
+Non-blocking UnbelievaBoat API client.
+
+One aiohttp session (and so one keep-alive connection pool) is shared by
+every call, instead of a fresh TLS handshake per request with `requests`.
+All calls are coroutines, so the gateway event loop keeps running while a
+request is in flight.
+
+Requests wait for a token from a <RateLimiter> (see utils/rate_limiter.py)
+instead of failing when the limit is hit, and 429 responses are retried
+after the server's Retry-After.
+"""
+import asyncio
+import json
+
+import aiohttp
+
+from utils.rate_limiter import RateLimiter, PRIORITY_NORMAL
+
+
+UB_BASE_URL = "https://unbelievaboat.com/api/v1"
+
+# requests per second, per endpoint (same limits the old
+# `ratelimit` decorators in utils/sync_utils.py used)
+UB_LIMITS = {"GET": 10, "PUT": 10, "PATCH": 20}
+
+
+class UBResponse:
+    """
+    Fully-read API response (mirrors the bits of requests.Response we use).
+    """
+
+    def __init__(self, status: int, text: str, headers=None):
+        self.status = status
+        self.status_code = status
+        self.text = text
+        self.headers = headers or {}
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def __repr__(self):
+        return f"<UBResponse [{self.status}]>"
+
+
+class UBClient:
+    """
+    <base_url>:         API root (point this at a mock server for tests)
+    <token_loader>:     callable(bot_id) -> UB API token
+    <timeout>:          default total timeout per request, in seconds
+    <max_connections>:  size of the keep-alive connection pool
+    <limiter>:          RateLimiter to queue requests on (default: <UB_LIMITS>)
+    <max_retries>:      times a 429'd request is retried before giving up
+    """
+
+    # UnbelievaBoat sends Retry-After in milliseconds
+    RETRY_AFTER_SCALE = 0.001
+
+    def __init__(
+        self,
+        base_url: str = UB_BASE_URL,
+        token_loader=None,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+        limiter: RateLimiter = None,
+        max_retries: int = 5,
+    ):
+        if token_loader is None:
+            from blop_tknloader import unbelievaboat_token as token_loader
+
+        self.base_url = base_url.rstrip("/")
+        self.token_loader = token_loader
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.limiter = RateLimiter(UB_LIMITS) if limiter is None else limiter
+        self.max_retries = max_retries
+
+        self._session = None
+        self._tokens = {}  # bot ID -> token (the loader reads a file)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # created lazily: aiohttp sessions must be made inside the event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    def _headers(self, bot_id) -> dict:
+        token = self._tokens.get(bot_id)
+        if token is None:
+            token = self._tokens[bot_id] = self.token_loader(bot_id)
+        return {"Accept": "application/json", "Authorization": token}
+
+    def user_url(self, gid, uid) -> str:
+        return f"{self.base_url}/guilds/{gid}/users/{uid}"
+
+    def retry_after(self, res: UBResponse) -> float:
+        """
+        Seconds to wait after a 429 response (1 second if not given).
+        """
+        try:
+            return float(res.headers["Retry-After"]) * self.RETRY_AFTER_SCALE
+        except (KeyError, ValueError):
+            pass
+        try:
+            return float(res.json()["retry_after"]) * self.RETRY_AFTER_SCALE
+        except (KeyError, ValueError, TypeError):
+            return 1.0
+
+    async def request(
+        self,
+        method: str,
+        bot_id,
+        gid,
+        uid,
+        data=None,
+        timeout: float = None,
+        priority: int = PRIORITY_NORMAL,
+    ) -> UBResponse:
+        """
+        Send one request for user <uid> in guild <gid>, waiting for the rate
+        limiter first (lower <priority> goes first).
+
+        Raises asyncio.TimeoutError / aiohttp.ClientError on network failure.
+        """
+        kwargs = {"headers": self._headers(bot_id)}
+        if data is not None:
+            kwargs["json"] = data
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        url = self.user_url(gid, uid)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(method, priority)
+
+            session = self._get_session()
+            async with session.request(method, url, **kwargs) as r:
+                res = UBResponse(r.status, await r.text(), dict(r.headers))
+
+            if res.status != 429 or attempt == self.max_retries:
+                return res
+
+            # hold every request to this endpoint, then retry
+            self.limiter.penalize(method, self.retry_after(res))
+        return res
+
+    async def get(self, bot_id, gid, uid, **kwargs) -> UBResponse:
+        return await self.request("GET", bot_id, gid, uid, **kwargs)
+
+    async def put(self, bot_id, gid, uid, data, **kwargs) -> UBResponse:
+        return await self.request("PUT", bot_id, gid, uid, data, **kwargs)
+
+    async def patch(self, bot_id, gid, uid, data, **kwargs) -> UBResponse:
+        return await self.request("PATCH", bot_id, gid, uid, data, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # give the connector a moment to close its sockets
+            await asyncio.sleep(0)
@@ -0,0 +1,120 @@
+"""
+Compact in-memory set of user IDs known to be in a guild's database.
+
+IDs loaded from the database live in a sorted array of int64 (8 bytes per
+user instead of ~100 for a set of str), and membership is a binary search.
+Users added or removed afterwards go into two small sets, which are merged
+back into the array once they grow past <merge_threshold>.
+"""
+from array import array
+from bisect import bisect_left
+
+
+class UserIndex:
+    """
+    Membership index for one guild.
+
+    <ids>:              iterable of user IDs (int or numeric str)
+    <merge_threshold>:  pending adds/removes before the array is rebuilt
+    """
+
+    def __init__(self, ids=(), merge_threshold: int = 1024):
+        self.merge_threshold = merge_threshold
+        self._ids = array("q", sorted(set(self._to_int(i) for i in ids)))
+        self._added = set()
+        self._removed = set()
+
+    @staticmethod
+    def _to_int(uid) -> int:
+        return uid if isinstance(uid, int) else int(uid)
+
+    def _in_array(self, uid: int) -> bool:
+        ids = self._ids
+        i = bisect_left(ids, uid)
+        return i < len(ids) and ids[i] == uid
+
+    def __contains__(self, uid) -> bool:
+        try:
+            uid = self._to_int(uid)
+        except (TypeError, ValueError):
+            return False
+        if uid in self._added:
+            return True
+        if uid in self._removed:
+            return False
+        return self._in_array(uid)
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._added) - len(self._removed)
+
+    def add(self, uid):
+        uid = self._to_int(uid)
+        self._removed.discard(uid)
+        if not self._in_array(uid):
+            self._added.add(uid)
+        self._maybe_merge()
+
+    def discard(self, uid):
+        try:
+            uid = self._to_int(uid)
+        except (TypeError, ValueError):
+            return
+        self._added.discard(uid)
+        if self._in_array(uid):
+            self._removed.add(uid)
+        self._maybe_merge()
+
+    def _maybe_merge(self):
+        if len(self._added) + len(self._removed) >= self.merge_threshold:
+            self.merge()
+
+    def merge(self):
+        """
+        Fold pending adds/removes into the sorted array.
+        """
+        if not (self._added or self._removed):
+            return
+        removed = self._removed
+        ids = [i for i in self._ids if i not in removed]
+        ids.extend(self._added)
+        ids.sort()
+        self._ids = array("q", ids)
+        self._added = set()
+        self._removed = set()
+
+    def nbytes(self) -> int:
+        """
+        Approximate size of the ID storage (excl. Python object overhead).
+        """
+        return self._ids.itemsize * len(self._ids) + 8 * (
+            len(self._added) + len(self._removed)
+        )
+
+
+# basic tests + memory comparison below:
+if __name__ == "__main__":
+    import random
+    import sys
+
+    N = 300_000
+    ids = [random.getrandbits(62) for _ in range(N)]
+    index = UserIndex(str(i) for i in ids)
+
+    assert all(str(i) in index for i in ids[:1000])
+    assert "not-an-id" not in index
+
+    new = random.getrandbits(62)
+    assert new not in index
+    index.add(new)
+    assert new in index
+    index.discard(ids[0])
+    assert ids[0] not in index
+    index.merge()
+    assert new in index and ids[0] not in index
+    assert len(index) == N
+
+    as_set = set(str(i) for i in ids)
+    set_bytes = sys.getsizeof(as_set) + sum(sys.getsizeof(s) for s in as_set)
+    print(f"{N} users:")
+    print(f"  set of str:  {set_bytes / 1e6:6.1f} MB")
+    print(f"  UserIndex:   {index.nbytes() / 1e6:6.1f} MB")
@@ -1,12 +1,11 @@
 from cogs.userdata_accessor import UserDataAccessor
 from discord.ext import commands
 from utils.custom_help_command import CustomHelpCommand
-from utils.sync_utils import create_prefixes_file, get_prefix
+from utils.sync_utils import get_prefix, prefix_cache
 import asyncio
 import blop_tknloader as tknloader
 import discord
 import functools
-import json
 import logging
 import os
 import platform
@@ -112,28 +111,14 @@ async def on_help_command_error(ctx, error):
 
 @bot.event
 async def on_guild_join(guild):
-    # create prefix file if needed
-    create_prefixes_file()
-
-    with open("prefixes.json", "r") as f:
-        prefixes = json.load(f)
-    if "yoshimura" not in prefixes:
-        prefixes["yoshimura"] = {}
-    prefixes["yoshimura"] = "!"  # default prefix
-    with open("prefixes.json", "w") as f:
-        json.dump(prefixes, f, indent=4)
+    # bot's default prefix for the new guild (keeps one set before a re-join)
+    prefix = prefix_cache.get("yoshimura")
+    prefix_cache.set("yoshimura", guild.id, prefix, overwrite=False)
 
 
 @bot.event
 async def on_guild_remove(guild):
-    # create prefix file if needed
-    create_prefixes_file()
-
-    with open("prefixes.json", "r") as f:
-        prefixes = json.load(f)
-    prefixes.pop("yoshimura", None)
-    with open("prefixes.json", "w") as f:
-        json.dump(prefixes, f, indent=4)
+    prefix_cache.remove("yoshimura", guild.id)
 
 
 @bot.event
@@ -165,13 +150,9 @@ async def on_message(message):
     if message.guild is not None:
         gid = str(message.guild.id)
         
-        # if system is NOT checking user's entry in DB...
-        if not accessor.checking_user:
-        
-            # attempt to add DB entry for user
-            accessor.check_user(gid, uid)
-        else:
-            await asyncio.sleep(0.3)
+        # attempt to add DB entry for user (off the event loop; the
+        # accessor's single writer thread serializes these)
+        await accessor.aio.check_user(gid, uid)
 
     # processing commands
     try:
@@ -180,9 +161,9 @@ async def on_message(message):
     except:
         return
 
-    # terminal update (stats on the message author)
-    if is_guild:
-        accessor.print_table(gid, uid)
+    # sampled activity record (inspect with "uda activity")
+    if message.guild is not None:
+        accessor.activity.record(gid, uid, "message", message.channel.id)
 
 
 @bot.event
@@ -192,7 +173,7 @@ async def on_member_join(member):
     """
     try:
         # [YOSHIMURA ACTION] create new DB entry for user
-        accessor.ADD_USER(str(member.guild.id), str(member.id))
+        await accessor.aio.ADD_USER(str(member.guild.id), str(member.id))
     except:
         traceback.print_exc()
 
@@ -218,7 +199,8 @@ async def on_raw_reaction_add(payload):
 
     # add member to DB if they're not already in
     if not member.bot:
-        accessor.check_user(gid, uid)
+        await accessor.aio.check_user(gid, uid)
+        accessor.activity.record(gid, uid, "reaction", payload.channel_id)
 
 
 @bot.event
@@ -239,8 +221,8 @@ async def on_member_remove(member):
     if member.bot:
         return
         
-    accessor.DELETE_USER(str(member.guild.id), str(member.id))
+    await accessor.aio.DELETE_USER(str(member.guild.id), str(member.id))
 
 
 # !STARTING UP THE BOT!
-bot.run(tknloader.bot_token("Yoshimura"))
\ No newline at end of file
+bot.run(tknloader.bot_token("Yoshimura"))
\ No newline at end of file